@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from SlabDesFireEnv import SlabDesFireEnv
+
+
+class AsyncDesFireEnv(object):
+    """
+    asyncio interface of SlabDesFireEnv. The blocking df_lib calls run in a bounded thread
+    executor, and the calls of one context are queued and run one by one in submission order.
+
+    Timeout and cancellation: a call still waiting in the queue is dropped and never reaches
+    the card. A call already sent to the card runs to the end before the next call starts, so
+    the order of commands on the card is kept; only its result is discarded. The caller should
+    then assume the command may have been executed.
+    """
+
+    def __init__(self, env=None, executor=None, maxWorkers=1, maxQueue=0, **kwargs):
+        """
+        env: SlabDesFireEnv to wrap, or None to create one with kwargs (transport, trace, stats)
+        executor: concurrent.futures executor shared with other envs, or None to own one with
+                  maxWorkers threads
+        maxQueue: maximal queued calls, send waits when the queue is full; 0 for unlimited
+        """
+        self.env = SlabDesFireEnv(**kwargs) if env is None else env
+        self._ownExecutor = executor is None
+        self._executor = ThreadPoolExecutor(maxWorkers, thread_name_prefix='df_lib-async') \
+            if executor is None else executor
+        self.maxQueue = maxQueue
+        self._queue = None
+        self._task = None
+        self._closed = False
+
+    async def __aenter__(self):
+        return await self.create()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            fn, args, future = item
+            if future.done():
+                # cancelled or timed out before started
+                continue
+            # the exception is passed on without raising it here, so its traceback does not hold
+            # the frame of this task, which a caller clearing the traceback would close
+            call = loop.run_in_executor(self._executor, fn, *args)
+            await asyncio.wait((call,))
+            if future.done():
+                continue
+            if call.exception() is not None:
+                future.set_exception(call.exception())
+            else:
+                future.set_result(call.result())
+
+    async def _submit(self, fn, args, timeout):
+        if self._closed:
+            raise Exception("Async desfire environment is closed")
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._queue = asyncio.Queue(self.maxQueue)
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+
+        async def wait():
+            await self._queue.put((fn, args, future))
+            return await future
+
+        return await asyncio.wait_for(wait(), timeout)
+
+    async def call(self, fn, *args, timeout=None):
+        """
+        Run fn(env, *args) in order with the commands of this context, e.g. a whole card job.
+        """
+        return await self._submit(fn, (self.env,) + args, timeout)
+
+    async def create(self, timeout=None):
+        await self._submit(self.env.create, (), timeout)
+        return self
+
+    async def free(self, timeout=None):
+        await self._submit(self.env.free, (), timeout)
+        return self
+
+    async def send(self, command, timeout=None):
+        """
+        Send command and return SlabDesFireResp, see SlabDesFireEnv.send.
+        timeout: seconds including time waiting in the queue, asyncio.TimeoutError if expired
+        """
+        return await self._submit(self.env.send, (command,), timeout)
+
+    async def close(self):
+        """
+        Wait for queued calls, free the context and shut down the owned executor.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None:
+            await self._queue.put((self.env.free, (), asyncio.get_running_loop().create_future()))
+            await self._queue.put(None)
+            await self._task
+        else:
+            self.env.free()
+        if self._ownExecutor:
+            self._executor.shutdown()
+
+
+if __name__ == '__main__':
+    pass
@@ -16,12 +16,210 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import functools
+import inspect
+import struct
+from binascii import hexlify
+
 from jbytes import JBytes
 
 
+class SlabDesFireCmdSpec(object):
+    """
+    Compiled layout of a DesFire command made of fixed-width fields.
+    Fields are "name:Type" strings, where Type is named after the JBytes put method: Byte, Short,
+    ShortLE, Int3Bytes, Int3BytesLE, Int, IntLE, or Mode for the comm mode code which also sets
+    the mode of the command. Values are checked and masked like the put methods.
+    Each spec is compiled once into a build function checking all fields and packing them with
+    one struct.Struct.
+    """
+    __slots__ = ('cmd', 'name', 'mode', 'fields', 'struct', 'build')
+    # struct slots of each type: (shift, mask), one slot per 'B' byte, 'H' short or 'I' int in LE
+    TYPES = {
+        'Byte': ((0, 0xFF),),
+        'Short': ((8, 0xFF), (0, 0xFF)),
+        'ShortLE': ((0, 0xFFFF),),
+        'Int3Bytes': ((16, 0xFF), (8, 0xFF), (0, 0xFF)),
+        'Int3BytesLE': ((0, 0xFFFF), (16, 0xFF)),
+        'Int': ((24, 0xFF), (16, 0xFF), (8, 0xFF), (0, 0xFF)),
+        'IntLE': ((0, 0xFFFFFFFF),),
+        'Mode': ((0, 0xFF),),
+    }
+    FORMATS = {0xFF: 'B', 0xFFFF: 'H', 0xFFFFFFFF: 'I'}
+
+    def __init__(self, cmd, name, mode, fields=()):
+        self.cmd = cmd
+        self.name = name
+        self.mode = mode
+        self.fields = tuple(tuple(x.split(':')) for x in fields)
+        names = [x[0] for x in self.fields]
+        lines = [f"def build({', '.join(names)}):"]
+        for fieldName, fieldType in self.fields:
+            if fieldType not in SlabDesFireCmdSpec.TYPES:
+                raise Exception(f"Unknown field type {fieldType}")
+            if fieldType != 'Mode':
+                lines.append(f"    if not isinstance({fieldName}, int):")
+                lines.append(f"        checkParmType({fieldName}, int, '{fieldName}')")
+        modes = [x[0] for x in self.fields if x[1] == 'Mode']
+        for fieldName in modes:
+            lines.append(f"    if {fieldName} not in MODES:")
+            lines.append(f"        raise Exception('Unknonw comm mode')")
+        # parameters of SlabDesFireCmd are already checked here
+        lines.append("    ret = newCmd(Cmd)")
+        lines.append(f"    ret.cmd, ret.name, ret.mode, ret.data = cmd, name, {modes[0] if modes else 'mode'}, JBytes()")
+        values = []
+        fmt = '<'
+        for fieldName, fieldType in self.fields:
+            for shift, mask in SlabDesFireCmdSpec.TYPES[fieldType]:
+                value = f"MODES_CODE[{fieldName}]" if fieldType == 'Mode' else fieldName
+                values.append(f"({value} >> {shift}) & {mask:#x}" if shift else f"{value} & {mask:#x}")
+                fmt += SlabDesFireCmdSpec.FORMATS[mask]
+        self.struct = struct.Struct(fmt)
+        if values:
+            lines.append(f"    ret.data.BYTES += pack({', '.join(values)})")
+        lines.append("    return ret")
+        namespace = {'checkParmType': SlabDesFireCmd._checkParmType, 'newCmd': object.__new__,
+                     'Cmd': SlabDesFireCmd, 'JBytes': JBytes,
+                     'MODES': SlabDesFireCmd.MODES, 'MODES_CODE': SlabDesFireCmd.MODES_CODE,
+                     'pack': self.struct.pack, 'cmd': cmd, 'name': name, 'mode': mode}
+        exec('\n'.join(lines), namespace)
+        self.build = namespace['build']
+
+    def pack(self, *values):
+        """
+        Pack field values into bytes. Comm mode should be given as code.
+        """
+        return self.struct.pack(*[(values[i] >> shift) & mask for i, x in enumerate(self.fields)
+                                  for shift, mask in SlabDesFireCmdSpec.TYPES[x[1]]])
+
+
+_CACHE_SIZE = 256
+# parameter types cached by value; others, such as JBytes hashed by identity, may change in place
+_IMMUTABLE_TYPES = frozenset((int, bool, str, bytes, type(None)))
+
+
+def _memoize(factory):
+    """
+    Decorate command factory to return frozen commands kept in a bounded LRU cache. Keyword
+    arguments and defaults are bound to positions first, so equal calls share one entry. Calls
+    with parameters not of immutable types are not cached.
+    """
+    signature = inspect.signature(factory)
+    cached = functools.lru_cache(maxsize=_CACHE_SIZE, typed=True)(
+        lambda *args: factory(*args).freeze())
+
+    @functools.wraps(factory)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        args = bound.args
+        for x in args:
+            if type(x) not in _IMMUTABLE_TYPES:
+                return factory(*args).freeze()
+        return cached(*args)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    _memoize.factories.append(wrapper)
+    return wrapper
+
+
+_memoize.factories = []
+
+
 class SlabDesFireCmd(object):
+    """
+    DesFire command of df_lib. A command is frozen by freeze(): its fields and data can not be
+    changed any more and its encoding is kept. Commands without parameters are interned frozen
+    instances, and commands often sent with the same parameters (SelectApp, GetKeyVersion,
+    GetFileSettings) are frozen instances from an LRU cache of CACHE_SIZE entries per factory.
+    Authentication and key commands are not cached, so keys are not kept by the process.
+    """
+    __slots__ = ('cmd', 'name', 'mode', 'data', '_encoded')
+    CACHE_SIZE = _CACHE_SIZE
     MODES = (None, 'plain', 'mac', 'full')
     MODES_CODE = {None: 0, 'plain': 0, 'mac': 1, 'full': 2}
+    # command layouts of fixed-width fields, compiled into SlabDesFireCmdSpec after the class
+    SPECS = {
+        'FreeMem': (0x6E, 'free_mem', 'mac'),
+        'Format': (0xFC, 'format', 'mac'),
+        'GetVersion': (0x60, 'get_version', 'mac'),
+        'GetCardUID': (0x51, 'get_card_uid', 'full'),
+        'InitializeKeySet': (0x56, 'initialize_key_set', 'mac', ('keySetNo:Byte', 'keySetType:Byte')),
+        'FinializeKeySet': (0x57, 'finialize_key_set', 'mac', ('keySetNo:Byte', 'keySetVersion:Byte')),
+        'RollKeySet': (0x55, 'roll_key_set', 'mac', ('keySetNo:Byte',)),
+        'GetKeySettings': (0x45, 'get_key_settings', 'mac'),
+        'ChangeKeySettings': (0x54, 'change_key_settings', 'full', ('settings:Byte',)),
+        'GetKeyVersion': (0x64, 'get_key_version', 'mac', ('keyNo:Byte',)),
+        'GetKeyVersionKeySet': (0x64, 'get_key_version', 'mac', ('keyNo:Byte', 'keySetNo:Byte')),
+        'DeleteApp': (0xDA, 'delete_app', 'mac', ('aid:Int3BytesLE',)),
+        'SelectApp': (0x5A, 'select_app', None, ('desfireAid1:Int3BytesLE',)),
+        'SelectApp2': (0x5A, 'select_app', None, ('desfireAid1:Int3BytesLE', 'desfireAid2:Int3BytesLE')),
+        'GetAppIDs': (0x6A, 'get_application_ids', 'mac'),
+        'GetDFNames': (0x6D, 'get_DF_names', 'mac'),
+        'GetDelegatedInfo': (0x69, 'get_delegated_info', 'mac', ('damSlotNo:ShortLE',)),
+        'CreateStdDataFile': (0xCD, 'create_std_data_file', 'mac',
+                              ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE', 'fileSize:Int3BytesLE')),
+        'CreateStdDataFileISO': (0xCD, 'create_std_data_file', 'mac',
+                                 ('fileNo:Byte', 'isoFileID:ShortLE', 'fileOption:Byte', 'accessRight:ShortLE',
+                                  'fileSize:Int3BytesLE')),
+        'CreateBackupDataFile': (0xCB, 'create_std_data_file', 'mac',
+                                 ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE', 'fileSize:Int3BytesLE')),
+        'CreateBackupDataFileISO': (0xCB, 'create_std_data_file', 'mac',
+                                    ('fileNo:Byte', 'isoFileID:ShortLE', 'fileOption:Byte', 'accessRight:ShortLE',
+                                     'fileSize:Int3BytesLE')),
+        'CreateValueFile': (0xCC, 'create_value_file', 'mac',
+                            ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE', 'lowLimit:IntLE',
+                             'upperLimit:IntLE', 'value:IntLE', 'limitedCreditEnable:Byte')),
+        'CreateLinearRecordFile': (0xC1, 'create_linear_record_file', 'mac',
+                                   ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE',
+                                    'recordSize:Int3BytesLE', 'recordQty:Int3BytesLE')),
+        'CreateLinearRecordFileISO': (0xC1, 'create_linear_record_file', 'mac',
+                                      ('fileNo:Byte', 'isoFileID:ShortLE', 'fileOption:Byte', 'accessRight:ShortLE',
+                                       'recordSize:Int3BytesLE', 'recordQty:Int3BytesLE')),
+        'CreateCyclicRecordFile': (0xC0, 'create_cyclic_record_file', 'mac',
+                                   ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE',
+                                    'recordSize:Int3BytesLE', 'recordQty:Int3BytesLE')),
+        'CreateCyclicRecordFileISO': (0xC0, 'create_cyclic_record_file', 'mac',
+                                      ('fileNo:Byte', 'isoFileID:ShortLE', 'fileOption:Byte', 'accessRight:ShortLE',
+                                       'recordSize:Int3BytesLE', 'recordQty:Int3BytesLE')),
+        'DeleteFile': (0xDF, 'delete_file', 'mac', ('fileNo:Byte',)),
+        'GetFileIDs': (0x6F, 'get_file_ids', 'mac'),
+        'GetISOFileIDs': (0x61, 'get_iso_file_ids', 'mac'),
+        'ChangeFileSettings': (0x5F, 'change_file_settings', 'full',
+                               ('fileNo:Byte', 'fileOption:Byte', 'accessRight:ShortLE')),
+        'ReadData': (0xBD, 'read_data', None,
+                     ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'ReadDataISO': (0xAD, 'read_data_iso', None,
+                        ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'WriteData': (0x3D, 'write_data', None,
+                      ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'WriteDataISO': (0x8D, 'write_data_iso', None,
+                         ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'GetValue': (0x6C, 'get_value', None, ('fileNo:Byte', 'commMode:Mode')),
+        'Credit': (0x0C, 'credit', None, ('fileNo:Byte', 'commMode:Mode', 'value:IntLE')),
+        'LimitedCredit': (0x1C, 'limited_credit', None, ('fileNo:Byte', 'commMode:Mode', 'value:IntLE')),
+        'Debit': (0xDC, 'debit', None, ('fileNo:Byte', 'commMode:Mode', 'value:IntLE')),
+        'ReadRecord': (0xBB, 'read_record', None,
+                       ('fileNo:Byte', 'recNo:Int3BytesLE', 'recCount:Int3BytesLE', 'commMode:Mode')),
+        'ReadRecordISO': (0xAB, 'read_record_iso', None,
+                          ('fileNo:Byte', 'recNo:Int3BytesLE', 'recCount:Int3BytesLE', 'commMode:Mode')),
+        'WriteRecord': (0x3B, 'write_record', None,
+                        ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'WriteRecordISO': (0x8B, 'write_record_iso', None,
+                           ('fileNo:Byte', 'offset:Int3BytesLE', 'length:Int3BytesLE', 'commMode:Mode')),
+        'UpdateRecord': (0xDB, 'update_record', None,
+                         ('fileNo:Byte', 'recNo:Int3BytesLE', 'offset:Int3BytesLE', 'length:Int3BytesLE',
+                          'commMode:Mode')),
+        'UpdateRecordISO': (0xBA, 'update_record_iso', None,
+                            ('fileNo:Byte', 'recNo:Int3BytesLE', 'offset:Int3BytesLE', 'length:Int3BytesLE',
+                             'commMode:Mode')),
+        'ClearRecordFile': (0xEB, 'write_record', 'mac', ('fileNo:Byte',)),
+        'CommitTransaction': (0xC7, 'commit_transaction', 'mac', ('option:Byte',)),
+        'AbortTransaction': (0xA7, 'abort_transaction', 'mac'),
+        'readSig': (0x3C, 'read_sig', 'full', ('addr:Byte',)),
+        'preparePC': (0xF0, 'proximity_check', None),
+    }
 
     @staticmethod
     def _checkParmType(parm, class_type, parm_name):
@@ -45,6 +243,45 @@ class SlabDesFireCmd(object):
         ret = JBytes().putByte(self.cmd).putBytes(self.data)
         return ret.hex()
 
+    def toCmdBytes(self):
+        """
+        Command in upper case hex string of ascii bytes, as sent to df_lib.
+        """
+        return b'%02X' % self.cmd + hexlify(self.data.BYTES).upper()
+
+    def freeze(self):
+        """
+        Make command immutable and keep its encoding.
+        """
+        self.data.BYTES = bytes(self.data.BYTES)
+        self._encoded = self.toCmdBytes()
+        self.__class__ = _FrozenSlabDesFireCmd
+        return self
+
+    @property
+    def frozen(self):
+        return False
+
+    @staticmethod
+    def prepare(name, **fields):
+        """
+        Return SlabDesFireCmdTemplate of command name in SPECS, e.g.
+        prepare('Debit', fileNo=1, commMode='full').bind(value=100)
+        fields: constant fields, the other fields are slots bound later
+        """
+        spec = SlabDesFireCmd.SPECS.get(name)
+        if spec is None:
+            raise Exception(f"Unknown command {name}")
+        return SlabDesFireCmdTemplate(spec, **fields)
+
+    @staticmethod
+    def clearCache():
+        """
+        Clear cached commands of all memoized factories.
+        """
+        for factory in _memoize.factories:
+            factory.cache_clear()
+
     @staticmethod
     def Authenticate(keyNo, key):
         SlabDesFireCmd._checkParmType(keyNo, int, 'keyNo')
@@ -91,11 +328,11 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def FreeMem():
-        return SlabDesFireCmd(0x6E, 'free_mem', 'mac')
+        return SlabDesFireCmd.CONSTANTS['FreeMem']
 
     @staticmethod
     def Format():
-        return SlabDesFireCmd(0xFC, 'format', 'mac')
+        return SlabDesFireCmd.CONSTANTS['Format']
 
     @staticmethod
     def SetConfiguration(option, data):
@@ -106,11 +343,11 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def GetVersion():
-        return SlabDesFireCmd(0x60, 'get_version', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetVersion']
 
     @staticmethod
     def GetCardUID():
-        return SlabDesFireCmd(0x51, 'get_card_uid', 'full')
+        return SlabDesFireCmd.CONSTANTS['GetCardUID']
 
     @staticmethod
     def ChangeKey(keyNo, new_key, old_key, aesVer):
@@ -139,47 +376,30 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def InitializeKeySet(keySetNo, keySetType):
-        SlabDesFireCmd._checkParmType(keySetNo, int, 'keySetNo')
-        SlabDesFireCmd._checkParmType(keySetType, int, 'keySetType')
-        ret = SlabDesFireCmd(0x56, 'initialize_key_set', 'mac')
-        ret.data.putByte(keySetNo).putByte(keySetType)
-        return ret
+        return SlabDesFireCmd.SPECS['InitializeKeySet'].build(keySetNo, keySetType)
 
     @staticmethod
     def FinializeKeySet(keySetNo, keySetVersion):
-        SlabDesFireCmd._checkParmType(keySetNo, int, 'keySetNo')
-        SlabDesFireCmd._checkParmType(keySetVersion, int, 'keySetVersion')
-        ret = SlabDesFireCmd(0x57, 'finialize_key_set', 'mac')
-        ret.data.putByte(keySetNo).putByte(keySetVersion)
-        return ret
+        return SlabDesFireCmd.SPECS['FinializeKeySet'].build(keySetNo, keySetVersion)
 
     @staticmethod
     def RollKeySet(keySetNo):
-        SlabDesFireCmd._checkParmType(keySetNo, int, 'keySetNo')
-        ret = SlabDesFireCmd(0x55, 'roll_key_set', 'mac')
-        ret.data.putByte(keySetNo)
-        return ret
+        return SlabDesFireCmd.SPECS['RollKeySet'].build(keySetNo)
 
     @staticmethod
     def GetKeySettings():
-        return SlabDesFireCmd(0x45, 'get_key_settings', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetKeySettings']
 
     @staticmethod
     def ChangeKeySettings(settings):
-        SlabDesFireCmd._checkParmType(settings, int, 'settings')
-        ret = SlabDesFireCmd(0x54, 'change_key_settings', 'full')
-        ret.data.putByte(settings)
-        return ret
+        return SlabDesFireCmd.SPECS['ChangeKeySettings'].build(settings)
 
     @staticmethod
+    @_memoize
     def GetKeyVersion(keyNo, keySetNo=None):
-        SlabDesFireCmd._checkParmType(keyNo, int, 'keyNo')
-        ret = SlabDesFireCmd(0x64, 'get_key_version', 'mac')
-        ret.data.putByte(keyNo)
-        if keySetNo is not None:
-            SlabDesFireCmd._checkParmType(keySetNo, int, 'keySetNo')
-            ret.data.putByte(keySetNo)
-        return ret
+        if keySetNo is None:
+            return SlabDesFireCmd.SPECS['GetKeyVersion'].build(keyNo)
+        return SlabDesFireCmd.SPECS['GetKeyVersionKeySet'].build(keyNo, keySetNo)
 
     @staticmethod
     def CreateApp(desfireAid, keyConf1, keyConf2, keyConf3=None, aksVersion=None, qytKeySets=None, maxKeySize=None,
@@ -216,10 +436,7 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def DeleteApp(aid):
-        SlabDesFireCmd._checkParmType(aid, int, 'aid')
-        ret = SlabDesFireCmd(0xDA, 'delete_app', 'mac')
-        ret.data.putInt3BytesLE(aid)
-        return ret
+        return SlabDesFireCmd.SPECS['DeleteApp'].build(aid)
 
     @staticmethod
     def CreateDelegatedApplication(desfireAid, damSlotNo, damSlotVer, quotaLimit, keyEncrypted, damMac,
@@ -268,108 +485,52 @@ class SlabDesFireCmd(object):
         return ret
 
     @staticmethod
+    @_memoize
     def SelectApp(desfireAid1, desfireAid2=None):
-        SlabDesFireCmd._checkParmType(desfireAid1, int, 'desfireAid1')
-        ret = SlabDesFireCmd(0x5A, 'select_app', None)
-        ret.data.putInt3BytesLE(desfireAid1)
-        if desfireAid2 is not None:
-            SlabDesFireCmd._checkParmType(desfireAid2, int, 'desfireAid2')
-            ret.data.putInt3BytesLE(desfireAid2)
-        return ret
+        if desfireAid2 is None:
+            return SlabDesFireCmd.SPECS['SelectApp'].build(desfireAid1)
+        return SlabDesFireCmd.SPECS['SelectApp2'].build(desfireAid1, desfireAid2)
 
     @staticmethod
     def GetAppIDs():
-        return SlabDesFireCmd(0x6A, 'get_application_ids', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetAppIDs']
 
     @staticmethod
     def GetDFNames():
-        return SlabDesFireCmd(0x6D, 'get_DF_names', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetDFNames']
 
     @staticmethod
     def GetDelegatedInfo(damSlotNo):
-        SlabDesFireCmd._checkParmType(damSlotNo, int, 'damSlotNo')
-        ret = SlabDesFireCmd(0x69, 'get_delegated_info', 'mac')
-        ret.data.putShortLE(damSlotNo)
-        return ret
+        return SlabDesFireCmd.SPECS['GetDelegatedInfo'].build(damSlotNo)
 
     @staticmethod
     def CreateStdDataFile(fileNo, fileOption, accessRight, fileSize, isoFileID=None):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        ret = SlabDesFireCmd(0xCD, 'create_std_data_file', 'mac')
-        ret.data.putByte(fileNo)
-        if isoFileID is not None:
-            SlabDesFireCmd._checkParmType(isoFileID, int, 'isoFileID')
-            ret.data.putShortLE(isoFileID)
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        ret.data.putByte(fileOption)
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        ret.data.putShortLE(accessRight)
-        SlabDesFireCmd._checkParmType(fileSize, int, 'fileSize')
-        ret.data.putInt3BytesLE(fileSize)
-        return ret
+        if isoFileID is None:
+            return SlabDesFireCmd.SPECS['CreateStdDataFile'].build(fileNo, fileOption, accessRight, fileSize)
+        return SlabDesFireCmd.SPECS['CreateStdDataFileISO'].build(fileNo, isoFileID, fileOption, accessRight, fileSize)
 
     @staticmethod
     def CreateBackupDataFile(fileNo, fileOption, accessRight, fileSize, isoFileID=None):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        ret = SlabDesFireCmd(0xCB, 'create_std_data_file', 'mac')
-        ret.data.putByte(fileNo)
-        if isoFileID is not None:
-            SlabDesFireCmd._checkParmType(isoFileID, int, 'isoFileID')
-            ret.data.putShortLE(isoFileID)
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        ret.data.putByte(fileOption)
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        ret.data.putShortLE(accessRight)
-        SlabDesFireCmd._checkParmType(fileSize, int, 'fileSize')
-        ret.data.putInt3BytesLE(fileSize)
-        return ret
+        if isoFileID is None:
+            return SlabDesFireCmd.SPECS['CreateBackupDataFile'].build(fileNo, fileOption, accessRight, fileSize)
+        return SlabDesFireCmd.SPECS['CreateBackupDataFileISO'].build(fileNo, isoFileID, fileOption, accessRight, fileSize)
 
     @staticmethod
     def CreateValueFile(fileNo, fileOption, accessRight, lowLimit, upperLimit, value, limitedCreditEnable):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        SlabDesFireCmd._checkParmType(lowLimit, int, 'lowLimit')
-        SlabDesFireCmd._checkParmType(upperLimit, int, 'upperLimit')
-        SlabDesFireCmd._checkParmType(value, int, 'value')
-        SlabDesFireCmd._checkParmType(
-            limitedCreditEnable, int, 'limitedCreditEnable')
-        ret = SlabDesFireCmd(0xCC, 'create_value_file', 'mac')
-        ret.data.putByte(fileNo).putByte(fileOption).putShortLE(
-            accessRight).putIntLE(lowLimit).putIntLE(upperLimit).putIntLE(value).putByte(limitedCreditEnable)
-        return ret
+        return SlabDesFireCmd.SPECS['CreateValueFile'].build(fileNo, fileOption, accessRight, lowLimit, upperLimit,
+                                                             value, limitedCreditEnable)
 
     @staticmethod
     def CreateLinearRecordFile(fileNo, fileOption, accessRight, recordSize, recordQty, isoFileID=None):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        SlabDesFireCmd._checkParmType(recordSize, int, 'recordSize')
-        SlabDesFireCmd._checkParmType(recordQty, int, 'recordQty')
-        ret = SlabDesFireCmd(0xC1, 'create_linear_record_file', 'mac')
-        ret.data.putByte(fileNo)
-        if isoFileID is not None:
-            SlabDesFireCmd._checkParmType(isoFileID, int, 'isoFileID')
-            ret.data.putShortLE(isoFileID)
-        ret.data.putByte(fileOption).putShortLE(accessRight).putInt3BytesLE(
-            recordSize).putInt3BytesLE(recordQty)
-        return ret
+        if isoFileID is None:
+            return SlabDesFireCmd.SPECS['CreateLinearRecordFile'].build(fileNo, fileOption, accessRight, recordSize, recordQty)
+        return SlabDesFireCmd.SPECS['CreateLinearRecordFileISO'].build(fileNo, isoFileID, fileOption, accessRight, recordSize, recordQty)
 
     @staticmethod
     def CreateCyclicRecordFile(fileNo, fileOption, accessRight, recordSize, recordQty, isoFileID=None):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        SlabDesFireCmd._checkParmType(recordSize, int, 'recordSize')
-        SlabDesFireCmd._checkParmType(recordQty, int, 'recordQty')
-        ret = SlabDesFireCmd(0xC0, 'create_cyclic_record_file', 'mac')
-        ret.data.putByte(fileNo)
-        if isoFileID is not None:
-            SlabDesFireCmd._checkParmType(isoFileID, int, 'isoFileID')
-            ret.data.putShortLE(isoFileID)
-        ret.data.putByte(fileOption).putShortLE(accessRight).putInt3BytesLE(
-            recordSize).putInt3BytesLE(recordQty)
-        return ret
+        if isoFileID is None:
+            return SlabDesFireCmd.SPECS['CreateCyclicRecordFile'].build(fileNo, fileOption, accessRight, recordSize, recordQty)
+        return SlabDesFireCmd.SPECS['CreateCyclicRecordFileISO'].build(fileNo, isoFileID, fileOption, accessRight, recordSize, recordQty)
 
     @staticmethod
     def CreateTransactionMacFile(fileNo, fileOption, accessRight, macOption, key, keyVer):
@@ -388,20 +549,18 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def DeleteFile(fileNo):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        ret = SlabDesFireCmd(0xDF, 'delete_file', 'mac')
-        ret.data.putByte(fileNo)
-        return ret
+        return SlabDesFireCmd.SPECS['DeleteFile'].build(fileNo)
 
     @staticmethod
     def GetFileIDs():
-        return SlabDesFireCmd(0x6F, 'get_file_ids', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetFileIDs']
 
     @staticmethod
     def GetISOFileIDs():
-        return SlabDesFireCmd(0x61, 'get_iso_file_ids', 'mac')
+        return SlabDesFireCmd.CONSTANTS['GetISOFileIDs']
 
     @staticmethod
+    @_memoize
     def GetFileSettings(fileNo):
         ret = SlabDesFireCmd(0xF5, 'get_file_settings', 'mac')
         ret.data.putByte(fileNo)
@@ -409,11 +568,7 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def ChangeFileSettings(fileNo, fileOption, accessRight, nrAddARs=None, addAccessRights=None):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(fileOption, int, 'fileOption')
-        SlabDesFireCmd._checkParmType(accessRight, int, 'accessRight')
-        ret = SlabDesFireCmd(0x5F, 'change_file_settings', 'full')
-        ret.data.putByte(fileNo).putByte(fileOption).putShortLE(accessRight)
+        ret = SlabDesFireCmd.SPECS['ChangeFileSettings'].build(fileNo, fileOption, accessRight)
         if nrAddARs is not None:
             SlabDesFireCmd._checkParmType(nrAddARs, int, 'nrAddARs')
             addAccessRights = JBytes(addAccessRights)
@@ -424,188 +579,83 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def ReadData(fileNo, offset, length, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xBD, 'read_data', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(
-            length).putByte(SlabDesFireCmd.MODES_CODE[commMode])
-        return ret
+        return SlabDesFireCmd.SPECS['ReadData'].build(fileNo, offset, length, commMode)
 
     @staticmethod
     def ReadDataISO(fileNo, offset, length, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xAD, 'read_data_iso', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(
-            length).putByte(SlabDesFireCmd.MODES_CODE[commMode])
-        return ret
+        return SlabDesFireCmd.SPECS['ReadDataISO'].build(fileNo, offset, length, commMode)
 
     @staticmethod
     def WriteData(fileNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x3D,
-                             'write_data', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(
-            length).putByte(SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['WriteData'].build(fileNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def WriteDataISO(fileNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x8D,
-                             'write_data_iso', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(
-            length).putByte(SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['WriteDataISO'].build(fileNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def GetValue(fileNo, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x6C, 'get_value', commMode)
-        ret.data.putByte(fileNo).putByte(SlabDesFireCmd.MODES_CODE[commMode])
-        return ret
+        return SlabDesFireCmd.SPECS['GetValue'].build(fileNo, commMode)
 
     @staticmethod
     def Credit(fileNo, value, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(value, int, 'value')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x0C, 'credit', commMode)
-        ret.data.putByte(fileNo).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).putIntLE(value)
-        return ret
+        return SlabDesFireCmd.SPECS['Credit'].build(fileNo, commMode, value)
 
     @staticmethod
     def LimitedCredit(fileNo, value, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(value, int, 'value')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x1C, 'limited_credit', commMode)
-        ret.data.putByte(fileNo).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).putIntLE(value)
-        return ret
+        return SlabDesFireCmd.SPECS['LimitedCredit'].build(fileNo, commMode, value)
 
     @staticmethod
     def Debit(fileNo, value, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(value, int, 'value')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xDC, 'debit', commMode)
-        ret.data.putByte(fileNo).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).putIntLE(value)
-        return ret
+        return SlabDesFireCmd.SPECS['Debit'].build(fileNo, commMode, value)
 
     @staticmethod
     def ReadRecord(fileNo, recNo, recCount, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(recNo, int, 'recNo')
-        SlabDesFireCmd._checkParmType(recCount, int, 'recCount')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xBB, 'read_record', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(recNo).putInt3BytesLE(recCount).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode])
-        return ret
+        return SlabDesFireCmd.SPECS['ReadRecord'].build(fileNo, recNo, recCount, commMode)
 
     @staticmethod
     def ReadRecordISO(fileNo, recNo, recCount, commMode):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(recNo, int, 'recNo')
-        SlabDesFireCmd._checkParmType(recCount, int, 'recCount')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xAB, 'read_record_iso', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(recNo).putInt3BytesLE(recCount).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode])
-        return ret
+        return SlabDesFireCmd.SPECS['ReadRecordISO'].build(fileNo, recNo, recCount, commMode)
 
     @staticmethod
     def WriteRecord(fileNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x3B, 'write_record', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(length).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['WriteRecord'].build(fileNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def WriteRecordISO(fileNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0x8B, 'write_record_iso', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(offset).putInt3BytesLE(length).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['WriteRecordISO'].build(fileNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def UpdateRecord(fileNo, recNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(recNo, int, 'recNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xDB, 'update_record', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(
-            recNo).putInt3BytesLE(offset).putInt3BytesLE(length).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['UpdateRecord'].build(fileNo, recNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def UpdateRecordISO(fileNo, recNo, offset, length, commMode, *data):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        SlabDesFireCmd._checkParmType(recNo, int, 'recNo')
-        SlabDesFireCmd._checkParmType(offset, int, 'offset')
-        SlabDesFireCmd._checkParmType(length, int, 'length')
-        if commMode not in SlabDesFireCmd.MODES:
-            raise Exception("Unknonw comm mode")
-        ret = SlabDesFireCmd(0xBA, 'update_record_iso', commMode)
-        ret.data.putByte(fileNo).putInt3BytesLE(
-            recNo).putInt3BytesLE(offset).putInt3BytesLE(length).putByte(
-            SlabDesFireCmd.MODES_CODE[commMode]).append(*data)
+        ret = SlabDesFireCmd.SPECS['UpdateRecordISO'].build(fileNo, recNo, offset, length, commMode)
+        ret.data.append(*data)
         return ret
 
     @staticmethod
     def ClearRecordFile(fileNo):
-        SlabDesFireCmd._checkParmType(fileNo, int, 'fileNo')
-        ret = SlabDesFireCmd(0xEB, 'write_record', 'mac')
-        ret.data.putByte(fileNo)
-        return ret
+        return SlabDesFireCmd.SPECS['ClearRecordFile'].build(fileNo)
 
     @staticmethod
     def CommitTransaction(isNeedTMC):
-        ret = SlabDesFireCmd(0xC7, 'commit_transaction', 'mac')
-        ret.data.putByte(1 if isNeedTMC else 0)
-        return ret
+        return SlabDesFireCmd.SPECS['CommitTransaction'].build(1 if isNeedTMC else 0)
 
     @staticmethod
     def AbortTransaction():
-        return SlabDesFireCmd(0xA7, 'abort_transaction', 'mac')
+        return SlabDesFireCmd.CONSTANTS['AbortTransaction']
 
     @staticmethod
     def commitReaderID(readerID):
@@ -618,7 +668,7 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def preparePC():
-        return SlabDesFireCmd(0xF0, 'proximity_check', None)
+        return SlabDesFireCmd.CONSTANTS['preparePC']
 
     @staticmethod
     def proximityCheck(randC):
@@ -635,10 +685,7 @@ class SlabDesFireCmd(object):
 
     @staticmethod
     def readSig(addr):
-        SlabDesFireCmd._checkParmType(addr, int, 'addr')
-        ret = SlabDesFireCmd(0x3C, 'read_sig', 'full')
-        ret.data.putByte(addr)
-        return ret
+        return SlabDesFireCmd.SPECS['readSig'].build(addr)
 
     @staticmethod
     def vcISOSelect(aid, keyEnc, keyMac):
@@ -664,5 +711,94 @@ class SlabDesFireCmd(object):
         return ret
 
 
+class _FrozenSlabDesFireCmd(SlabDesFireCmd):
+    """
+    Frozen SlabDesFireCmd, see SlabDesFireCmd.freeze.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SlabDesFireCmd is frozen")
+
+    def __delattr__(self, key):
+        raise AttributeError("SlabDesFireCmd is frozen")
+
+    def __reduce__(self):
+        return _frozenCmd, (self.cmd, self.name, self.mode, self.data.BYTES)
+
+    def toCmdStr(self):
+        return self._encoded.decode('ascii')
+
+    def toCmdBytes(self):
+        return self._encoded
+
+    def freeze(self):
+        return self
+
+    @property
+    def frozen(self):
+        return True
+
+
+class SlabDesFireCmdTemplate(object):
+    """
+    Prepared command of a SlabDesFireCmdSpec. Fields given when prepared are constant, the other
+    fields are named slots. bind(**slots) checks and patches only the slot values into a reusable
+    hex buffer and returns the command in ascii bytes for SlabDesFireEnv.sendBytes. Slots not
+    bound keep their last values (0 at first). Comm mode fields must be constant.
+    Like the spec, bind is compiled once per template. A template is not thread safe.
+    """
+    __slots__ = ('spec', 'mode', 'slots', 'bind', '_buf')
+
+    def __init__(self, spec, **fields):
+        names = [x[0] for x in spec.fields]
+        for name in fields:
+            if name not in names:
+                raise Exception(f"{name} is not a field of {spec.name}")
+        for name, fieldType in spec.fields:
+            if fieldType == 'Mode' and name not in fields:
+                raise Exception(f"{name} of {spec.name} should be given")
+        cmd = spec.build(*[fields.get(x, 0) for x in names])
+        self.spec = spec
+        self.mode = cmd.mode
+        self.slots = tuple(x for x in names if x not in fields)
+        self._buf = bytearray(cmd.toCmdBytes())
+        namespace = {'checkParmType': SlabDesFireCmd._checkParmType, 'hexlify': hexlify, 'buf': self._buf}
+        lines = [f"def bind({''.join(f'*, ' for _ in self.slots[:1])}{', '.join(f'{x}=None' for x in self.slots)}):"]
+        # offset in hex buffer after command code
+        offset = 2
+        for name, fieldType in spec.fields:
+            typeSlots = SlabDesFireCmdSpec.TYPES[fieldType]
+            st = struct.Struct('<' + ''.join(SlabDesFireCmdSpec.FORMATS[x[1]] for x in typeSlots))
+            if name not in fields:
+                values = ', '.join(f"({name} >> {shift}) & {mask:#x}" if shift else f"{name} & {mask:#x}"
+                                   for shift, mask in typeSlots)
+                namespace[f'pack_{name}'] = st.pack
+                lines.append(f"    if {name} is not None:")
+                lines.append(f"        if not isinstance({name}, int):")
+                lines.append(f"            checkParmType({name}, int, '{name}')")
+                lines.append(f"        buf[{offset}:{offset + st.size * 2}] = hexlify(pack_{name}({values})).upper()")
+            offset += st.size * 2
+        lines.append("    return bytes(buf)")
+        exec('\n'.join(lines), namespace)
+        self.bind = namespace['bind']
+
+    def toCmdBytes(self):
+        return bytes(self._buf)
+
+    def toCmdStr(self):
+        return self._buf.decode('ascii')
+
+
+def _frozenCmd(cmd, name, mode, data):
+    ret = SlabDesFireCmd(cmd, name, mode)
+    ret.data.putBytes(data)
+    return ret.freeze()
+
+
+SlabDesFireCmd.SPECS = {k: SlabDesFireCmdSpec(*v) for k, v in SlabDesFireCmd.SPECS.items()}
+# interned instances of commands without parameters
+SlabDesFireCmd.CONSTANTS = {k: v.build().freeze() for k, v in SlabDesFireCmd.SPECS.items() if not v.fields}
+
 if __name__ == '__main__':
     pass
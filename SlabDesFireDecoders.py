@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import struct
+
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireResp import SlabDesFireResp
+
+
+class SlabDesFireDecoders(object):
+    """
+    Registry of response decoders keyed by command code. A decoder is a callable taking response
+    data and returning a result object whose fields are parsed only when accessed.
+    """
+    DECODERS = {}
+
+    @staticmethod
+    def register(code):
+        """
+        Decorator registering a result class or function as decoder of command code.
+        """
+
+        def wrapper(decoder):
+            SlabDesFireDecoders.DECODERS[code] = decoder
+            return decoder
+
+        return wrapper
+
+    @staticmethod
+    def commandCode(command):
+        """
+        Command code of SlabDesFireCmd, hex string, ascii bytes or int.
+        """
+        if isinstance(command, int):
+            return command
+        if hasattr(command, 'cmd'):
+            return command.cmd
+        if isinstance(command, (bytes, bytearray)):
+            command = command[:2].decode('ascii')
+        return int(command[:2], 16)
+
+    @staticmethod
+    def decode(command, resp):
+        """
+        Decode response of command. resp is SlabDesFireResp or response data in bytes.
+        Return None if no decoder is registered for the command code.
+        """
+        decoder = SlabDesFireDecoders.DECODERS.get(SlabDesFireDecoders.commandCode(command))
+        if decoder is None:
+            return None
+        if isinstance(resp, SlabDesFireResp):
+            if resp.sw != 0:
+                raise Exception(f"Command failed, SW={resp.sw:X}")
+            resp = resp.data
+        return decoder(resp)
+
+    @staticmethod
+    def send(env, command):
+        """
+        Send command with env and return decoded response.
+        """
+        return SlabDesFireDecoders.decode(command, env.send(command))
+
+
+class SlabDesFireResult(object):
+    """
+    Base of decoded results. It keeps response data, FIELDS are properties parsed on access.
+    """
+    __slots__ = ('data',)
+    FIELDS = ()
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(f'{x}={getattr(self, x)!r}' for x in self.FIELDS)})"
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self.data == other.data
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((type(self), self.data))
+
+    def toDict(self):
+        return {x: getattr(self, x) for x in self.FIELDS}
+
+
+class SlabDesFireResultList(SlabDesFireResult):
+    """
+    Decoded list of fixed size items, each item is parsed on access.
+    """
+    __slots__ = ()
+    ITEM = struct.Struct('B')
+
+    def __len__(self):
+        return len(self.data) // self.ITEM.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[x] for x in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Result list index out of range")
+        return self.ITEM.unpack_from(self.data, index * self.ITEM.size)[0]
+
+    def __iter__(self):
+        return (x[0] for x in self.ITEM.iter_unpack(self.data[:len(self) * self.ITEM.size]))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self)!r})"
+
+    def toDict(self):
+        return {'items': list(self)}
+
+
+@SlabDesFireDecoders.register(0x60)
+class SlabDesFireVersion(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('hwVendorID', 'hwType', 'hwSubType', 'hwMajorVersion', 'hwMinorVersion', 'hwStorageSize',
+              'hwProtocol', 'swVendorID', 'swType', 'swSubType', 'swMajorVersion', 'swMinorVersion',
+              'swStorageSize', 'swProtocol', 'uid', 'batchNo', 'productionWeek', 'productionYear')
+    _PART = struct.Struct('7B')
+
+    hwVendorID = property(lambda self: self.data[0])
+    hwType = property(lambda self: self.data[1])
+    hwSubType = property(lambda self: self.data[2])
+    hwMajorVersion = property(lambda self: self.data[3])
+    hwMinorVersion = property(lambda self: self.data[4])
+    hwStorageSize = property(lambda self: self.data[5])
+    hwProtocol = property(lambda self: self.data[6])
+    swVendorID = property(lambda self: self.data[7])
+    swType = property(lambda self: self.data[8])
+    swSubType = property(lambda self: self.data[9])
+    swMajorVersion = property(lambda self: self.data[10])
+    swMinorVersion = property(lambda self: self.data[11])
+    swStorageSize = property(lambda self: self.data[12])
+    swProtocol = property(lambda self: self.data[13])
+    uid = property(lambda self: self.data[14:21])
+    batchNo = property(lambda self: self.data[21:26])
+    productionWeek = property(lambda self: self.data[26] if len(self.data) > 26 else None)
+    productionYear = property(lambda self: self.data[27] if len(self.data) > 27 else None)
+
+    @property
+    def hardware(self):
+        return SlabDesFireVersion._PART.unpack_from(self.data, 0)
+
+    @property
+    def software(self):
+        return SlabDesFireVersion._PART.unpack_from(self.data, 7)
+
+    @property
+    def storageBytes(self):
+        """
+        Storage size in bytes, lower bound if the size is between two powers of 2.
+        """
+        return 1 << (self.hwStorageSize >> 1)
+
+    @property
+    def generation(self):
+        major = self.hwMajorVersion
+        return 'D40' if major == 0x00 else 'EV1' if major == 0x01 else 'EV2'
+
+
+class SlabDesFireFileSettings(SlabDesFireResult):
+    """
+    Common part of GetFileSettings result.
+    """
+    __slots__ = ()
+    FIELDS = ('fileType', 'commMode', 'accessRights', 'readAccess', 'writeAccess', 'readWriteAccess',
+              'changeAccess')
+    COMM_MODES = ('plain', 'mac', 'plain', 'full')
+    _HEADER = struct.Struct('<BBH')
+
+    fileType = property(lambda self: self.data[0])
+    fileOption = property(lambda self: self.data[1])
+    commMode = property(lambda self: SlabDesFireFileSettings.COMM_MODES[self.data[1] & 0x03])
+    accessRights = property(lambda self: SlabDesFireFileSettings._HEADER.unpack_from(self.data)[2])
+    readAccess = property(lambda self: self.data[3] >> 4)
+    writeAccess = property(lambda self: self.data[3] & 0x0F)
+    readWriteAccess = property(lambda self: self.data[2] >> 4)
+    changeAccess = property(lambda self: self.data[2] & 0x0F)
+
+
+class SlabDesFireDataFileSettings(SlabDesFireFileSettings):
+    __slots__ = ()
+    FIELDS = SlabDesFireFileSettings.FIELDS + ('fileSize',)
+
+    fileSize = property(lambda self: int.from_bytes(self.data[4:7], 'little'))
+
+
+class SlabDesFireValueFileSettings(SlabDesFireFileSettings):
+    __slots__ = ()
+    FIELDS = SlabDesFireFileSettings.FIELDS + ('lowerLimit', 'upperLimit', 'limitedCreditValue',
+                                               'limitedCreditEnable')
+    _VALUES = struct.Struct('<iiiB')
+
+    lowerLimit = property(lambda self: SlabDesFireValueFileSettings._VALUES.unpack_from(self.data, 4)[0])
+    upperLimit = property(lambda self: SlabDesFireValueFileSettings._VALUES.unpack_from(self.data, 4)[1])
+    limitedCreditValue = property(lambda self: SlabDesFireValueFileSettings._VALUES.unpack_from(self.data, 4)[2])
+    limitedCreditEnable = property(lambda self: SlabDesFireValueFileSettings._VALUES.unpack_from(self.data, 4)[3])
+
+
+class SlabDesFireRecordFileSettings(SlabDesFireFileSettings):
+    __slots__ = ()
+    FIELDS = SlabDesFireFileSettings.FIELDS + ('recordSize', 'maxRecords', 'currentRecords')
+    # file types of linear and cyclic record file
+    LINEAR = 3
+    CYCLIC = 4
+
+    recordSize = property(lambda self: int.from_bytes(self.data[4:7], 'little'))
+    maxRecords = property(lambda self: int.from_bytes(self.data[7:10], 'little'))
+    currentRecords = property(lambda self: int.from_bytes(self.data[10:13], 'little'))
+
+
+class SlabDesFireTransactionMacFileSettings(SlabDesFireFileSettings):
+    __slots__ = ()
+    FIELDS = SlabDesFireFileSettings.FIELDS + ('tmacOption',)
+
+    tmacOption = property(lambda self: self.data[4])
+
+
+# result class of each file type: standard, backup, value, linear record, cyclic record, transaction MAC
+FILE_SETTINGS = (SlabDesFireDataFileSettings, SlabDesFireDataFileSettings, SlabDesFireValueFileSettings,
+                 SlabDesFireRecordFileSettings, SlabDesFireRecordFileSettings, SlabDesFireTransactionMacFileSettings)
+
+
+@SlabDesFireDecoders.register(0xF5)
+def decodeFileSettings(data):
+    fileType = data[0]
+    return (FILE_SETTINGS[fileType] if fileType < len(FILE_SETTINGS) else SlabDesFireFileSettings)(data)
+
+
+@SlabDesFireDecoders.register(0x45)
+class SlabDesFireKeySettings(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('settings', 'masterKeyChangeable', 'freeListing', 'freeCreateDelete', 'configChangeable',
+              'changeKeyAccess', 'keyCount', 'crypto')
+    CRYPTOS = ('DES', '3K3DES', 'AES', None)
+
+    settings = property(lambda self: self.data[0])
+    masterKeyChangeable = property(lambda self: bool(self.data[0] & 0x01))
+    freeListing = property(lambda self: bool(self.data[0] & 0x02))
+    freeCreateDelete = property(lambda self: bool(self.data[0] & 0x04))
+    configChangeable = property(lambda self: bool(self.data[0] & 0x08))
+    changeKeyAccess = property(lambda self: self.data[0] >> 4)
+    keyCount = property(lambda self: self.data[1] & 0x0F)
+    crypto = property(lambda self: SlabDesFireKeySettings.CRYPTOS[self.data[1] >> 6])
+
+
+@SlabDesFireDecoders.register(0x64)
+class SlabDesFireKeyVersion(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('version',)
+
+    version = property(lambda self: self.data[0])
+
+
+@SlabDesFireDecoders.register(0x6A)
+class SlabDesFireAppIDs(SlabDesFireResultList):
+    """
+    List of 3-byte AIDs.
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.data) // 3
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[x] for x in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Result list index out of range")
+        return int.from_bytes(self.data[index * 3:index * 3 + 3], 'little')
+
+    def __iter__(self):
+        return (self[x] for x in range(len(self)))
+
+
+class SlabDesFireDFName(SlabDesFireResult):
+    """
+    DF name entry: AID, ISO file ID and DF name.
+    """
+    __slots__ = ()
+    FIELDS = ('aid', 'isoFid', 'dfName')
+
+    aid = property(lambda self: int.from_bytes(self.data[0:3], 'little'))
+    isoFid = property(lambda self: int.from_bytes(self.data[3:5], 'little'))
+    dfName = property(lambda self: self.data[5:])
+
+
+@SlabDesFireDecoders.register(0x6D)
+class SlabDesFireDFNames(SlabDesFireResult):
+    """
+    DF name entries of all applications. df_lib joins the entries in one response without their
+    length, so the data is split only where the boundaries are certain: each AID appears once,
+    and with the AIDs of the card, e.g. from GetAppIDs, only in their order. entries is None if
+    the data can not be split in one way only, which is common without the AIDs; read() sends
+    GetAppIDs for them. Entries are split once when the result is created.
+    """
+    __slots__ = ('_entries',)
+    FIELDS = ('entries',)
+    # AID and ISO file ID, and length of DF name
+    HEADER_SIZE = 5
+    NAME_SIZES = range(1, 17)
+
+    def __init__(self, data, aids=None):
+        """
+        aids: AIDs of the card in the order of GetAppIDs, None if unknown
+        """
+        SlabDesFireResult.__init__(self, data)
+        self._entries = self.split(aids)
+
+    @staticmethod
+    def read(env):
+        """
+        Send GetAppIDs and GetDFNames with env, the PICC selected, and return SlabDesFireDFNames
+        split by the AIDs of the card.
+        """
+        aids = SlabDesFireDecoders.send(env, SlabDesFireCmd.GetAppIDs())
+        resp = env.send(SlabDesFireCmd.GetDFNames())
+        if resp.sw != 0:
+            raise Exception(f"Command failed, SW={resp.sw:X}")
+        return SlabDesFireDFNames(resp.data, list(aids))
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def split(self, aids=None):
+        """
+        List of SlabDesFireDFName, None if the data can not be split in one way only.
+        aids: AIDs of the card in the order of GetAppIDs, None if unknown
+        """
+        found = []
+        order = None if aids is None else {aid: i for i, aid in enumerate(aids)}
+        self._split(0, order, -1, set(), [], found)
+        if len(found) != 1:
+            return None
+        return [SlabDesFireDFName(self.data[a:b]) for a, b in found[0]]
+
+    def _split(self, pos, order, last, seen, entries, found):
+        data = self.data
+        if pos == len(data):
+            found.append(list(entries))
+            return
+        if pos + SlabDesFireDFNames.HEADER_SIZE + SlabDesFireDFNames.NAME_SIZES.start > len(data):
+            return
+        aid = int.from_bytes(data[pos:pos + 3], 'little')
+        if aid in seen:
+            return
+        index = last
+        if order is not None:
+            index = order.get(aid, -1)
+            if index <= last:
+                return
+        seen.add(aid)
+        names = SlabDesFireDFNames.NAME_SIZES
+        for end in range(pos + SlabDesFireDFNames.HEADER_SIZE + names.start,
+                         min(pos + SlabDesFireDFNames.HEADER_SIZE + names.stop - 1, len(data)) + 1):
+            entries.append((pos, end))
+            self._split(end, order, index, seen, entries, found)
+            entries.pop()
+            # more than one way is as good as none
+            if len(found) > 1:
+                break
+        seen.discard(aid)
+
+    def __repr__(self):
+        entries = self.entries
+        return f"{self.__class__.__name__}({self.data.hex() if entries is None else entries!r})"
+
+
+@SlabDesFireDecoders.register(0x69)
+class SlabDesFireDelegatedInfo(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('damSlotVersion', 'quotaLimit', 'freeBlocks', 'aid')
+    _INFO = struct.Struct('<BHH')
+
+    damSlotVersion = property(lambda self: self.data[0])
+    quotaLimit = property(lambda self: SlabDesFireDelegatedInfo._INFO.unpack_from(self.data)[1])
+    freeBlocks = property(lambda self: SlabDesFireDelegatedInfo._INFO.unpack_from(self.data)[2])
+    aid = property(lambda self: int.from_bytes(self.data[5:8], 'little'))
+
+
+@SlabDesFireDecoders.register(0x6F)
+class SlabDesFireFileIDs(SlabDesFireResultList):
+    __slots__ = ()
+    ITEM = struct.Struct('B')
+
+
+@SlabDesFireDecoders.register(0x61)
+class SlabDesFireISOFileIDs(SlabDesFireResultList):
+    __slots__ = ()
+    ITEM = struct.Struct('<H')
+
+
+@SlabDesFireDecoders.register(0x6E)
+class SlabDesFireFreeMem(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('size',)
+
+    size = property(lambda self: int.from_bytes(self.data[0:3], 'little'))
+
+
+@SlabDesFireDecoders.register(0x6C)
+class SlabDesFireValue(SlabDesFireResult):
+    __slots__ = ()
+    FIELDS = ('value',)
+    _VALUE = struct.Struct('<i')
+
+    value = property(lambda self: SlabDesFireValue._VALUE.unpack_from(self.data)[0])
+
+
+if __name__ == '__main__':
+    pass
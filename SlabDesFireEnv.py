@@ -17,35 +17,50 @@
     limitations under the License.
 """
 import logging
-import platform
-import sys
-from ctypes import *
+import threading
+import time
+from array import array
+from binascii import unhexlify
 
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireDecoders import SlabDesFireDataFileSettings, SlabDesFireDecoders, SlabDesFireRecordFileSettings
+from SlabDesFireFileIO import SlabDesFireFileIOError
+from SlabDesFireResp import SlabDesFireResp
+from SlabDesFireStats import SlabDesFireStats
+from SlabDesFireTrace import SlabDesFireTrace
+from SlabDesFireTransport import *
 
-class SlabDesFireEnv(object):
-    def __init__(self):
-        if sys.platform == 'win32':
-            self.lib = windll.LoadLibrary(
-                './df_lib_x64.dll' if platform.architecture()[0].find('64') >= 0 else './df_lib_x86.dll')
-        elif sys.platform == 'linux':
-            if platform.architecture()[0].find('64')>=0:
-                self.lib = cdll.LoadLibrary('./libdf_lib_x64.so')
-            else:
-                raise Exception("df_lib do not support Linux x86 (32-bit) environment")
-        else:
-            raise Exception("Please use in Windows platform")
-
-        self._create = self.lib.desfire_api_create
-        self._create.restype = c_void_p
-
-        self._free = self.lib.desfire_api_free
-        self._free.argtypes = [c_void_p]
 
-        self._sendStr = self.lib.desfire_api_send_str
-        self._sendStr.argtypes = [c_void_p, c_char_p]
-        self._sendStr.restype = c_char_p
+class SlabDesFireEnv(object):
+    def __init__(self, transport=None, trace=None, stats=None, lib=None):
+        """
+        transport: SlabDesFireTransport instance, transport specification string such as
+                   'sim' or 'replay:trace.txt', or object providing df_lib API functions.
+                   If not given, environment variable DFLIB_TRANSPORT is used and the native
+                   df_lib library is loaded by default.
+        trace: SlabDesFireTrace to keep command/response records, or None to disable
+        stats: SlabDesFireStats to collect latency and status statistics, or None to disable
+        lib: object providing df_lib API functions, as transport; kept for compatibility
+        """
+        if lib is not None:
+            if transport is not None:
+                raise Exception("Only one of transport and lib should be given")
+            transport = lib
+        if transport is None or isinstance(transport, str):
+            transport = SlabDesFireTransport.open(transport)
+        elif not isinstance(transport, SlabDesFireTransport):
+            transport = SlabDesFireLibTransport(transport)
+        self.transport = transport
+        self.lib = getattr(transport, 'lib', None)
+        self.trace = trace
+        self.stats = stats
 
-        self.inst = c_void_p(0)
+        self.inst = None
+        # commands sent in current context, and count of contexts created; cmdCount is updated
+        # under _countLock as threads may share the env
+        self.cmdCount = 0
+        self.createCount = 0
+        self._countLock = threading.Lock()
         self.cmdStr = None
         self.respStr = None
         self.resp = None
@@ -53,50 +68,209 @@ class SlabDesFireEnv(object):
 
     def create(self):
         self.free()
-        self.inst = self._create()
-        if self.inst == 0:
+        self.inst = self.transport.create()
+        if not self.inst:
+            self.inst = None
             raise Exception("Create desfire environment instance failed")
+        with self._countLock:
+            self.cmdCount = 0
+        self.createCount += 1
         return self
 
     def free(self):
-        if self.inst != c_void_p(None):
-            self._free(self.inst)
-            self.inst = c_void_p(None)
+        if self.inst is not None:
+            self.transport.free(self.inst)
+            self.inst = None
         return self
 
+    @staticmethod
+    def encode(command):
+        """
+        Encode command to hex string in ascii bytes.
+        command: SlabDesFireCmd, hex string or hex string in ascii bytes
+        """
+        if hasattr(command, 'toCmdBytes'):
+            return command.toCmdBytes()
+        if hasattr(command, 'toCmdStr'):
+            command = command.toCmdStr()
+        if isinstance(command, str):
+            cmdBytes = command.encode(encoding='utf-8')
+        elif isinstance(command, (bytes, bytearray)):
+            cmdBytes = bytes(command)
+        else:
+            raise Exception("Command is invalid")
+        if len(cmdBytes) == 0:
+            raise Exception("Command is invalid")
+        return cmdBytes
+
+    def send(self, command):
+        """
+        Send command and return SlabDesFireResp.
+        command: SlabDesFireCmd, hex string or hex string in ascii bytes
+        The result is not kept in the env and cmdCount is updated under a lock, so threads may
+        share one env. Commands of the threads are interleaved on the card, so keep the commands
+        of one card session, e.g. authentication and the commands after it, in one thread.
+        """
+        return self.sendBytes(SlabDesFireEnv.encode(command))
+
+    def sendBytes(self, cmdBytes):
+        """
+        Send command in hex string of ascii bytes, e.g. from SlabDesFireCmd.toCmdBytes, and return
+        SlabDesFireResp. The bytes are passed to df_lib as they are.
+        """
+        if not isinstance(cmdBytes, bytes) or len(cmdBytes) == 0:
+            raise Exception("Command is invalid")
+        with self._countLock:
+            self.cmdCount += 1
+        # hex dump is only built when INFO log is enabled
+        isLog = logging.root.isEnabledFor(logging.INFO)
+        if isLog:
+            for line in SlabDesFireTrace.formatCmd(cmdBytes.decode('utf-8')):
+                logging.info(line)
+        if self.stats is not None:
+            start = time.perf_counter()
+            raw = self.transport.sendStr(self.inst, cmdBytes)
+            elapsed = time.perf_counter() - start
+        else:
+            raw = self.transport.sendStr(self.inst, cmdBytes)
+        if self.trace is not None:
+            self.trace.add(cmdBytes, raw)
+        resp = SlabDesFireResp(raw)
+        if self.stats is not None:
+            self.stats.record(cmdBytes, resp.sw, elapsed)
+        if isLog:
+            for line in SlabDesFireTrace.formatResult(resp.sw, resp.hex):
+                logging.info(line)
+        return resp
+
+    def sendMany(self, commands, allowed=(0,), stopOnError=True):
+        """
+        Send commands in order. All commands are encoded before the first one is sent.
+        allowed: status words treated as success
+        stopOnError: stop after the first command with status word not in allowed
+        Return (sws, payloads) of the commands sent: array('i') of status words, and list of
+        response data in bytes (empty for df_lib error).
+        """
+        cmds = [SlabDesFireEnv.encode(x) for x in commands]
+        sws = array('i')
+        payloads = []
+        inst = self.inst
+        sendStr = self.transport.sendStr
+        trace = self.trace
+        stats = self.stats
+        isLog = logging.root.isEnabledFor(logging.INFO)
+        elapsed = 0.0
+        countLock = self._countLock
+        for cmdBytes in cmds:
+            with countLock:
+                self.cmdCount += 1
+            if isLog:
+                for line in SlabDesFireTrace.formatCmd(cmdBytes.decode('utf-8')):
+                    logging.info(line)
+            if stats is not None:
+                start = time.perf_counter()
+                raw = sendStr(inst, cmdBytes)
+                elapsed = time.perf_counter() - start
+            else:
+                raw = sendStr(inst, cmdBytes)
+            if trace is not None:
+                trace.add(cmdBytes, raw)
+            sep = raw.find(b',')
+            if sep < 0:
+                raise Exception("Command response error")
+            sw = int(raw[:sep])
+            sws.append(sw)
+            payloads.append(unhexlify(memoryview(raw)[sep + 1:]) if sw >= 0 else b'')
+            if stats is not None:
+                stats.record(cmdBytes, sw, elapsed)
+            if isLog:
+                for line in SlabDesFireTrace.formatResult(sw, raw[sep + 1:].decode('utf-8', 'replace')):
+                    logging.info(line)
+            if stopOnError and sw not in allowed:
+                break
+        return sws, payloads
+
+    def _fileSettings(self, fileNo, settingsType):
+        """
+        Decoded GetFileSettings of fileNo, raising SlabDesFireFileIOError unless it is settingsType.
+        """
+        command = SlabDesFireCmd.GetFileSettings(fileNo)
+        resp = self.send(command)
+        if resp.sw != 0:
+            raise SlabDesFireFileIOError(f"GetFileSettings failed, SW={resp.sw:X}", resp.sw)
+        settings = SlabDesFireDecoders.decode(command, resp)
+        if not isinstance(settings, settingsType):
+            raise SlabDesFireFileIOError(f"File {fileNo} of type {settings.fileType} is not supported", 0)
+        return settings
+
+    def iter_read(self, fileNo, chunk, offset=0, length=None, commMode='plain'):
+        """
+        Read data file in chunks of chunk bytes, yielding each chunk as memoryview as soon as it
+        is received. All chunks share one buffer, so a chunk is only valid until the next one.
+        length: bytes to read, None for up to the end of file
+        """
+        if chunk <= 0:
+            raise Exception("Chunk size should be positive")
+        if offset < 0 or (length is not None and length < 0):
+            raise SlabDesFireFileIOError(f"Invalid range of file {fileNo}: offset {offset}, length {length}", 0)
+        if length is None:
+            size = self._fileSettings(fileNo, SlabDesFireDataFileSettings).fileSize
+            if offset > size:
+                raise SlabDesFireFileIOError(f"Offset {offset} is beyond size {size} of file {fileNo}", 0)
+            length = size - offset
+        template = SlabDesFireCmd.prepare('ReadData', fileNo=fileNo, commMode=commMode)
+        buffer = bytearray(min(chunk, length))
+        view = memoryview(buffer)
+        for x in range(offset, offset + length, chunk):
+            n = min(chunk, offset + length - x)
+            resp = self.sendBytes(template.bind(offset=x, length=n))
+            if resp.sw != 0:
+                raise SlabDesFireFileIOError(f"ReadData at offset {x} failed, SW={resp.sw:X}", resp.sw)
+            if len(resp.data) != n:
+                raise SlabDesFireFileIOError(f"ReadData at offset {x} returns {len(resp.data)} bytes instead of {n}", 0)
+            buffer[:n] = resp.data
+            yield view[:n]
+
+    def iter_records(self, fileNo, batch, commMode='plain', decode=None):
+        """
+        Read records of linear or cyclic record file from the latest one, batch records in one
+        ReadRecord, yielding each record as memoryview, or decode(memoryview) if decode is given.
+        All records share one buffer, so a record view is only valid until the next batch.
+        Other file types raise SlabDesFireFileIOError before any record is read.
+        """
+        if batch <= 0:
+            raise Exception("Batch size should be positive")
+        settings = self._fileSettings(fileNo, SlabDesFireRecordFileSettings)
+        recordSize = settings.recordSize
+        count = settings.currentRecords
+        template = SlabDesFireCmd.prepare('ReadRecord', fileNo=fileNo, commMode=commMode)
+        buffer = bytearray(min(batch, count) * recordSize)
+        view = memoryview(buffer)
+        for recNo in range(0, count, batch):
+            n = min(batch, count - recNo)
+            resp = self.sendBytes(template.bind(recNo=recNo, recCount=n))
+            if resp.sw != 0:
+                raise SlabDesFireFileIOError(f"ReadRecord of record {recNo} failed, SW={resp.sw:X}", resp.sw)
+            if len(resp.data) != n * recordSize:
+                raise SlabDesFireFileIOError(f"ReadRecord of record {recNo} returns {len(resp.data)} bytes "
+                                             f"instead of {n * recordSize}", 0)
+            buffer[:n * recordSize] = resp.data
+            # records of one response are in chronological order
+            for i in range(n - 1, -1, -1):
+                record = view[i * recordSize:(i + 1) * recordSize]
+                yield record if decode is None else decode(record)
+
     def sendStr(self, command):
-        logging.info('*' + '.' * 78 + '*')
+        """
+        Send command in hex string. The result is kept in sw, resp and respStr.
+        """
         if command is None or not isinstance(command, str) or len(command) == 0:
             raise Exception("Command is invalid")
-        logging.info("* CMD:")
-        if len(command) > 0:
-            lines = (command[i:i + 32] for i in range(0, len(command), 32))
-            for line in lines:
-                line = " ".join(line[i:i + 2] for i in range(0, len(line), 2))
-                line = " | ".join(line[i:i + 24] for i in range(0, len(line), 24))
-                logging.info(f"*     {line}")
+        ret = self.send(command)
         self.cmdStr = command
-        self.respStr = self._sendStr(
-            self.inst, self.cmdStr.encode(encoding='utf-8')).decode('utf-8')
-        parts = self.respStr.split(',')
-        if len(parts) != 2:
-            raise Exception("Command response error")
-        self.sw = int(parts[0])
-        self.resp = parts[1]
-        if self.sw >= 0:
-            logging.info(
-                f"* RESULT: SW={hex(self.sw).upper()[2:]}")
-            if len(self.resp) > 0:
-                lines = (self.resp[i:i + 32]
-                         for i in range(0, len(self.resp), 32))
-                for line in lines:
-                    line = " ".join(line[i:i + 2]
-                                    for i in range(0, len(line), 2))
-                    line = " | ".join(line[i:i + 24]
-                                      for i in range(0, len(line), 24))
-                    logging.info(f"*     {line}")
-        else:
-            logging.info(f'* RESULT: SW={self.sw}, {self.resp}')
+        self.respStr = repr(ret)
+        self.sw = ret.sw
+        self.resp = ret.hex
         return self
 
     @staticmethod
@@ -117,5 +291,59 @@ class SlabDesFireEnv(object):
         df.free()
 
 
+
+class SlabDesFireEnvWrapper(object):
+    """
+    Base of command wrappers in front of SlabDesFireEnv, such as SlabDesFireSession or
+    SlabDesFireMetaCache. A wrapper may wrap another one, as it has the same interface as env:
+    subclasses implement send(), and sendBytes, sendMany and sendStr are built on it. createCount
+    is read from the wrapped env, so each wrapper sees a recreated context of the env below.
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    @property
+    def createCount(self):
+        return self.env.createCount
+
+    def send(self, command):
+        raise NotImplementedError
+
+    def sendBytes(self, cmdBytes):
+        if not isinstance(cmdBytes, bytes) or len(cmdBytes) == 0:
+            raise Exception("Command is invalid")
+        return self.send(cmdBytes)
+
+    def sendMany(self, commands, allowed=(0,), stopOnError=True):
+        """
+        Send commands in order through send(), see SlabDesFireEnv.sendMany.
+        """
+        cmds = [SlabDesFireEnv.encode(x) for x in commands]
+        sws = array('i')
+        payloads = []
+        for cmdBytes in cmds:
+            resp = self.send(cmdBytes)
+            sws.append(resp.sw)
+            payloads.append(resp.data)
+            if stopOnError and resp.sw not in allowed:
+                break
+        return sws, payloads
+
+    def sendStr(self, command):
+        """
+        Send command in hex string, keeping the result in sw, resp and respStr of env.
+        """
+        if command is None or not isinstance(command, str) or len(command) == 0:
+            raise Exception("Command is invalid")
+        ret = self.send(command)
+        env = self.env
+        env.cmdStr = command
+        env.respStr = repr(ret)
+        env.sw = ret.sw
+        env.resp = ret.hex
+        return env
+
+
 if __name__ == '__main__':
     SlabDesFireEnv.selftest()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from binascii import hexlify
+from collections.abc import MutableMapping
+
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireMetaCache import SlabDesFireCardCache
+from SlabDesFireResp import SlabDesFireResp
+
+
+class SlabDesFireMmapStore(MutableMapping):
+    """
+    Persistent store of SlabDesFireFileCache in a memory-mapped file of fixed size. Keys are
+    (uid, aid, fileNo, authKeyNo, offset, length) and values (timestamp, data). Records are
+    appended to the file, a deleted key is appended as tombstone, and the file is compacted when
+    it is full. SlabDesFireFileCache does not put data read in full mode in a persistent store,
+    as it would be kept in plain on the disk.
+    """
+    MAGIC = b'DFC2'
+    PERSISTENT = True
+    _HEADER = struct.Struct('<4sI')
+    # uid length; aid, fileNo, authKeyNo (-1 for none), offset, length; timestamp, data length
+    # (-1 for tombstone)
+    _KEY = struct.Struct('<IBbII')
+    _VALUE = struct.Struct('<di')
+
+    def __init__(self, path, size=1 << 20):
+        self.path = path
+        self._lock = threading.Lock()
+        exists = os.path.exists(path) and os.path.getsize(path) >= SlabDesFireMmapStore._HEADER.size
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if os.path.getsize(path) < size:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._index = {}
+        magic, used = SlabDesFireMmapStore._HEADER.unpack_from(self._mm)
+        if magic != SlabDesFireMmapStore.MAGIC or used > len(self._mm):
+            used = self._reset()
+        self._used = used
+        self._load()
+
+    def _reset(self):
+        used = SlabDesFireMmapStore._HEADER.size
+        SlabDesFireMmapStore._HEADER.pack_into(self._mm, 0, SlabDesFireMmapStore.MAGIC, used)
+        return used
+
+    @staticmethod
+    def _encode(key, value):
+        uid, aid, fileNo, authKeyNo, offset, length = key
+        timestamp, data = value if value is not None else (0.0, b'')
+        key = SlabDesFireMmapStore._KEY.pack(aid, fileNo, -1 if authKeyNo is None else authKeyNo, offset, length)
+        return b''.join((bytes((len(uid),)), uid, key,
+                         SlabDesFireMmapStore._VALUE.pack(timestamp, -1 if value is None else len(data)), data))
+
+    def _load(self):
+        mm = self._mm
+        pos = SlabDesFireMmapStore._HEADER.size
+        while pos < self._used:
+            n = mm[pos]
+            uid = bytes(mm[pos + 1:pos + 1 + n])
+            pos += 1 + n
+            aid, fileNo, authKeyNo, offset, length = SlabDesFireMmapStore._KEY.unpack_from(mm, pos)
+            key = (uid, aid, fileNo, None if authKeyNo < 0 else authKeyNo, offset, length)
+            pos += SlabDesFireMmapStore._KEY.size
+            timestamp, length = SlabDesFireMmapStore._VALUE.unpack_from(mm, pos)
+            pos += SlabDesFireMmapStore._VALUE.size
+            if length < 0:
+                self._index.pop(key, None)
+            else:
+                self._index[key] = (timestamp, pos, length)
+                pos += length
+
+    def _append(self, record):
+        mm = self._mm
+        if self._used + len(record) > len(mm):
+            self._compact()
+            if self._used + len(record) > len(mm):
+                return False
+        mm[self._used:self._used + len(record)] = record
+        self._used += len(record)
+        SlabDesFireMmapStore._HEADER.pack_into(mm, 0, SlabDesFireMmapStore.MAGIC, self._used)
+        return True
+
+    def _compact(self):
+        live = [(k, self[k]) for k in list(self._index)]
+        self._index.clear()
+        self._used = self._reset()
+        for k, v in live:
+            record = SlabDesFireMmapStore._encode(k, v)
+            if self._used + len(record) > len(self._mm):
+                break
+            self._mm[self._used:self._used + len(record)] = record
+            self._index[k] = (v[0], self._used + len(record) - len(v[1]), len(v[1]))
+            self._used += len(record)
+        SlabDesFireMmapStore._HEADER.pack_into(self._mm, 0, SlabDesFireMmapStore.MAGIC, self._used)
+
+    def __getitem__(self, key):
+        timestamp, pos, length = self._index[key]
+        return timestamp, bytes(self._mm[pos:pos + length])
+
+    def __setitem__(self, key, value):
+        record = SlabDesFireMmapStore._encode(key, value)
+        with self._lock:
+            self._index.pop(key, None)
+            if self._append(record):
+                self._index[key] = (value[0], self._used - len(value[1]), len(value[1]))
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._index[key]
+            # the key is dropped anyway if the file is compacted
+            self._append(SlabDesFireMmapStore._encode(key, None))
+
+    def __iter__(self):
+        return iter(list(self._index))
+
+    def __len__(self):
+        return len(self._index)
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+            self._used = self._reset()
+
+    def flush(self):
+        self._mm.flush()
+        return self
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+
+class SlabDesFireFileCache(SlabDesFireCardCache):
+    """
+    Read-through cache of data file content in front of SlabDesFireEnv, keyed by
+    (UID, AID, fileNo, authenticated key number, offset, length). A ReadData or ReadDataISO
+    answered by the card is kept, and the same range or a range inside a kept one is answered
+    locally later under the same authentication, so data is only given where the card allowed
+    it. See SlabDesFireCardCache for how the card is known.
+
+    WriteData and WriteDataISO drop the kept ranges of the file at once and mark the file as
+    written in the transaction. CommitTransaction drops the ranges of the written files again,
+    as a backup file shows the written data only after commit, and AbortTransaction or
+    selecting another application just ends the transaction. DeleteFile, DeleteApp, Format and
+    SetConfiguration drop the ranges of the file, application or card. While the UID is unknown
+    nothing is cached, and a write or delete drops the ranges of all cards, again on the next
+    CommitTransaction, as the card it changes is not known.
+
+    Only use it for files which are not written by other terminals, e.g. profile or entitlement,
+    or limit it to such files by files. Data read in full mode is not kept in a persistent
+    store such as SlabDesFireMmapStore.
+    """
+    READ_CODES = (b'BD', b'AD')
+    WRITE_CODES = (b'3D', b'8D')
+    # commands changing file content of an unknown card
+    MUTATING = frozenset((b'3D', b'8D', b'3B', b'8B', b'DF', b'DA', b'FC', b'5C'))
+    COMM_MODE_FULL = 2
+
+    def __init__(self, env, store=None, files=None, ttl=None):
+        """
+        store: dict-like object of cached ranges, e.g. SlabDesFireMmapStore to keep them over
+               restarts; a new dict by default
+        files: collection of (aid, fileNo) to cache, None for all data files
+        ttl: seconds a range is kept, None for no expiry
+        """
+        SlabDesFireCardCache.__init__(self, env)
+        self.store = {} if store is None else store
+        self.files = None if files is None else frozenset(files)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # written (uid, aid, fileNo) in the transaction, None for a write to an unknown card
+        self._written = set()
+        self._persistent = getattr(self.store, 'PERSISTENT', False)
+        # ranges (authKeyNo, offset, length) kept of each (uid, aid, fileNo)
+        self._ranges = {}
+        for key in self.store:
+            self._ranges.setdefault(key[:3], set()).add(key[3:])
+
+    def setUID(self, uid):
+        SlabDesFireCardCache.setUID(self, uid)
+        self._written.clear()
+        return self
+
+    def invalidate(self, uid=None, aid=None, fileNo=None):
+        """
+        Forget ranges of a file, an application or a card; of all cards if uid is None.
+        """
+        if uid is None:
+            self.store.clear()
+            self._ranges.clear()
+            return self
+        prefix = tuple(x for x in (bytes(uid), aid, fileNo) if x is not None)
+        for file in [x for x in self._ranges if x[:len(prefix)] == prefix]:
+            for r in self._ranges.pop(file):
+                self.store.pop(file + r, None)
+        return self
+
+    def _find(self, file, offset, length):
+        ranges = self._ranges.get(file)
+        if not ranges:
+            return None
+        auth = self.authKeyNo
+        if (auth, offset, length) in ranges:
+            start, r = 0, (auth, offset, length)
+        elif length == 0:
+            return None
+        else:
+            r = next((x for x in ranges if x[0] == auth and x[2] and x[1] <= offset
+                      and offset + length <= x[1] + x[2]), None)
+            if r is None:
+                return None
+            start = offset - r[1]
+        entry = self.store.get(file + r)
+        if entry is None or (self.ttl is not None and time.time() - entry[0] >= self.ttl):
+            return None
+        return entry[1][start:start + length] if length else entry[1]
+
+    @staticmethod
+    def _range(cmdBytes):
+        fileNo = int(cmdBytes[2:4], 16)
+        offset = int.from_bytes(bytes.fromhex(cmdBytes[4:10].decode('ascii')), 'little')
+        length = int.from_bytes(bytes.fromhex(cmdBytes[10:16].decode('ascii')), 'little')
+        return fileNo, offset, length
+
+    def _update(self, code, cmdBytes, resp):
+        self._track(code, cmdBytes, resp)
+        if code == b'5A':
+            self._written.clear()
+        elif self.uid is None:
+            if code in SlabDesFireFileCache.MUTATING:
+                self._written.add(None)
+                self.invalidate()
+            elif code == b'C7' and None in self._written:
+                self.invalidate()
+                self._written.clear()
+            elif code == b'A7':
+                self._written.clear()
+        elif code in SlabDesFireFileCache.WRITE_CODES:
+            file = (self.uid, self.aid, int(cmdBytes[2:4], 16))
+            self._written.add(file)
+            self.invalidate(*file)
+        elif code == b'C7':
+            if None in self._written:
+                self.invalidate()
+            for file in self._written - {None}:
+                self.invalidate(*file)
+            self._written.clear()
+        elif code == b'A7':
+            self._written.clear()
+        elif code == b'DF':
+            self.invalidate(self.uid, self.aid, int(cmdBytes[2:4], 16))
+        elif code == b'DA':
+            self.invalidate(self.uid, int.from_bytes(bytes.fromhex(cmdBytes[2:8].decode('ascii')), 'little'))
+        elif code in (b'FC', b'5C'):
+            self.invalidate(self.uid)
+
+    def send(self, command):
+        """
+        Send command through env unless it reads a cached range. Return SlabDesFireResp.
+        """
+        cmdBytes = SlabDesFireEnv.encode(command).upper()
+        code = cmdBytes[:2]
+        self._checkContext()
+        if code not in SlabDesFireFileCache.READ_CODES or self.uid is None or self.aid is None:
+            resp = self.env.send(cmdBytes)
+            self._update(code, cmdBytes, resp)
+            return resp
+        fileNo, offset, length = SlabDesFireFileCache._range(cmdBytes)
+        if (self.files is not None and (self.aid, fileNo) not in self.files) \
+                or (self._persistent and int(cmdBytes[16:18], 16) == SlabDesFireFileCache.COMM_MODE_FULL):
+            resp = self.env.send(cmdBytes)
+            self._track(code, cmdBytes, resp)
+            return resp
+        file = (self.uid, self.aid, fileNo)
+        data = self._find(file, offset, length)
+        if data is not None:
+            self.hits += 1
+            return SlabDesFireResp(b'0,' + hexlify(data).upper())
+        self.misses += 1
+        resp = self.env.send(cmdBytes)
+        self._track(code, cmdBytes, resp)
+        if resp.sw == 0 and (length == 0 or len(resp.data) == length):
+            r = (self.authKeyNo, offset, length)
+            self.store[file + r] = (time.time(), resp.data)
+            self._ranges.setdefault(file, set()).add(r)
+        return resp
+
+
+if __name__ == '__main__':
+    pass
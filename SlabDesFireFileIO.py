@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import threading
+import time
+
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireDecoders import SlabDesFireDataFileSettings, SlabDesFireDecoders
+from jbytes import JBytesView
+
+
+class SlabDesFireFileIOError(Exception):
+    def __init__(self, message, sw):
+        super().__init__(message)
+        self.sw = sw
+
+
+class SlabDesFireChunkTuner(object):
+    """
+    Adaptive chunk size of one generation and comm mode. Chunk sizes are multiples of the data
+    bytes in one frame. The tuner keeps the average throughput of each size it used and climbs
+    from the best size: a neighbour size not measured yet is tried next, otherwise the best size
+    is used.
+    """
+    # data bytes of one frame in each comm mode, after MAC or padding of the generation
+    FRAME_SIZES = {
+        'D40': {'plain': 59, 'mac': 55, 'full': 48},
+        'EV1': {'plain': 59, 'mac': 51, 'full': 48},
+        'EV2': {'plain': 59, 'mac': 51, 'full': 48},
+    }
+    # (initial, maximal) frames in one chunk
+    FRAMES = {'D40': (4, 8), 'EV1': (4, 16), 'EV2': (8, 32)}
+    WEIGHT = 0.3
+
+    def __init__(self, generation='EV2', commMode='plain', adaptive=True):
+        if generation not in SlabDesFireChunkTuner.FRAMES:
+            raise Exception(f"Unknown generation {generation}")
+        self.frameSize = SlabDesFireChunkTuner.FRAME_SIZES[generation][commMode or 'plain']
+        self.frames, self.maxFrames = SlabDesFireChunkTuner.FRAMES[generation]
+        self.adaptive = adaptive
+        self.throughput = {}
+        self._lock = threading.Lock()
+
+    @property
+    def chunkSize(self):
+        return self.frames * self.frameSize
+
+    def record(self, chunkSize, length, elapsed):
+        """
+        Record bytes per second of an operation with chunkSize, and choose the next chunk size.
+        """
+        if not self.adaptive or elapsed <= 0 or length < chunkSize:
+            return self
+        frames = chunkSize // self.frameSize
+        speed = length / elapsed
+        with self._lock:
+            old = self.throughput.get(frames)
+            self.throughput[frames] = speed if old is None else old + (speed - old) * SlabDesFireChunkTuner.WEIGHT
+            best = max(self.throughput, key=self.throughput.get)
+            unmeasured = [x for x in (best + 1, best - 1) if 1 <= x <= self.maxFrames and x not in self.throughput]
+            self.frames = unmeasured[0] if unmeasured else best
+        return self
+
+
+class SlabDesFireFileIO(object):
+    """
+    Read and write standard or backup data files of any size. An operation is split into
+    chunks sized for the card generation and comm mode, all chunk commands are built first and
+    sent with SlabDesFireEnv.sendMany, and read chunks are stitched into one preallocated buffer.
+    The chunk size is tuned from the measured bytes per second of each operation.
+    The application must be selected and authenticated as the file requires. Each chunk is one
+    command of the context quota.
+    """
+
+    def __init__(self, env, generation='EV2', adaptive=True):
+        self.env = env
+        self.generation = generation
+        self.adaptive = adaptive
+        self.tuners = {}
+
+    @staticmethod
+    def generationFromVersion(version):
+        """
+        Card generation from GetVersion response data.
+        """
+        major = version[3]
+        return 'D40' if major == 0x00 else 'EV1' if major == 0x01 else 'EV2'
+
+    def tuner(self, commMode):
+        ret = self.tuners.get(commMode)
+        if ret is None:
+            ret = self.tuners[commMode] = SlabDesFireChunkTuner(self.generation, commMode, self.adaptive)
+        return ret
+
+    def fileSize(self, fileNo):
+        command = SlabDesFireCmd.GetFileSettings(fileNo)
+        resp = self.env.send(command)
+        if resp.sw != 0:
+            raise SlabDesFireFileIOError(f"GetFileSettings failed, SW={resp.sw:X}", resp.sw)
+        settings = SlabDesFireDecoders.decode(command, resp)
+        if not isinstance(settings, SlabDesFireDataFileSettings):
+            raise SlabDesFireFileIOError(f"File {fileNo} is not data file", 0)
+        return settings.fileSize
+
+    @staticmethod
+    def _chunks(offset, length, chunkSize):
+        for x in range(0, length, chunkSize):
+            yield offset + x, min(chunkSize, length - x)
+
+    def read(self, fileNo, offset=0, length=None, commMode='plain'):
+        """
+        Read length bytes from offset, up to the end of file if length is None. Return bytearray.
+        """
+        if offset < 0 or (length is not None and length < 0):
+            raise SlabDesFireFileIOError(f"Invalid range of file {fileNo}: offset {offset}, length {length}", 0)
+        if length is None:
+            size = self.fileSize(fileNo)
+            if offset > size:
+                raise SlabDesFireFileIOError(f"Offset {offset} is beyond size {size} of file {fileNo}", 0)
+            length = size - offset
+        return self.readInto(bytearray(length), fileNo, offset, commMode)
+
+    def readInto(self, buffer, fileNo, offset=0, commMode='plain'):
+        """
+        Read len(buffer) bytes from offset into buffer. Return buffer.
+        """
+        if offset < 0:
+            raise SlabDesFireFileIOError(f"Invalid offset {offset} of file {fileNo}", 0)
+        view = memoryview(buffer).cast('B')
+        length = len(view)
+        if length == 0:
+            return buffer
+        tuner = self.tuner(commMode)
+        chunkSize = tuner.chunkSize
+        chunks = list(SlabDesFireFileIO._chunks(offset, length, chunkSize))
+        cmds = [SlabDesFireCmd.ReadData(fileNo, x, n, commMode).toCmdBytes() for x, n in chunks]
+        start = time.perf_counter()
+        sws, payloads = self.env.sendMany(cmds)
+        elapsed = time.perf_counter() - start
+        if len(sws) != len(cmds) or sws[-1] != 0:
+            raise SlabDesFireFileIOError(f"ReadData at offset {chunks[len(sws) - 1][0]} failed, SW={sws[-1]:X}",
+                                         sws[-1])
+        for (x, n), data in zip(chunks, payloads):
+            if len(data) != n:
+                raise SlabDesFireFileIOError(f"ReadData at offset {x} returns {len(data)} bytes instead of {n}", 0)
+            view[x - offset:x - offset + n] = data
+        tuner.record(chunkSize, length, elapsed)
+        return buffer
+
+    def write(self, fileNo, offset, data, commMode='plain', commit=False):
+        """
+        Write data from offset. For backup file, commit sends CommitTransaction after the data.
+        """
+        view = JBytesView(data)
+        length = len(view)
+        tuner = self.tuner(commMode)
+        chunkSize = tuner.chunkSize
+        chunks = list(SlabDesFireFileIO._chunks(offset, length, chunkSize))
+        cmds = [SlabDesFireCmd.WriteData(fileNo, x, n, commMode, bytes(view[x - offset:x - offset + n])).toCmdBytes()
+                for x, n in chunks]
+        if commit:
+            cmds.append(SlabDesFireCmd.CommitTransaction(False).toCmdBytes())
+        if not cmds:
+            return self
+        start = time.perf_counter()
+        sws, _ = self.env.sendMany(cmds)
+        elapsed = time.perf_counter() - start
+        if len(sws) != len(cmds) or sws[-1] != 0:
+            what = f"WriteData at offset {chunks[len(sws) - 1][0]}" if len(sws) <= len(chunks) else "CommitTransaction"
+            raise SlabDesFireFileIOError(f"{what} failed, SW={sws[-1]:X}", sws[-1])
+        tuner.record(chunkSize, length, elapsed)
+        return self
+
+
+if __name__ == '__main__':
+    pass
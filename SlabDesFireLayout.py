@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireChunkTuner
+
+
+class SlabDesFireLayoutError(Exception):
+    def __init__(self, message, sw=0):
+        super().__init__(message)
+        self.sw = sw
+
+
+class SlabDesFireLayout(object):
+    """
+    Declarative card layout compiled into an ordered plan of SlabDesFireCmd. A layout is a dict,
+    read from JSON or TOML, e.g. in TOML:
+
+        generation = "EV2"                   # D40, EV1 or EV2, sizes chunks of initial data
+        format = true                        # format the card first
+        [picc]
+        key = "0000000000000000"             # PICC master key, method defaults to ISO
+        [[apps]]
+        aid = 0x000001
+        keySettings = 0x0B                   # keyConf1
+        crypto = "AES"                       # DES, 3K3DES or AES
+        keyCount = 5
+        isoFid = 0xAD01                      # optional, with dfName
+        dfName = "AD00000001"
+        keyConf3 = 0x01                      # optional, with aksVersion, keySets, maxKeySize, keySetSetting
+        authMethod = "AES"                   # D40, ISO, AES or EV2, defaults by crypto
+        changeKeySettings = 0x09             # optional, sent after the application is built
+        [[apps.keys]]                        # keyNo 0 is changed last
+        keyNo = 1
+        key = "112233445566778899AABBCCDDEEFF00"
+        version = 1                          # optional, AES key version
+        [[apps.files]]
+        fileNo = 1
+        type = "backup"                      # std, backup, value, linear, cyclic or tmac
+        commMode = "full"
+        access = {read = 1, write = 2, readWrite = 3, change = 0}   # or int 0x1230
+        size = 32
+        data = "0102..."                     # initial data; records = ["..."] for record files
+
+    Integers may also be given as hex strings, for JSON. A key without old key is changed from
+    the default key of the crypto, and application master keys are the default keys unless
+    masterKey is given.
+
+    The plan selects and authenticates each application once with its master key, creates the
+    files, changes the keys, then writes the initial data grouped by the key granting write
+    access, choosing keys so that as few authentications as possible are needed; backup and
+    record file writes are committed before the next authentication. Key settings and the master
+    key are changed last. Note the plan holds the keys, also in the plan cache files, so the
+    cache directory should only be readable by trusted users.
+    """
+    VERSION = 1
+    CRYPTOS = {'DES': 0x00, '3K3DES': 0x40, 'AES': 0x80}
+    AUTH_METHODS = {'DES': 'ISO', '3K3DES': 'ISO', 'AES': 'AES'}
+    # default keys for authentication and as old key of ChangeKey
+    DEFAULT_KEYS = {'DES': ('00' * 8, '00' * 16), '3K3DES': ('00' * 24, '00' * 24), 'AES': ('00' * 16, '00' * 16)}
+    FILE_OPTIONS = {'plain': 0x00, 'mac': 0x01, 'full': 0x03}
+    FREE = 0x0E
+    NEVER = 0x0F
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    @staticmethod
+    def loads(text, format='json'):
+        if format == 'json':
+            return SlabDesFireLayout(json.loads(text))
+        if format == 'toml':
+            if tomllib is None:
+                raise SlabDesFireLayoutError("TOML layout needs python 3.11 or package tomli")
+            return SlabDesFireLayout(tomllib.loads(text))
+        raise SlabDesFireLayoutError(f"Unknown layout format {format}")
+
+    @staticmethod
+    def load(path):
+        """
+        Load layout from .json or .toml file.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return SlabDesFireLayout.loads(f.read(), 'toml' if path.lower().endswith('.toml') else 'json')
+
+    @property
+    def digest(self):
+        """
+        SHA-256 of the layout content and the compiler version, in hex string.
+        """
+        text = json.dumps([SlabDesFireLayout.VERSION, self.spec], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _int(value, name):
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise SlabDesFireLayoutError(f"{name} should be int or hex string")
+        return value if isinstance(value, int) else int(value, 16)
+
+    @staticmethod
+    def _access(value):
+        if isinstance(value, dict):
+            return (SlabDesFireLayout._int(value.get('read', 0), 'read') << 12) \
+                | (SlabDesFireLayout._int(value.get('write', 0), 'write') << 8) \
+                | (SlabDesFireLayout._int(value.get('readWrite', 0), 'readWrite') << 4) \
+                | SlabDesFireLayout._int(value.get('change', 0), 'change')
+        return SlabDesFireLayout._int(value, 'access')
+
+    @staticmethod
+    def _auth(method, keyNo, key):
+        if method == 'D40':
+            return SlabDesFireCmd.Authenticate(keyNo, key)
+        if method == 'ISO':
+            return SlabDesFireCmd.AuthenticateISO(keyNo, key)
+        if method == 'AES':
+            return SlabDesFireCmd.AuthenticateAES(keyNo, key)
+        if method == 'EV2':
+            return SlabDesFireCmd.AuthenticateEV2First(keyNo, key, None)
+        raise SlabDesFireLayoutError(f"Unknown authentication method {method}")
+
+    def compile(self):
+        """
+        Return the plan: list of frozen SlabDesFireCmd.
+        """
+        spec = self.spec
+        cmds = [SlabDesFireCmd.SelectApp(0)]
+        picc = spec.get('picc', {})
+        if 'key' in picc:
+            cmds.append(SlabDesFireLayout._auth(picc.get('method', 'ISO'), 0, picc['key']))
+        if spec.get('format', False):
+            cmds.append(SlabDesFireCmd.Format())
+        apps = spec.get('apps', [])
+        for app in apps:
+            cmds.append(self._createApp(app))
+        for app in apps:
+            self._buildApp(app, cmds)
+        return [x if x.frozen else x.freeze() for x in cmds]
+
+    def _createApp(self, app):
+        _int = SlabDesFireLayout._int
+        crypto = app.get('crypto', 'AES')
+        if crypto not in SlabDesFireLayout.CRYPTOS:
+            raise SlabDesFireLayoutError(f"Unknown crypto {crypto}")
+        keyConf3 = app.get('keyConf3')
+        isoFid = app.get('isoFid')
+        if 'keyConf2' in app:
+            keyConf2 = _int(app['keyConf2'], 'keyConf2')
+        else:
+            keyConf2 = SlabDesFireLayout.CRYPTOS[crypto] | _int(app.get('keyCount', 1), 'keyCount') \
+                       | (0x20 if isoFid is not None else 0) | (0x10 if keyConf3 is not None else 0)
+        return SlabDesFireCmd.CreateApp(
+            _int(app['aid'], 'aid'), _int(app.get('keySettings', 0x0F), 'keySettings'), keyConf2,
+            None if keyConf3 is None else _int(keyConf3, 'keyConf3'),
+            *(None if app.get(x) is None else _int(app[x], x)
+              for x in ('aksVersion', 'keySets', 'maxKeySize', 'keySetSetting')),
+            None if isoFid is None else _int(isoFid, 'isoFid'), app.get('dfName'))
+
+    def _createFile(self, f):
+        _int = SlabDesFireLayout._int
+        fileNo = _int(f['fileNo'], 'fileNo')
+        fileType = f.get('type', 'std')
+        option = SlabDesFireLayout.FILE_OPTIONS[f.get('commMode', 'plain')]
+        access = SlabDesFireLayout._access(f.get('access', 0))
+        isoFid = None if f.get('isoFid') is None else _int(f['isoFid'], 'isoFid')
+        if fileType == 'std':
+            return SlabDesFireCmd.CreateStdDataFile(fileNo, option, access, _int(f['size'], 'size'), isoFid)
+        if fileType == 'backup':
+            return SlabDesFireCmd.CreateBackupDataFile(fileNo, option, access, _int(f['size'], 'size'), isoFid)
+        if fileType == 'value':
+            return SlabDesFireCmd.CreateValueFile(fileNo, option, access, _int(f.get('lower', 0), 'lower'),
+                                                  _int(f.get('upper', 0), 'upper'), _int(f.get('value', 0), 'value'),
+                                                  int(f.get('limitedCredit', 0)))
+        if fileType in ('linear', 'cyclic'):
+            create = SlabDesFireCmd.CreateLinearRecordFile if fileType == 'linear' \
+                else SlabDesFireCmd.CreateCyclicRecordFile
+            return create(fileNo, option, access, _int(f['recordSize'], 'recordSize'),
+                          _int(f['maxRecords'], 'maxRecords'), isoFid)
+        if fileType == 'tmac':
+            return SlabDesFireCmd.CreateTransactionMacFile(fileNo, option, access, _int(f.get('macOption', 0), 'macOption'),
+                                                           f['key'], _int(f.get('keyVersion', 0), 'keyVersion'))
+        raise SlabDesFireLayoutError(f"Unknown file type {fileType} of file {fileNo}")
+
+    def _buildApp(self, app, cmds):
+        _int = SlabDesFireLayout._int
+        crypto = app.get('crypto', 'AES')
+        method = app.get('authMethod', SlabDesFireLayout.AUTH_METHODS[crypto])
+        authKey, oldKey = SlabDesFireLayout.DEFAULT_KEYS[crypto]
+        aes = crypto == 'AES'
+        master = app.get('masterKey', authKey)
+        changeAccess = _int(app.get('keySettings', 0x0F), 'keySettings') >> 4
+        keys = {_int(k['keyNo'], 'keyNo'): k for k in app.get('keys', [])}
+        current = {0: master}
+
+        def keyOf(keyNo):
+            return current.get(keyNo, authKey)
+
+        def authenticate(keyNo):
+            if state[0] != keyNo:
+                cmds.append(SlabDesFireLayout._auth(method, keyNo, keyOf(keyNo)))
+                state[0] = keyNo
+
+        def changeKey(keyNo):
+            k = keys[keyNo]
+            cmds.append(SlabDesFireCmd.ChangeKey(keyNo, k['key'], k.get('oldKey', oldKey),
+                                                 k.get('version', 0) if aes else None))
+            current[keyNo] = k['key']
+
+        cmds.append(SlabDesFireCmd.SelectApp(_int(app['aid'], 'aid')))
+        state = [None]
+        authenticate(0)
+        files = app.get('files', [])
+        for f in files:
+            cmds.append(self._createFile(f))
+
+        # keys other than master key, grouped by the key allowed to change them
+        changer = {k: 0 if changeAccess == 0 else k if changeAccess == SlabDesFireLayout.FREE else changeAccess
+                   for k in keys if k != 0}
+        if changeAccess == SlabDesFireLayout.NEVER and changer:
+            raise SlabDesFireLayoutError(f"Keys of application {app['aid']} can not be changed")
+        for k in sorted(changer, key=lambda x: (changer[x] != state[0], changer[x], changer[x] == x, x)):
+            authenticate(changer[k])
+            changeKey(k)
+            if changer[k] == k:
+                # authentication is lost when the authenticated key is changed
+                state[0] = None
+
+        # initial data grouped by the key granting write access
+        pending = []
+        for f in files:
+            if f.get('data') is None and not f.get('records'):
+                continue
+            access = SlabDesFireLayout._access(f.get('access', 0))
+            candidates = {(access >> 8) & 0x0F, (access >> 4) & 0x0F} - {SlabDesFireLayout.NEVER}
+            if not candidates:
+                raise SlabDesFireLayoutError(f"File {f['fileNo']} of application {app['aid']} is not writable")
+            pending.append((f, {None} if SlabDesFireLayout.FREE in candidates else candidates))
+        generation = self.spec.get('generation', 'EV2')
+        while pending:
+            counts = {}
+            for _, candidates in pending:
+                for k in candidates:
+                    counts[k] = counts.get(k, 0) + 1
+            best = max(counts, key=lambda k: (counts[k], k is None or k == state[0], -(k or 0)))
+            group = [f for f, candidates in pending if best in candidates]
+            pending = [x for x in pending if best not in x[1]]
+            if best is not None:
+                authenticate(best)
+            self._writeGroup(group, generation, cmds)
+
+        if 'changeKeySettings' in app or 0 in keys:
+            authenticate(0)
+            if 'changeKeySettings' in app:
+                cmds.append(SlabDesFireCmd.ChangeKeySettings(_int(app['changeKeySettings'], 'changeKeySettings')))
+            if 0 in keys:
+                changeKey(0)
+
+    @staticmethod
+    def _writeGroup(files, generation, cmds):
+        commit = False
+        for f in files:
+            if f.get('data') is None:
+                continue
+            fileNo = SlabDesFireLayout._int(f['fileNo'], 'fileNo')
+            commMode = f.get('commMode', 'plain')
+            data = bytes.fromhex(f['data'].replace(' ', ''))
+            chunkSize = SlabDesFireChunkTuner(generation, commMode, False).chunkSize
+            for x in range(0, len(data), chunkSize):
+                chunk = data[x:x + chunkSize]
+                cmds.append(SlabDesFireCmd.WriteData(fileNo, x, len(chunk), commMode, chunk))
+            commit = commit or f.get('type', 'std') == 'backup'
+        if commit:
+            cmds.append(SlabDesFireCmd.CommitTransaction(False))
+        # a record file takes one new record in each transaction
+        records = [f for f in files if f.get('records')]
+        for i in range(max((len(f['records']) for f in records), default=0)):
+            for f in records:
+                if i < len(f['records']):
+                    record = bytes.fromhex(f['records'][i].replace(' ', ''))
+                    cmds.append(SlabDesFireCmd.WriteRecord(SlabDesFireLayout._int(f['fileNo'], 'fileNo'), 0,
+                                                           len(record), f.get('commMode', 'plain'), record))
+            cmds.append(SlabDesFireCmd.CommitTransaction(False))
+
+    _HEX_LINE = re.compile(rb'[0-9A-F]{2}(?:[0-9A-F]{2})*')
+
+    def plan(self, cacheDir=None):
+        """
+        Return the plan in hex strings of ascii bytes, one per command, as SlabDesFireCmd.toCmdBytes.
+        With cacheDir, the plan is read from the text file cacheDir/<digest>.plan of one command
+        per line if it exists, otherwise compiled and saved there.
+        """
+        if cacheDir is None:
+            return [x.toCmdBytes() for x in self.compile()]
+        path = os.path.join(cacheDir, f'{self.digest}.plan')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                ret = f.read().split()
+            if ret and all(SlabDesFireLayout._HEX_LINE.fullmatch(x) for x in ret):
+                return ret
+        ret = [x.toCmdBytes() for x in self.compile()]
+        os.makedirs(cacheDir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cacheDir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\n'.join(ret) + b'\n')
+        os.replace(tmp, path)
+        return ret
+
+    @staticmethod
+    def run(env, plan):
+        """
+        Send plan, of SlabDesFireCmd or hex strings, with env. SlabDesFireLayoutError is raised at
+        the first failed command.
+        """
+        sws, _ = env.sendMany(plan)
+        if len(sws) != len(plan) or sws[-1] != 0:
+            failed = plan[len(sws) - 1]
+            name = failed.name if hasattr(failed, 'name') else SlabDesFireEnv.encode(failed)[:2].decode('ascii')
+            raise SlabDesFireLayoutError(f"Layout command {len(sws) - 1} {name} failed, SW={sws[-1]:X}", sws[-1])
+        return len(sws)
+
+if __name__ == '__main__':
+    pass
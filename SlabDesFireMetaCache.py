@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import time
+from collections import OrderedDict
+
+from SlabDesFireEnv import SlabDesFireEnv, SlabDesFireEnvWrapper
+
+
+class SlabDesFireCardCache(SlabDesFireEnvWrapper):
+    """
+    Base of caches keyed by the card in the field. It follows the UID of the card, the selected
+    application and the authenticated key number from the commands sent through it, so answers
+    are only reused for the same card, application and authentication.
+
+    The UID is set by setUID() with the anticollision UID on each tap, or learned from the
+    response of GetCardUID or GetVersion (unless the card uses random ID). A learned UID is
+    forgotten when df_lib returns an error, and the UID is reset when the context of env is
+    recreated; only setUID() on each tap makes sure no answer of another card is used.
+    Authentication is dropped as on the card: by SelectApp, an error status, ChangeKey,
+    ChangeKeyEV2, ChangeKeySettings, RollKeySet and proximity check.
+    """
+    # status words keeping authentication: OK and NO_CHANGES
+    OK_SWS = (0x00, 0x0C)
+    AUTH_SUBCODES = frozenset((b'0A', b'1A', b'AA', b'71', b'77'))
+    # commands dropping authentication, and escape subcodes ChangeKey, ChangeKeyEV2 and
+    # vcProximityCheck
+    DEAUTH_CODES = frozenset((b'54', b'55', b'F0', b'F2', b'FD'))
+    DEAUTH_SUBCODES = frozenset((b'C4', b'C6', b'F0'))
+
+    def __init__(self, env):
+        SlabDesFireEnvWrapper.__init__(self, env)
+        self.uid = None
+        self.aid = None
+        self.authKeyNo = None
+        # True if uid is learned from a response instead of set by setUID
+        self._learned = False
+        self._createCount = self.createCount
+
+    def setUID(self, uid):
+        """
+        Set UID of the card in the field, e.g. from anticollision, or None if unknown.
+        Call it on each tap, the selected application and authentication are reset.
+        """
+        self.uid = None if uid is None else bytes(uid)
+        self.aid = None
+        self.authKeyNo = None
+        self._learned = False
+        return self
+
+    def _learn(self, uid):
+        # application and authentication stay with the card in the field when its UID is learned
+        if self.uid is not None and uid != self.uid:
+            self.aid = None
+            self.authKeyNo = None
+        self.uid = uid
+        self._learned = uid is not None
+
+    def _checkContext(self):
+        if self._createCount != self.createCount:
+            self._createCount = self.createCount
+            self.setUID(None)
+
+    def _track(self, code, cmdBytes, resp):
+        """
+        Follow the card state after cmdBytes is answered by resp.
+        """
+        sub = cmdBytes[2:4] if code == b'FF' else None
+        if code == b'5A':
+            self.aid = int.from_bytes(bytes.fromhex(cmdBytes[2:8].decode('ascii')), 'little') \
+                if resp.sw == 0 else None
+            self.authKeyNo = None
+        elif sub == b'A4':
+            # another virtual card is selected
+            self.setUID(None)
+        elif resp.sw < 0:
+            # the card may have left the field
+            if self._learned:
+                self.setUID(None)
+            self.authKeyNo = None
+        elif resp.sw not in SlabDesFireCardCache.OK_SWS:
+            self.authKeyNo = None
+        elif sub in SlabDesFireCardCache.AUTH_SUBCODES:
+            self.authKeyNo = int(cmdBytes[4:6], 16)
+        elif code in SlabDesFireCardCache.DEAUTH_CODES or sub in SlabDesFireCardCache.DEAUTH_SUBCODES:
+            self.authKeyNo = None
+        elif code == b'51':
+            self._learn(resp.data)
+        elif code == b'60' and (self.uid is None or self._learned):
+            uid = resp.data[14:21]
+            # a card with random ID returns zero UID
+            self._learn(uid if len(uid) == 7 and any(uid) else None)
+
+
+class SlabDesFireMetaCache(SlabDesFireCardCache):
+    """
+    Cache of card metadata answers in front of SlabDesFireEnv, keyed by card UID. Successful
+    responses of GetVersion, GetAppIDs, GetDFNames, FreeMem, GetFileIDs, GetISOFileIDs,
+    GetFileSettings, GetKeySettings and GetKeyVersion are kept per card and answered locally on
+    the next tap, see SlabDesFireCardCache for how the card is known.
+
+    An answer is kept per selected application where it depends on it, and per authenticated
+    key number except for GetVersion and FreeMem, so a cached answer is only given where the
+    card answered the same command before; the listing and access checks of the card are not
+    repeated for it. While the UID is unknown commands are passed to the card and nothing is
+    cached, and a mutating command drops the answers of all cards, as the card it changes is
+    not known. GetVersion is always sent to the card while the UID is learned, so the UID of a
+    new card replaces it.
+
+    Entries are invalidated when a mutating command is sent to the same card:
+    - CreateApp, CreateDelegatedApplication, DeleteApp: application list, DF names, free memory
+      and entries of the deleted application
+    - Create*File, DeleteFile: file lists, settings of the file and free memory
+    - ChangeFileSettings: settings of the file
+    - ChangeKeySettings, ChangeKey, ChangeKeyEV2 and key set commands: key settings and versions
+    - CommitTransaction: settings of value and record files, which hold the limited credit value
+      and current record count
+    - Format, SetConfiguration: all entries of the card
+    Note cached answers in MAC mode are not verified by df_lib again.
+    """
+    # answers cached per card, those not depending on the selected application, and those not
+    # depending on authentication
+    CACHED = frozenset((b'60', b'6A', b'6D', b'6E', b'6F', b'61', b'F5', b'45', b'64'))
+    GLOBAL = frozenset((b'60', b'6A', b'6D', b'6E'))
+    PUBLIC = frozenset((b'60', b'6E'))
+    APP_CODES = frozenset((b'CA', b'C9', b'DA'))
+    FILE_CODES = frozenset((b'CD', b'CB', b'CC', b'C1', b'C0', b'CE', b'DF'))
+    KEY_CODES = frozenset((b'54', b'55', b'56', b'57', b'FFC4', b'FFC6'))
+    MUTATING = APP_CODES | FILE_CODES | KEY_CODES | frozenset((b'5F', b'C7', b'FC', b'5C'))
+    # file types whose settings change with transactions: value, linear and cyclic record
+    VOLATILE_FILE_TYPES = (2, 3, 4)
+
+    def __init__(self, env, maxCards=1024, ttl=3600.0):
+        """
+        maxCards: cards kept, the least recently seen card is dropped first
+        ttl: seconds an answer is kept, None for no expiry
+        """
+        SlabDesFireCardCache.__init__(self, env)
+        self.maxCards = maxCards
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._cards = OrderedDict()
+
+    def invalidate(self, uid=None):
+        """
+        Forget answers of card uid, of all cards if uid is None.
+        """
+        if uid is None:
+            self._cards.clear()
+        else:
+            self._cards.pop(bytes(uid), None)
+        return self
+
+    def _entries(self, create=False):
+        entries = self._cards.get(self.uid)
+        if entries is None and create:
+            entries = self._cards[self.uid] = {}
+            while len(self._cards) > self.maxCards:
+                self._cards.popitem(last=False)
+        elif entries is not None:
+            self._cards.move_to_end(self.uid)
+        return entries
+
+    def _key(self, code, cmdBytes):
+        return None if code in SlabDesFireMetaCache.GLOBAL else self.aid, \
+            None if code in SlabDesFireMetaCache.PUBLIC else self.authKeyNo, cmdBytes
+
+    def _drop(self, entries, match):
+        for key in [k for k in entries if match(k[0], k[2][:2], k[2], entries[k][1])]:
+            del entries[key]
+
+    def _invalidate(self, code, cmdBytes):
+        entries = self._entries()
+        if not entries:
+            return
+        aid = self.aid
+        if code in (b'FC', b'5C'):
+            entries.clear()
+        elif code in SlabDesFireMetaCache.APP_CODES:
+            deleted = int.from_bytes(bytes.fromhex(cmdBytes[2:8].decode('ascii')), 'little') \
+                if code == b'DA' else None
+            self._drop(entries, lambda a, c, k, r: c in (b'6A', b'6D', b'6E') or (a is not None and a == deleted))
+        elif code in SlabDesFireMetaCache.FILE_CODES:
+            settings = b'F5' + cmdBytes[2:4]
+            self._drop(entries, lambda a, c, k, r: c == b'6E' or (a == aid and (c in (b'6F', b'61') or k == settings)))
+        elif code == b'5F':
+            settings = b'F5' + cmdBytes[2:4]
+            self._drop(entries, lambda a, c, k, r: a == aid and k == settings)
+        elif code in SlabDesFireMetaCache.KEY_CODES or cmdBytes[:4] in SlabDesFireMetaCache.KEY_CODES:
+            self._drop(entries, lambda a, c, k, r: a == aid and c in (b'45', b'64'))
+        elif code == b'C7':
+            self._drop(entries, lambda a, c, k, r: a == aid and c == b'F5'
+                       and r.data[:1] and r.data[0] in SlabDesFireMetaCache.VOLATILE_FILE_TYPES)
+
+    def _cacheable(self, code):
+        return self.uid is not None and code in SlabDesFireMetaCache.CACHED \
+            and (self.aid is not None or code in SlabDesFireMetaCache.GLOBAL)
+
+    def send(self, command):
+        """
+        Send command through env unless the answer is cached. Return SlabDesFireResp.
+        """
+        cmdBytes = SlabDesFireEnv.encode(command).upper()
+        code = cmdBytes[:2]
+        self._checkContext()
+        if self._cacheable(code) and not (self._learned and code == b'60'):
+            entries = self._entries()
+            entry = None if entries is None else entries.get(self._key(code, cmdBytes))
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        elif self.uid is not None:
+            self._invalidate(code, cmdBytes)
+        elif code in SlabDesFireMetaCache.MUTATING or cmdBytes[:4] in SlabDesFireMetaCache.MUTATING:
+            self.invalidate()
+        resp = self.env.send(cmdBytes)
+        self._track(code, cmdBytes, resp)
+        if resp.sw == 0 and self._cacheable(code):
+            self._entries(True)[self._key(code, cmdBytes)] = (time.monotonic(), resp)
+        return resp
+
+
+if __name__ == '__main__':
+    pass
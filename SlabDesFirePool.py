@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from SlabDesFireEnv import SlabDesFireEnv, SlabDesFireTransport
+
+
+class SlabDesFireEnvPool(object):
+    """
+    Pool of SlabDesFireEnv contexts sharing one transport.
+
+    The public df_lib supports 2 contexts and 60 commands per context. The pool counts commands
+    of each context and recycles it (free and create) before the quota is used up. Recycling
+    only happens at safe boundaries: when a context is checked out or checked in, or when the
+    holder calls ensure() between card operations. A recycled context loses the selected
+    application and authentication, so ensure() must not be called inside an authenticated
+    transaction.
+    Waiting callers are served in FIFO order. Only a checked out context can be checked in.
+    """
+    QUOTA = 60
+    SIZE = 2
+    # commands of a usual card operation: selection, authentication and a few file commands
+    RESERVE = 8
+
+    def __init__(self, size=SIZE, transport=None, quota=QUOTA, reserve=RESERVE, **kwargs):
+        """
+        size: number of contexts
+        transport: shared by all contexts, see SlabDesFireEnv
+        quota: maximal commands of one context, None for unlimited
+        reserve: minimal commands left in a context when checked out, unless more are needed
+        kwargs: other parameters of SlabDesFireEnv such as trace and stats
+        """
+        if size <= 0:
+            raise Exception("Pool size should be positive")
+        if quota is not None and reserve > quota:
+            raise Exception("Pool reserve should not exceed quota")
+        if transport is None or isinstance(transport, str):
+            transport = SlabDesFireTransport.open(transport)
+        self.transport = transport
+        self.quota = quota
+        self.reserve = reserve
+        self.recycleCount = 0
+        self._envs = [SlabDesFireEnv(transport, **kwargs).create() for _ in range(size)]
+        self._idle = deque(self._envs)
+        self._busy = set()
+        self._waiters = deque()
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def remaining(self, env):
+        """
+        Commands that can still be sent in the context of env.
+        """
+        return None if self.quota is None else self.quota - env.cmdCount
+
+    def _recycle(self, env, needed):
+        if env.inst is None or (self.quota is not None and self.quota - env.cmdCount < needed):
+            if self.quota is not None and needed > self.quota:
+                raise Exception(f"{needed} commands exceed quota {self.quota} of one context")
+            env.free().create()
+            with self._cond:
+                self.recycleCount += 1
+        return env
+
+    def checkout(self, timeout=None, needed=None):
+        """
+        Get an idle context, waiting in FIFO order if all contexts are in use.
+        needed: commands to be sent; the context is recycled if it has fewer left
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiters.append(ticket)
+            try:
+                while self._waiters[0] != ticket or not self._idle:
+                    if self._closed:
+                        raise Exception("Pool is closed")
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        raise TimeoutError("Checkout context timeout")
+                    self._cond.wait(wait)
+                if self._closed:
+                    raise Exception("Pool is closed")
+                env = self._idle.popleft()
+                self._busy.add(env)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+        try:
+            return self._recycle(env, max(needed or 0, self.reserve))
+        except Exception:
+            self.checkin(env, recycle=False)
+            raise
+
+    def checkin(self, env, recycle=True):
+        """
+        Return context to the pool. It is recycled if fewer than reserve commands are left.
+        """
+        with self._cond:
+            if env not in self._envs:
+                raise Exception("Context does not belong to the pool")
+            if env not in self._busy:
+                raise Exception("Context is not checked out")
+            self._busy.remove(env)
+        try:
+            if recycle and not self._closed:
+                self._recycle(env, max(self.reserve, 1))
+        finally:
+            with self._cond:
+                self._idle.append(env)
+                self._cond.notify_all()
+
+    def ensure(self, env, needed):
+        """
+        Make sure at least needed commands can be sent by env, recycling its context if not.
+        Call only at a safe boundary: no pending transaction, authentication can be redone.
+        Return True if the context was recycled.
+        """
+        count = env.createCount
+        self._recycle(env, needed)
+        return env.createCount != count
+
+    @contextmanager
+    def session(self, timeout=None, needed=None):
+        env = self.checkout(timeout, needed)
+        try:
+            yield env
+        finally:
+            self.checkin(env)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for env in self._envs:
+            env.free()
+
+
+if __name__ == '__main__':
+    pass
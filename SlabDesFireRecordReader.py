@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import hashlib
+
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireDecoders import SlabDesFireDecoders, SlabDesFireRecordFileSettings
+from SlabDesFireFileIO import SlabDesFireFileIOError
+
+
+class SlabDesFireRecordReader(object):
+    """
+    Incremental reader of record files, mostly cyclic record files used as logs. It keeps the
+    fingerprint of the latest record read for each (UID, AID, fileNo), and reads records from the
+    latest one with growing recCount until the known record is found, so only new records are
+    transferred. Records are assumed unique, e.g. by a transaction counter or time stamp in them.
+
+    The file settings are read on the first call for a key and after the context of env is
+    recreated; otherwise the record count is followed from the records read. They are read again
+    when ReadRecord answers BOUNDARY_ERROR, as the file may be cleared by ClearRecordFile, and
+    when the known record is not within the cached count of a file which is not full, as it has
+    more records now. The application must be selected and authenticated as the file requires.
+    """
+    SW_BOUNDARY_ERROR = 0xBE
+
+    def __init__(self, env, store=None, firstBatch=2):
+        """
+        store: dict-like object keeping state of each (UID, AID, fileNo), a new dict by default
+        firstBatch: records in the first ReadRecord, e.g. 2 when one new record is usual
+        """
+        self.env = env
+        self.store = {} if store is None else store
+        self.firstBatch = max(firstBatch, 1)
+        # keys whose settings are read in the current context of env
+        self._checked = set()
+        self._createCount = env.createCount
+
+    @staticmethod
+    def fingerprint(record):
+        return hashlib.sha256(record).digest()
+
+    @staticmethod
+    def key(uid, aid, fileNo):
+        return bytes(uid), aid, fileNo
+
+    def forget(self, uid, aid, fileNo):
+        key = SlabDesFireRecordReader.key(uid, aid, fileNo)
+        self.store.pop(key, None)
+        self._checked.discard(key)
+        return self
+
+    def _settings(self, fileNo):
+        command = SlabDesFireCmd.GetFileSettings(fileNo)
+        resp = self.env.send(command)
+        if resp.sw != 0:
+            raise SlabDesFireFileIOError(f"GetFileSettings failed, SW={resp.sw:X}", resp.sw)
+        settings = SlabDesFireDecoders.decode(command, resp)
+        if not isinstance(settings, SlabDesFireRecordFileSettings):
+            raise SlabDesFireFileIOError(f"File {fileNo} is not record file", 0)
+        maxCount = settings.maxRecords
+        # a cyclic file keeps one record less than its quantity
+        return settings.recordSize, settings.currentRecords, \
+            maxCount - 1 if settings.fileType == SlabDesFireRecordFileSettings.CYCLIC else maxCount
+
+    def read(self, uid, aid, fileNo, commMode='plain'):
+        """
+        Return records added since the last read of the same key, in chronological order.
+        All records are returned at the first read.
+        """
+        key = SlabDesFireRecordReader.key(uid, aid, fileNo)
+        if self._createCount != self.env.createCount:
+            self._createCount = self.env.createCount
+            self._checked.clear()
+        state = self.store.get(key)
+        checked = state is None or key not in self._checked
+        if checked:
+            recordSize, count, fullCount = self._settings(fileNo)
+            self._checked.add(key)
+        else:
+            _, recordSize, count, fullCount = state
+        known = None if state is None else state[0]
+        template = SlabDesFireCmd.prepare('ReadRecord', fileNo=fileNo, commMode=commMode)
+        records = []
+        found = False
+        recNo = 0
+        batch = self.firstBatch
+        while True:
+            if recNo >= count or found:
+                if found or checked or (known is not None and count >= fullCount):
+                    break
+                # the known record is beyond the cached count of a file not full
+                recordSize, count, fullCount = self._settings(fileNo)
+                checked = True
+                continue
+            n = min(batch, count - recNo)
+            resp = self.env.sendBytes(template.bind(recNo=recNo, recCount=n))
+            if resp.sw == SlabDesFireRecordReader.SW_BOUNDARY_ERROR and not checked:
+                # fewer records than the cached count, e.g. the file is cleared
+                recordSize, count, fullCount = self._settings(fileNo)
+                checked = True
+                records.clear()
+                recNo = 0
+                batch = self.firstBatch
+                continue
+            if resp.sw != 0:
+                raise SlabDesFireFileIOError(f"ReadRecord of record {recNo} failed, SW={resp.sw:X}", resp.sw)
+            data = resp.data
+            if len(data) != n * recordSize:
+                raise SlabDesFireFileIOError(f"ReadRecord of record {recNo} returns {len(data)} bytes "
+                                             f"instead of {n * recordSize}", 0)
+            # records of one response are in chronological order
+            for i in range(n - 1, -1, -1):
+                record = data[i * recordSize:(i + 1) * recordSize]
+                if known is not None and SlabDesFireRecordReader.fingerprint(record) == known:
+                    found = True
+                    break
+                records.append(record)
+            recNo += n
+            batch *= 2
+        if not checked:
+            # records read are new ones, pushing the oldest out of a full file
+            count = min(count + len(records), fullCount)
+        if records:
+            self.store[key] = (SlabDesFireRecordReader.fingerprint(records[0]), recordSize, count, fullCount)
+        elif state is None or state[2] != count:
+            self.store[key] = (known, recordSize, count, fullCount)
+        records.reverse()
+        return records
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+from binascii import unhexlify
+
+from jbytes import JBytesView
+
+
+class SlabDesFireResp(object):
+    """
+    Immutable result of one df_lib command. It keeps the raw "<sw>,<data>" bytes returned by
+    df_lib and parses status word and data only when they are accessed.
+    """
+    __slots__ = ('_raw', '_sep', '_sw', '_data')
+
+    def __init__(self, raw):
+        sep = raw.find(b',')
+        if sep < 0:
+            raise Exception("Command response error")
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_sep', sep)
+        object.__setattr__(self, '_sw', None)
+        object.__setattr__(self, '_data', None)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self._raw,)
+
+    def __str__(self):
+        return f'{self.__class__.__name__}(sw={self.sw}, resp="{self.hex}")'
+
+    def __repr__(self):
+        return self._raw.decode('utf-8', 'replace')
+
+    def __bytes__(self):
+        return self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __eq__(self, other):
+        if isinstance(other, SlabDesFireResp):
+            return self._raw == other._raw
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._raw)
+
+    @property
+    def raw(self):
+        """
+        Raw response bytes of df_lib.
+        """
+        return self._raw
+
+    @property
+    def sw(self):
+        """
+        Status word if not negative, otherwise df_lib error code.
+        """
+        sw = self._sw
+        if sw is None:
+            sw = int(self._raw[:self._sep])
+            object.__setattr__(self, '_sw', sw)
+        return sw
+
+    @property
+    def ok(self):
+        return self.sw == 0
+
+    @property
+    def isError(self):
+        """
+        True if df_lib returns an error code instead of card status.
+        """
+        return self.sw < 0
+
+    @property
+    def hex(self):
+        """
+        Response data in hex string, or error message if isError.
+        """
+        return self._raw[self._sep + 1:].decode('utf-8', 'replace')
+
+    @property
+    def message(self):
+        return self.hex if self.isError else ''
+
+    @property
+    def data(self):
+        """
+        Response data in bytes. Empty if isError.
+        """
+        data = self._data
+        if data is None:
+            data = b'' if self.isError else unhexlify(memoryview(self._raw)[self._sep + 1:])
+            object.__setattr__(self, '_data', data)
+        return data
+
+    def view(self, start=0, end=None):
+        """
+        Read-only memoryview of response data without copy.
+        """
+        return memoryview(self.data)[start:end]
+
+    def reader(self):
+        """
+        JBytesView to decode response data without copy.
+        """
+        return JBytesView(self.data)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import hashlib
+
+from SlabDesFireEnv import SlabDesFireEnv, SlabDesFireEnvWrapper
+from SlabDesFireResp import SlabDesFireResp
+
+
+class SlabDesFireSession(SlabDesFireEnvWrapper):
+    """
+    Session state tracker on top of SlabDesFireEnv. It keeps the selected application(s), the
+    authenticated key (number, method and hash of key parameters) and whether a transaction is
+    pending, and skips SelectApp and Authenticate commands which would not change the state of
+    the card. A skipped command returns a success response without data.
+
+    A real card drops authentication when the same application is selected again, and both
+    SelectApp and Authenticate abort a pending transaction, so:
+    - SelectApp of the selected application is skipped while not authenticated and no
+      transaction is pending
+    - Authenticate with the same key is skipped while no transaction is pending
+    - while authenticated, SelectApp of the selected application is held back: if the next
+      command is the same Authenticate both are skipped, otherwise SelectApp is sent before it.
+      A held SelectApp is answered by success; if the card rejects it later, the state is
+      invalidated and the next command is sent as usual. Call flush() to send it at once.
+
+    A transaction is pending after a successful write to a file or value (WriteData,
+    WriteRecord, UpdateRecord, Credit, LimitedCredit, Debit, ClearRecordFile) until
+    CommitTransaction, AbortTransaction, SelectApp, Authenticate or an error.
+
+    The state is invalidated when:
+    - a command returns an error status or df_lib error (authentication is lost)
+    - Format, DeleteApp or virtual card select is sent (all state)
+    - ChangeKey, ChangeKeyEV2, ChangeKeySettings or RollKeySet is sent (authentication)
+    - a proximity check command is sent (authentication)
+    - the context of env is recycled (all state)
+    """
+    # status words keeping the session: OK and NO_CHANGES
+    OK_SWS = (0x00, 0x0C)
+    AUTH_METHODS = {b'0A': 'D40', b'1A': 'ISO', b'AA': 'AES', b'71': 'EV2', b'77': 'EV2'}
+    # commands and escape subcodes dropping authentication: ChangeKeySettings, RollKeySet,
+    # proximity check; ChangeKey, ChangeKeyEV2 and vcProximityCheck
+    AUTH_CODES = frozenset((b'54', b'55', b'F0', b'F2', b'FD'))
+    AUTH_SUBCODES = frozenset((b'C4', b'C6', b'F0'))
+    # commands staging changes in a transaction, and commands ending it
+    TX_CODES = frozenset((b'3D', b'8D', b'3B', b'8B', b'DB', b'0C', b'1C', b'DC', b'EB'))
+    TX_END_CODES = frozenset((b'C7', b'A7'))
+    _SKIPPED = SlabDesFireResp(b'0,')
+
+    def __init__(self, env):
+        SlabDesFireEnvWrapper.__init__(self, env)
+        self.skipCount = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget all session state. A held SelectApp is dropped.
+        """
+        self.aids = None
+        self.invalidateAuth()
+        self.pending = False
+        self._held = None
+        self._createCount = self.env.createCount
+        return self
+
+    def invalidateAuth(self):
+        self.authKeyNo = None
+        self.authMethod = None
+        self._authHash = None
+        return self
+
+    @property
+    def isAuthenticated(self):
+        return self.authKeyNo is not None
+
+    def _isSameAuth(self, cmdBytes):
+        method = SlabDesFireSession.AUTH_METHODS.get(cmdBytes[2:4].upper())
+        return method is not None and method == self.authMethod and int(cmdBytes[4:6], 16) == self.authKeyNo \
+            and hashlib.sha256(cmdBytes[4:].upper()).digest() == self._authHash
+
+    def _skip(self, cmdBytes):
+        if self.pending or self.aids is None:
+            return False
+        code = cmdBytes[:2].upper()
+        if code == b'5A':
+            return not self.isAuthenticated and cmdBytes[2:].upper() == self.aids
+        if code == b'FF':
+            return self.isAuthenticated and self._isSameAuth(cmdBytes)
+        return False
+
+    def _update(self, cmdBytes, sw):
+        code = cmdBytes[:2].upper()
+        sub = cmdBytes[2:4].upper()
+        if sw not in SlabDesFireSession.OK_SWS:
+            if sw < 0 or code == b'5A':
+                self.invalidate()
+            else:
+                self.invalidateAuth()
+                self.pending = False
+        elif code == b'5A':
+            self.invalidate()
+            self.aids = cmdBytes[2:].upper()
+        elif code == b'FF' and sub in SlabDesFireSession.AUTH_METHODS:
+            self.authKeyNo = int(cmdBytes[4:6], 16)
+            self.authMethod = SlabDesFireSession.AUTH_METHODS[sub]
+            self._authHash = hashlib.sha256(cmdBytes[4:].upper()).digest()
+            self.pending = False
+        elif code in (b'FC', b'DA') or (code == b'FF' and sub == b'A4'):
+            self.invalidate()
+        elif code in SlabDesFireSession.AUTH_CODES or (code == b'FF' and sub in SlabDesFireSession.AUTH_SUBCODES):
+            self.invalidateAuth()
+        elif code in SlabDesFireSession.TX_CODES:
+            self.pending = True
+        elif code in SlabDesFireSession.TX_END_CODES:
+            self.pending = False
+
+    def flush(self):
+        """
+        Send the held SelectApp, if any. Return its SlabDesFireResp, or None.
+        """
+        cmdBytes, self._held = self._held, None
+        if cmdBytes is None:
+            return None
+        resp = self.env.send(cmdBytes)
+        self._update(cmdBytes, resp.sw)
+        return resp
+
+    def send(self, command):
+        """
+        Send command through env unless it is redundant. Return SlabDesFireResp.
+        """
+        cmdBytes = SlabDesFireEnv.encode(command)
+        if self._createCount != self.env.createCount:
+            self.invalidate()
+        if self._held is not None:
+            if cmdBytes[:2].upper() == b'FF' and self._isSameAuth(cmdBytes):
+                # SelectApp and Authenticate together leave the card as it is
+                self._held = None
+                self.skipCount += 2
+                return SlabDesFireSession._SKIPPED
+            self.flush()
+        if self._skip(cmdBytes):
+            self.skipCount += 1
+            return SlabDesFireSession._SKIPPED
+        if not self.pending and self.isAuthenticated and cmdBytes[:2].upper() == b'5A' \
+                and cmdBytes[2:].upper() == self.aids:
+            self._held = cmdBytes
+            return SlabDesFireSession._SKIPPED
+        resp = self.env.send(cmdBytes)
+        self._update(cmdBytes, resp.sw)
+        return resp
+
+
+if __name__ == '__main__':
+    pass
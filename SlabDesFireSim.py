@@ -0,0 +1,972 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import hashlib
+import struct
+import threading
+
+
+class SlabDesFireSimStatus(Exception):
+    """
+    Raised inside the simulated card to return a DesFire status word.
+    """
+
+    def __init__(self, sw):
+        super().__init__(sw)
+        self.sw = sw
+
+
+class _SimFile(object):
+    __slots__ = ('fileNo', 'fileType', 'isoFid', 'option', 'ar', 'size', 'data',
+                 'lowLimit', 'upperLimit', 'value', 'limitedCreditEnable', 'limitedCreditValue',
+                 'recordSize', 'recordQty', 'records', 'tmacOption', 'tmc', 'tmv', 'alloc')
+
+    def __init__(self, fileNo, fileType, isoFid, option, ar):
+        self.fileNo = fileNo
+        self.fileType = fileType
+        self.isoFid = isoFid
+        self.option = option
+        self.ar = ar
+        self.size = 0
+        self.data = None
+        self.lowLimit = 0
+        self.upperLimit = 0
+        self.value = 0
+        self.limitedCreditEnable = 0
+        self.limitedCreditValue = 0
+        self.recordSize = 0
+        self.recordQty = 0
+        self.records = None
+        self.tmacOption = 0
+        self.tmc = 0
+        self.tmv = bytes(8)
+        self.alloc = 32
+
+    def rights(self):
+        return (self.ar >> 12) & 0x0F, (self.ar >> 8) & 0x0F, (self.ar >> 4) & 0x0F, self.ar & 0x0F
+
+
+class _SimApp(object):
+    __slots__ = ('aid', 'keySettings', 'keyConf2', 'keyConf3', 'crypto', 'numKeys', 'keySets', 'keyVersions',
+                 'keySetVersions', 'activeKeySet', 'isoFid', 'dfName', 'files', 'alloc')
+
+    def __init__(self, aid, keySettings, keyConf2, crypto, numKeys):
+        self.aid = aid
+        self.keySettings = keySettings
+        self.keyConf2 = keyConf2
+        self.keyConf3 = 0
+        self.crypto = crypto
+        self.numKeys = numKeys
+        self.keySets = [[SlabDesFireSimCard.defaultKey(crypto)] * numKeys]
+        self.keyVersions = [[0] * numKeys]
+        self.keySetVersions = [0]
+        self.activeKeySet = 0
+        self.isoFid = None
+        self.dfName = None
+        self.files = {}
+        self.alloc = 64 + numKeys * 32
+
+
+class SlabDesFireSimCard(object):
+    """
+    In-memory model of one DesFire card as seen through df_lib.
+
+    The card takes the binary form of a df_lib command (command code and data, escape
+    commands included) and returns the status word and response data. Security processing
+    is not simulated: keys are compared directly and comm modes are accepted as given.
+    """
+    GENERATIONS = ('D40', 'EV1', 'EV2')
+
+    CRYPTO_DES = 0
+    CRYPTO_3K3DES = 1
+    CRYPTO_AES = 2
+
+    FILE_STD = 0
+    FILE_BACKUP = 1
+    FILE_VALUE = 2
+    FILE_LINEAR = 3
+    FILE_CYCLIC = 4
+    FILE_TMAC = 5
+
+    SW_OK = 0x00
+    SW_NO_CHANGES = 0x0C
+    SW_OUT_OF_EEPROM = 0x0E
+    SW_ILLEGAL_COMMAND = 0x1C
+    SW_INTEGRITY_ERROR = 0x1E
+    SW_NO_SUCH_KEY = 0x40
+    SW_LENGTH_ERROR = 0x7E
+    SW_PERMISSION_DENIED = 0x9D
+    SW_PARAMETER_ERROR = 0x9E
+    SW_APPLICATION_NOT_FOUND = 0xA0
+    SW_AUTHENTICATION_ERROR = 0xAE
+    SW_BOUNDARY_ERROR = 0xBE
+    SW_COMMAND_ABORTED = 0xCA
+    SW_COUNT_ERROR = 0xCE
+    SW_DUPLICATE_ERROR = 0xDE
+    SW_FILE_NOT_FOUND = 0xF0
+    SW_ISO_INS_NOT_SUPPORTED = 0x6D00
+
+    MAX_APPS = 28
+    MAX_FILES = 32
+
+    _VERSION_CODES = {'D40': (0x00, 0x00), 'EV1': (0x01, 0x01), 'EV2': (0x12, 0x02)}
+    # GetVersion: hardware and software info (vendor, type, subtype, major, minor, storage,
+    # protocol), 7-byte UID, batch number, week and year of production
+    _VERSION = struct.Struct('<7B7B7s5sBB')
+    _BATCH = bytes.fromhex('BA54000000')
+    _EV2_ONLY = frozenset((0x55, 0x56, 0x57, 0xC8, 0xCE, 0xDB, 0xBA, 0xF0, 0xF2, 0xFD))
+
+    @staticmethod
+    def defaultKey(crypto):
+        return bytes(24) if crypto == SlabDesFireSimCard.CRYPTO_3K3DES else bytes(16)
+
+    @staticmethod
+    def normalizeKey(key):
+        # single DES key K is the same as 2K3DES key K|K
+        key = bytes(key)
+        return key + key if len(key) == 8 else key
+
+    @staticmethod
+    def desKeyVersion(key):
+        ver = 0
+        for x in key[:8]:
+            ver = (ver << 1) | (x & 0x01)
+        return ver
+
+    def __init__(self, generation='EV2', uid=None, memorySize=7936):
+        if generation not in SlabDesFireSimCard.GENERATIONS:
+            raise Exception(f"Unknown DesFire generation {generation}")
+        self.generation = generation
+        self.uid = bytes.fromhex(uid) if isinstance(uid, str) else bytes(uid or bytes.fromhex('04112233445566'))
+        if len(self.uid) != 7:
+            raise Exception("Card UID should be 7 bytes")
+        self.memorySize = memorySize
+        self._handlers = {
+            0x60: self._getVersion, 0x51: self._getCardUID, 0x6E: self._freeMem, 0xFC: self._format,
+            0x5C: self._setConfiguration, 0x45: self._getKeySettings, 0x54: self._changeKeySettings,
+            0x64: self._getKeyVersion, 0x56: self._initializeKeySet, 0x57: self._finalizeKeySet,
+            0x55: self._rollKeySet, 0xCA: self._createApp, 0xC9: self._createDelegatedApp,
+            0xDA: self._deleteApp, 0x5A: self._selectApp, 0x6A: self._getAppIDs, 0x6D: self._getDFNames,
+            0x69: self._getDelegatedInfo, 0xCD: self._createDataFile, 0xCB: self._createDataFile,
+            0xCC: self._createValueFile, 0xC1: self._createRecordFile, 0xC0: self._createRecordFile,
+            0xCE: self._createTransactionMacFile, 0xDF: self._deleteFile, 0x6F: self._getFileIDs,
+            0x61: self._getISOFileIDs, 0xF5: self._getFileSettings, 0x5F: self._changeFileSettings,
+            0xBD: self._readData, 0xAD: self._readData, 0x3D: self._writeData, 0x8D: self._writeData,
+            0x6C: self._getValue, 0x0C: self._credit, 0x1C: self._limitedCredit, 0xDC: self._debit,
+            0xBB: self._readRecord, 0xAB: self._readRecord, 0x3B: self._writeRecord, 0x8B: self._writeRecord,
+            0xDB: self._updateRecord, 0xBA: self._updateRecord, 0xEB: self._clearRecordFile,
+            0xC7: self._commitTransaction, 0xA7: self._abortTransaction, 0xC8: self._commitReaderID,
+            0xF0: self._proximity, 0xF2: self._proximity, 0xFD: self._proximity, 0x3C: self._readSig,
+            0xFF: self._escape,
+        }
+        self._escapes = {
+            0x0A: self._authenticate, 0x1A: self._authenticate, 0xAA: self._authenticate,
+            0x71: self._authenticate, 0x77: self._authenticate, 0xC4: self._changeKey, 0xC6: self._changeKeyEV2,
+            0xA4: self._vcSelect, 0xF0: self._vcSelect,
+        }
+        self.picc = _SimApp(0, 0x0F, 0x01, SlabDesFireSimCard.CRYPTO_DES, 1)
+        self.piccKeys = {}
+        self.format()
+
+    def format(self):
+        """
+        Delete all applications. PICC level keys and settings are kept.
+        """
+        self.apps = {}
+        self.readerID = bytes(16)
+        self.reset()
+        return self
+
+    def reset(self):
+        """
+        Field reset: deselect application, drop authentication and pending transaction.
+        """
+        self.app = self.picc
+        self.authKey = None
+        self.authMethod = None
+        self.tx = {}
+        return self
+
+    def freeMemory(self):
+        return self.memorySize - sum(app.alloc + sum(f.alloc for f in app.files.values())
+                                     for app in self.apps.values())
+
+    def process(self, command):
+        """
+        Process one command in binary format. Return tuple of (status word, response data).
+        """
+        if len(command) == 0:
+            return SlabDesFireSimCard.SW_LENGTH_ERROR, b''
+        code = command[0]
+        if code == 0x00:
+            return SlabDesFireSimCard.SW_ISO_INS_NOT_SUPPORTED, b''
+        handler = self._handlers.get(code)
+        try:
+            if handler is None or (code in SlabDesFireSimCard._EV2_ONLY and self.generation != 'EV2'):
+                raise SlabDesFireSimStatus(SlabDesFireSimCard.SW_ILLEGAL_COMMAND)
+            ret = handler(command)
+        except SlabDesFireSimStatus as e:
+            # errors drop authentication and pending transaction as the card does
+            self.authKey = None
+            self.authMethod = None
+            self.tx = {}
+            return e.sw, b''
+        except IndexError:
+            self.authKey = None
+            self.authMethod = None
+            self.tx = {}
+            return SlabDesFireSimCard.SW_LENGTH_ERROR, b''
+        return SlabDesFireSimCard.SW_OK, ret or b''
+
+    # ------------------------------------------------------------------------------------------
+    # helpers
+    @staticmethod
+    def _fail(sw):
+        raise SlabDesFireSimStatus(sw)
+
+    @staticmethod
+    def _u16(data, pos):
+        return data[pos] | (data[pos + 1] << 8)
+
+    @staticmethod
+    def _u24(data, pos):
+        return data[pos] | (data[pos + 1] << 8) | (data[pos + 2] << 16)
+
+    @staticmethod
+    def _s32(data, pos):
+        return int.from_bytes(data[pos:pos + 4], 'little', signed=True)
+
+    def _checkLength(self, command, length, exact=True):
+        if (len(command) != length) if exact else (len(command) < length):
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+
+    def _requireAuth(self, keyNo=None):
+        if self.authKey is None:
+            self._fail(SlabDesFireSimCard.SW_AUTHENTICATION_ERROR)
+        if keyNo is not None and self.authKey != keyNo:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+
+    def _requirePicc(self):
+        if self.app is not self.picc:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+
+    def _requireApp(self):
+        if self.app is self.picc:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+
+    def _requireListing(self):
+        if not self.app.keySettings & 0x02:
+            self._requireAuth(0)
+
+    def _requireCreateDelete(self):
+        if not self.app.keySettings & 0x04:
+            self._requireAuth(0)
+
+    def _checkAccess(self, f, *rights):
+        allowed = f.rights()
+        keys = [allowed[x] for x in rights]
+        if 0x0E in keys:
+            return
+        if self.authKey is None:
+            self._fail(SlabDesFireSimCard.SW_AUTHENTICATION_ERROR)
+        if self.authKey not in keys:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+
+    def _getFile(self, fileNo, *fileTypes):
+        self._requireApp()
+        f = self.app.files.get(fileNo)
+        if f is None:
+            self._fail(SlabDesFireSimCard.SW_FILE_NOT_FOUND)
+        if fileTypes and f.fileType not in fileTypes:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        return f
+
+    def _allocate(self, size):
+        if size > self.freeMemory():
+            self._fail(SlabDesFireSimCard.SW_OUT_OF_EEPROM)
+
+    def _addFile(self, f, alloc):
+        self._requireApp()
+        self._requireCreateDelete()
+        if f.fileNo in self.app.files:
+            self._fail(SlabDesFireSimCard.SW_DUPLICATE_ERROR)
+        if f.fileNo >= SlabDesFireSimCard.MAX_FILES:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        if f.isoFid is not None:
+            if self.app.isoFid is None:
+                self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+            if any(x.isoFid == f.isoFid for x in self.app.files.values()):
+                self._fail(SlabDesFireSimCard.SW_DUPLICATE_ERROR)
+        f.alloc = (alloc + 31) // 32 * 32
+        self._allocate(f.alloc)
+        self.app.files[f.fileNo] = f
+
+    def _staged(self, f):
+        """
+        Return staged state of a backup/value/record file in current transaction.
+        """
+        st = self.tx.get(f)
+        if st is None:
+            if f.fileType == SlabDesFireSimCard.FILE_BACKUP:
+                st = bytearray(f.data)
+            elif f.fileType == SlabDesFireSimCard.FILE_VALUE:
+                st = [f.value, f.limitedCreditValue, 0, False]
+            else:
+                st = [list(f.records), None]
+            self.tx[f] = st
+        return st
+
+    def _key(self, keyNo):
+        if self.app is self.picc and keyNo != 0:
+            key = self.piccKeys.get(keyNo)
+            if key is None:
+                self._fail(SlabDesFireSimCard.SW_NO_SUCH_KEY)
+            return key[0]
+        if keyNo >= self.app.numKeys:
+            self._fail(SlabDesFireSimCard.SW_NO_SUCH_KEY)
+        return self.app.keySets[self.app.activeKeySet][keyNo]
+
+    def _setKey(self, keySetNo, keyNo, key, version):
+        if self.app is self.picc and keyNo != 0:
+            self.piccKeys[keyNo] = (key, version)
+            return
+        self.app.keySets[keySetNo][keyNo] = key
+        self.app.keyVersions[keySetNo][keyNo] = version
+
+    # ------------------------------------------------------------------------------------------
+    # PICC level commands
+    def _getVersion(self, command):
+        hw, sw = SlabDesFireSimCard._VERSION_CODES[self.generation]
+        storage = (max(self.memorySize, 2) - 1).bit_length() * 2
+        return SlabDesFireSimCard._VERSION.pack(0x04, 0x01, 0x01, hw, 0x00, storage, 0x05,
+                                                0x04, 0x01, 0x01, sw, 0x00, storage, 0x05,
+                                                self.uid, SlabDesFireSimCard._BATCH, 0x32, 0x21)
+
+    def _getCardUID(self, command):
+        self._requireAuth()
+        return self.uid
+
+    def _freeMem(self, command):
+        return self.freeMemory().to_bytes(3, 'little')
+
+    def _format(self, command):
+        self._requirePicc()
+        self._requireAuth(0)
+        self.format()
+
+    def _setConfiguration(self, command):
+        self._checkLength(command, 2, False)
+        self._requirePicc()
+        self._requireAuth(0)
+
+    def _getKeySettings(self, command):
+        self._requireListing()
+        return bytes((self.app.keySettings, self.app.numKeys | (self.app.crypto << 6)))
+
+    def _changeKeySettings(self, command):
+        self._checkLength(command, 2)
+        self._requireAuth(0)
+        if not self.app.keySettings & 0x08:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+        self.app.keySettings = command[1]
+
+    def _getKeyVersion(self, command):
+        self._checkLength(command, 2, False)
+        keyNo = command[1]
+        keySetNo = command[2] if len(command) > 2 else self.app.activeKeySet
+        if self.app is self.picc and keyNo != 0:
+            key = self.piccKeys.get(keyNo)
+            if key is None:
+                self._fail(SlabDesFireSimCard.SW_NO_SUCH_KEY)
+            return bytes((key[1],))
+        if keyNo >= self.app.numKeys or keySetNo >= len(self.app.keySets):
+            self._fail(SlabDesFireSimCard.SW_NO_SUCH_KEY)
+        return bytes((self.app.keyVersions[keySetNo][keyNo],))
+
+    def _initializeKeySet(self, command):
+        self._checkLength(command, 3)
+        self._requireApp()
+        self._requireAuth(0)
+        keySetNo, keySetType = command[1], command[2]
+        if keySetNo == 0 or keySetNo >= len(self.app.keySets) or keySetNo == self.app.activeKeySet:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        self.app.keySets[keySetNo] = [SlabDesFireSimCard.defaultKey(keySetType)] * self.app.numKeys
+        self.app.keyVersions[keySetNo] = [0] * self.app.numKeys
+
+    def _finalizeKeySet(self, command):
+        self._checkLength(command, 3)
+        self._requireApp()
+        self._requireAuth(0)
+        keySetNo = command[1]
+        if keySetNo == 0 or keySetNo >= len(self.app.keySets):
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        self.app.keySetVersions[keySetNo] = command[2]
+
+    def _rollKeySet(self, command):
+        self._checkLength(command, 2)
+        self._requireApp()
+        self._requireAuth()
+        keySetNo = command[1]
+        if keySetNo >= len(self.app.keySets) or self.app.keySets[keySetNo] is None:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        self.app.activeKeySet = keySetNo
+        self.authKey = None
+        self.authMethod = None
+
+    def _parseApp(self, command, pos):
+        aid = SlabDesFireSimCard._u24(command, 1)
+        keySettings, keyConf2 = command[pos], command[pos + 1]
+        pos += 2
+        crypto = keyConf2 >> 6
+        numKeys = keyConf2 & 0x0F
+        if aid == 0 or numKeys == 0 or numKeys > 14 or crypto > SlabDesFireSimCard.CRYPTO_AES:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        app = _SimApp(aid, keySettings, keyConf2, crypto, numKeys)
+        if keyConf2 & 0x10:
+            app.keyConf3 = command[pos]
+            pos += 1
+            if app.keyConf3 & 0x01:
+                qtyKeySets = command[pos + 1]
+                pos += 4
+                if qtyKeySets < 2 or qtyKeySets > 16:
+                    self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+                app.keySets.extend([None] * (qtyKeySets - 1))
+                app.keyVersions.extend([None] * (qtyKeySets - 1))
+                app.keySetVersions.extend([0] * (qtyKeySets - 1))
+                app.alloc += (qtyKeySets - 1) * numKeys * 32
+        if keyConf2 & 0x20:
+            app.isoFid = (command[pos] << 8) | command[pos + 1]
+            app.dfName = bytes(command[pos + 2:])
+            if len(app.dfName) > 16:
+                self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        return app
+
+    def _addApp(self, app):
+        if app.aid in self.apps:
+            self._fail(SlabDesFireSimCard.SW_DUPLICATE_ERROR)
+        if len(self.apps) >= SlabDesFireSimCard.MAX_APPS:
+            self._fail(SlabDesFireSimCard.SW_COUNT_ERROR)
+        if app.isoFid is not None and any(x.isoFid == app.isoFid for x in self.apps.values()):
+            self._fail(SlabDesFireSimCard.SW_DUPLICATE_ERROR)
+        self._allocate(app.alloc)
+        self.apps[app.aid] = app
+
+    def _createApp(self, command):
+        self._checkLength(command, 6, False)
+        self._requirePicc()
+        self._requireCreateDelete()
+        self._addApp(self._parseApp(command, 4))
+
+    def _createDelegatedApp(self, command):
+        # AID(3) DAMSlotNo(2) DAMSlotVersion(1) QuotaLimit(2) KeySett1 KeySett2 ... EncK(32) DAMMAC(8)
+        self._checkLength(command, 11 + 40, False)
+        self._requirePicc()
+        self._requireAuth()
+        self._addApp(self._parseApp(command[:-40], 9))
+
+    def _deleteApp(self, command):
+        self._checkLength(command, 4)
+        aid = SlabDesFireSimCard._u24(command, 1)
+        if aid not in self.apps:
+            self._fail(SlabDesFireSimCard.SW_APPLICATION_NOT_FOUND)
+        # the PICC master key or the master key of the application itself, also with free
+        # create/delete of the PICC
+        self._requireAuth(0)
+        if self.app is not self.picc and self.app.aid != aid:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+        deleted = self.apps.pop(aid)
+        if self.app is deleted:
+            self.reset()
+
+    def _selectApp(self, command):
+        if len(command) not in (4, 7):
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        aid = SlabDesFireSimCard._u24(command, 1)
+        if aid == 0:
+            app = self.picc
+        else:
+            app = self.apps.get(aid)
+            if app is None:
+                self._fail(SlabDesFireSimCard.SW_APPLICATION_NOT_FOUND)
+        self.reset()
+        self.app = app
+
+    def _getAppIDs(self, command):
+        self._requirePicc()
+        self._requireListing()
+        return b''.join(aid.to_bytes(3, 'little') for aid in self.apps)
+
+    def _getDFNames(self, command):
+        self._requirePicc()
+        self._requireListing()
+        return b''.join(app.aid.to_bytes(3, 'little') + app.isoFid.to_bytes(2, 'little') + app.dfName
+                        for app in self.apps.values() if app.isoFid is not None)
+
+    def _getDelegatedInfo(self, command):
+        self._checkLength(command, 3)
+        self._fail(SlabDesFireSimCard.SW_APPLICATION_NOT_FOUND)
+
+    # ------------------------------------------------------------------------------------------
+    # File management
+    def _createDataFile(self, command):
+        if len(command) not in (8, 10):
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        pos = 2
+        isoFid = None
+        if len(command) == 10:
+            isoFid = SlabDesFireSimCard._u16(command, 2)
+            pos = 4
+        fileType = SlabDesFireSimCard.FILE_STD if command[0] == 0xCD else SlabDesFireSimCard.FILE_BACKUP
+        f = _SimFile(command[1], fileType, isoFid, command[pos], SlabDesFireSimCard._u16(command, pos + 1))
+        f.size = SlabDesFireSimCard._u24(command, pos + 3)
+        if f.size == 0:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        f.data = bytearray(f.size)
+        self._addFile(f, f.size * (2 if fileType == SlabDesFireSimCard.FILE_BACKUP else 1))
+
+    def _createValueFile(self, command):
+        self._checkLength(command, 18)
+        f = _SimFile(command[1], SlabDesFireSimCard.FILE_VALUE, None, command[2],
+                     SlabDesFireSimCard._u16(command, 3))
+        f.lowLimit = SlabDesFireSimCard._s32(command, 5)
+        f.upperLimit = SlabDesFireSimCard._s32(command, 9)
+        f.value = SlabDesFireSimCard._s32(command, 13)
+        f.limitedCreditEnable = command[17]
+        if not f.lowLimit <= f.value <= f.upperLimit:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        self._addFile(f, 32)
+
+    def _createRecordFile(self, command):
+        if len(command) not in (11, 13):
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        pos = 2
+        isoFid = None
+        if len(command) == 13:
+            isoFid = SlabDesFireSimCard._u16(command, 2)
+            pos = 4
+        fileType = SlabDesFireSimCard.FILE_LINEAR if command[0] == 0xC1 else SlabDesFireSimCard.FILE_CYCLIC
+        f = _SimFile(command[1], fileType, isoFid, command[pos], SlabDesFireSimCard._u16(command, pos + 1))
+        f.recordSize = SlabDesFireSimCard._u24(command, pos + 3)
+        f.recordQty = SlabDesFireSimCard._u24(command, pos + 6)
+        if f.recordSize == 0 or f.recordQty < (2 if fileType == SlabDesFireSimCard.FILE_CYCLIC else 1):
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        f.records = []
+        self._addFile(f, f.recordSize * f.recordQty)
+
+    def _createTransactionMacFile(self, command):
+        self._checkLength(command, 23)
+        self._requireAuth(0)
+        if any(x.fileType == SlabDesFireSimCard.FILE_TMAC for x in self.app.files.values()):
+            self._fail(SlabDesFireSimCard.SW_DUPLICATE_ERROR)
+        f = _SimFile(command[1], SlabDesFireSimCard.FILE_TMAC, None, command[2],
+                     SlabDesFireSimCard._u16(command, 3))
+        f.tmacOption = command[5]
+        self._addFile(f, 32)
+
+    def _deleteFile(self, command):
+        self._checkLength(command, 2)
+        self._requireApp()
+        self._requireCreateDelete()
+        f = self._getFile(command[1])
+        self.tx.pop(f, None)
+        del self.app.files[f.fileNo]
+
+    def _getFileIDs(self, command):
+        self._requireApp()
+        self._requireListing()
+        return bytes(self.app.files)
+
+    def _getISOFileIDs(self, command):
+        self._requireApp()
+        self._requireListing()
+        return b''.join(f.isoFid.to_bytes(2, 'little') for f in self.app.files.values() if f.isoFid is not None)
+
+    def _getFileSettings(self, command):
+        self._checkLength(command, 2)
+        self._requireListing()
+        f = self._getFile(command[1])
+        ret = bytes((f.fileType, f.option)) + f.ar.to_bytes(2, 'little')
+        if f.fileType in (SlabDesFireSimCard.FILE_STD, SlabDesFireSimCard.FILE_BACKUP):
+            return ret + f.size.to_bytes(3, 'little')
+        if f.fileType == SlabDesFireSimCard.FILE_VALUE:
+            return (ret + f.lowLimit.to_bytes(4, 'little', signed=True) +
+                    f.upperLimit.to_bytes(4, 'little', signed=True) +
+                    f.limitedCreditValue.to_bytes(4, 'little', signed=True) + bytes((f.limitedCreditEnable,)))
+        if f.fileType == SlabDesFireSimCard.FILE_TMAC:
+            return ret + bytes((f.tmacOption,))
+        return (ret + f.recordSize.to_bytes(3, 'little') + f.recordQty.to_bytes(3, 'little') +
+                len(f.records).to_bytes(3, 'little'))
+
+    def _changeFileSettings(self, command):
+        self._checkLength(command, 5, False)
+        f = self._getFile(command[1])
+        change = f.ar & 0x0F
+        if change == 0x0F:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+        if change != 0x0E:
+            self._requireAuth(change)
+        f.option = command[2]
+        f.ar = SlabDesFireSimCard._u16(command, 3)
+
+    # ------------------------------------------------------------------------------------------
+    # Data files
+    def _readData(self, command):
+        self._checkLength(command, 9)
+        f = self._getFile(command[1], SlabDesFireSimCard.FILE_STD, SlabDesFireSimCard.FILE_BACKUP,
+                          SlabDesFireSimCard.FILE_TMAC)
+        self._checkAccess(f, 0, 2)
+        if f.fileType == SlabDesFireSimCard.FILE_TMAC:
+            data = f.tmc.to_bytes(4, 'little') + f.tmv
+        else:
+            data = f.data
+        offset = SlabDesFireSimCard._u24(command, 2)
+        length = SlabDesFireSimCard._u24(command, 5)
+        if length == 0:
+            length = len(data) - offset
+        if offset >= len(data) or offset + length > len(data):
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        return bytes(data[offset:offset + length])
+
+    def _writeData(self, command):
+        self._checkLength(command, 9, False)
+        f = self._getFile(command[1], SlabDesFireSimCard.FILE_STD, SlabDesFireSimCard.FILE_BACKUP)
+        self._checkAccess(f, 1, 2)
+        offset = SlabDesFireSimCard._u24(command, 2)
+        length = SlabDesFireSimCard._u24(command, 5)
+        if length == 0 or len(command) - 9 != length:
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        if offset + length > f.size:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        target = f.data if f.fileType == SlabDesFireSimCard.FILE_STD else self._staged(f)
+        target[offset:offset + length] = command[9:]
+
+    # ------------------------------------------------------------------------------------------
+    # Value files
+    def _getValue(self, command):
+        self._checkLength(command, 2, False)
+        f = self._getFile(command[1], SlabDesFireSimCard.FILE_VALUE)
+        self._checkAccess(f, 0, 1, 2)
+        return f.value.to_bytes(4, 'little', signed=True)
+
+    def _valueOp(self, command, *rights):
+        self._checkLength(command, 7)
+        f = self._getFile(command[1], SlabDesFireSimCard.FILE_VALUE)
+        self._checkAccess(f, *rights)
+        value = SlabDesFireSimCard._s32(command, 3)
+        if value < 0:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        return f, self._staged(f), value
+
+    def _credit(self, command):
+        f, st, value = self._valueOp(command, 2)
+        if st[0] + value > f.upperLimit:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        st[0] += value
+
+    def _limitedCredit(self, command):
+        f, st, value = self._valueOp(command, 1, 2)
+        if not f.limitedCreditEnable & 0x01 or value > st[1] or st[0] + value > f.upperLimit:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        st[0] += value
+        st[1] = 0
+        st[3] = True
+
+    def _debit(self, command):
+        f, st, value = self._valueOp(command, 0, 1, 2)
+        if st[0] - value < f.lowLimit:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        st[0] -= value
+        st[2] += value
+
+    # ------------------------------------------------------------------------------------------
+    # Record files
+    def _recordFile(self, fileNo):
+        return self._getFile(fileNo, SlabDesFireSimCard.FILE_LINEAR, SlabDesFireSimCard.FILE_CYCLIC)
+
+    @staticmethod
+    def _capacity(f):
+        # cyclic file keeps one record as reserve for the next transaction
+        return f.recordQty - 1 if f.fileType == SlabDesFireSimCard.FILE_CYCLIC else f.recordQty
+
+    def _readRecord(self, command):
+        self._checkLength(command, 9)
+        f = self._recordFile(command[1])
+        self._checkAccess(f, 0, 2)
+        recNo = SlabDesFireSimCard._u24(command, 2)
+        recCount = SlabDesFireSimCard._u24(command, 5)
+        available = len(f.records)
+        if recNo >= available:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        if recCount == 0:
+            recCount = available - recNo
+        if recNo + recCount > available:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        # record 0 is the latest one; records are returned in chronological order
+        return b''.join(f.records[available - recNo - recCount:available - recNo])
+
+    def _writeRecord(self, command):
+        self._checkLength(command, 9, False)
+        f = self._recordFile(command[1])
+        self._checkAccess(f, 1, 2)
+        offset = SlabDesFireSimCard._u24(command, 2)
+        length = SlabDesFireSimCard._u24(command, 5)
+        if length == 0 or len(command) - 9 != length:
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        if offset + length > f.recordSize:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        st = self._staged(f)
+        if st[1] is None:
+            if len(st[0]) >= SlabDesFireSimCard._capacity(f):
+                if f.fileType == SlabDesFireSimCard.FILE_LINEAR:
+                    self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+                del st[0][0]
+            st[0].append(bytearray(f.recordSize))
+            st[1] = len(st[0]) - 1
+        st[0][st[1]][offset:offset + length] = command[9:]
+
+    def _updateRecord(self, command):
+        self._checkLength(command, 12, False)
+        f = self._recordFile(command[1])
+        self._checkAccess(f, 1, 2)
+        recNo = SlabDesFireSimCard._u24(command, 2)
+        offset = SlabDesFireSimCard._u24(command, 5)
+        length = SlabDesFireSimCard._u24(command, 8)
+        if length == 0 or len(command) - 12 != length:
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        st = self._staged(f)
+        if recNo >= len(st[0]) or offset + length > f.recordSize:
+            self._fail(SlabDesFireSimCard.SW_BOUNDARY_ERROR)
+        index = len(st[0]) - 1 - recNo
+        st[0][index] = bytearray(st[0][index])
+        st[0][index][offset:offset + length] = command[12:]
+
+    def _clearRecordFile(self, command):
+        self._checkLength(command, 2)
+        f = self._recordFile(command[1])
+        self._checkAccess(f, 2)
+        st = self._staged(f)
+        st[0] = []
+        st[1] = None
+
+    # ------------------------------------------------------------------------------------------
+    # Transaction
+    def _tmacFile(self):
+        for f in self.app.files.values():
+            if f.fileType == SlabDesFireSimCard.FILE_TMAC:
+                return f
+        return None
+
+    def _commitTransaction(self, command):
+        self._requireApp()
+        for f, st in self.tx.items():
+            if f.fileType == SlabDesFireSimCard.FILE_BACKUP:
+                f.data = st
+            elif f.fileType == SlabDesFireSimCard.FILE_VALUE:
+                f.value = st[0]
+                if st[2]:
+                    f.limitedCreditValue = st[2]
+                elif st[3]:
+                    f.limitedCreditValue = 0
+            else:
+                f.records = [bytes(x) for x in st[0]]
+        changed = len(self.tx) > 0
+        self.tx = {}
+        tmac = self._tmacFile()
+        if tmac is None:
+            return b''
+        if changed:
+            tmac.tmc += 1
+            tmac.tmv = hashlib.sha256(self.uid + tmac.tmc.to_bytes(4, 'little') + self.readerID).digest()[:8]
+        if len(command) > 1 and command[1] & 0x01:
+            return tmac.tmc.to_bytes(4, 'little') + tmac.tmv
+        return b''
+
+    def _abortTransaction(self, command):
+        self.tx = {}
+
+    def _commitReaderID(self, command):
+        self._checkLength(command, 17)
+        self._requireApp()
+        if self._tmacFile() is None:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+        previous = self.readerID
+        self.readerID = bytes(command[1:])
+        return previous
+
+    def _proximity(self, command):
+        pass
+
+    def _readSig(self, command):
+        self._checkLength(command, 2)
+        return hashlib.sha512(self.uid).digest()[:56]
+
+    # ------------------------------------------------------------------------------------------
+    # df_lib escape commands
+    def _escape(self, command):
+        self._checkLength(command, 2, False)
+        handler = self._escapes.get(command[1])
+        if handler is None:
+            self._fail(SlabDesFireSimCard.SW_ILLEGAL_COMMAND)
+        return handler(command)
+
+    def _authenticate(self, command):
+        method, keyNo, length = command[1], command[2], command[3]
+        # AuthenticateEV2First may carry PCDcap2 after the key
+        self._checkLength(command, 4 + length, method != 0x71)
+        if method in (0x71, 0x77) and self.generation != 'EV2':
+            self._fail(SlabDesFireSimCard.SW_ILLEGAL_COMMAND)
+        if method == 0x77 and self.authMethod not in (0x71, 0x77):
+            self._fail(SlabDesFireSimCard.SW_AUTHENTICATION_ERROR)
+        self.authKey = None
+        self.authMethod = None
+        self.tx = {}
+        isAes = method in (0xAA, 0x71, 0x77)
+        isPiccKey = self.app is self.picc and keyNo != 0
+        if not isPiccKey and isAes != (self.app.crypto == SlabDesFireSimCard.CRYPTO_AES):
+            self._fail(SlabDesFireSimCard.SW_AUTHENTICATION_ERROR)
+        if SlabDesFireSimCard.normalizeKey(command[4:4 + length]) != self._key(keyNo):
+            self._fail(SlabDesFireSimCard.SW_AUTHENTICATION_ERROR)
+        self.authKey = keyNo
+        self.authMethod = method
+
+    def _parseChangeKey(self, command, pos):
+        newLen = command[pos]
+        newKey = bytes(command[pos + 1:pos + 1 + newLen])
+        pos += 1 + newLen
+        oldLen = command[pos]
+        oldKey = bytes(command[pos + 1:pos + 1 + oldLen])
+        pos += 1 + oldLen
+        if len(newKey) != newLen or len(oldKey) != oldLen or len(command) - pos > 1:
+            self._fail(SlabDesFireSimCard.SW_LENGTH_ERROR)
+        aesVer = command[pos] if len(command) > pos else None
+        newKey = SlabDesFireSimCard.normalizeKey(newKey)
+        version = aesVer if aesVer is not None else SlabDesFireSimCard.desKeyVersion(newKey)
+        return newKey, oldKey, version
+
+    def _checkChangeKey(self, keyNo):
+        self._requireAuth()
+        if self.app is self.picc:
+            self._requireAuth(0)
+            return
+        access = self.app.keySettings >> 4
+        if keyNo == 0:
+            if not self.app.keySettings & 0x01:
+                self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+            self._requireAuth(0)
+        elif access == 0x0F:
+            self._fail(SlabDesFireSimCard.SW_PERMISSION_DENIED)
+        elif access == 0x0E:
+            self._requireAuth(keyNo)
+        else:
+            self._requireAuth(access)
+
+    def _changeKey(self, command):
+        keyNo = command[2]
+        if self.app is self.picc and keyNo & 0x3F == 0:
+            crypto = {0x00: 0, 0x40: 1, 0x80: 2}.get(keyNo & 0xC0)
+            if crypto is None:
+                self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+            keyNo = 0
+        else:
+            crypto = None
+        newKey, oldKey, version = self._parseChangeKey(command, 3)
+        self._checkChangeKey(keyNo)
+        if keyNo != self.authKey and oldKey:
+            current = self.piccKeys.get(keyNo, (None,))[0] if self.app is self.picc and keyNo != 0 \
+                else self._key(keyNo)
+            if current is not None and SlabDesFireSimCard.normalizeKey(oldKey) != current:
+                self._fail(SlabDesFireSimCard.SW_INTEGRITY_ERROR)
+        if crypto is not None:
+            self.picc.crypto = crypto
+        self._setKey(self.app.activeKeySet, keyNo, newKey, version)
+        if keyNo == self.authKey:
+            self.authKey = None
+            self.authMethod = None
+
+    def _changeKeyEV2(self, command):
+        self._checkLength(command, 6, False)
+        keySetNo, keyNo = command[2], command[3]
+        self._requireApp()
+        if keySetNo >= len(self.app.keySets) or self.app.keySets[keySetNo] is None:
+            self._fail(SlabDesFireSimCard.SW_PARAMETER_ERROR)
+        if keyNo >= self.app.numKeys:
+            self._fail(SlabDesFireSimCard.SW_NO_SUCH_KEY)
+        newKey, oldKey, version = self._parseChangeKey(command, 4)
+        self._checkChangeKey(keyNo)
+        self._setKey(keySetNo, keyNo, newKey, version)
+        if keySetNo == self.app.activeKeySet and keyNo == self.authKey:
+            self.authKey = None
+            self.authMethod = None
+
+    def _vcSelect(self, command):
+        self.reset()
+
+
+class SlabDesFireSimLib(object):
+    """
+    Pure-python stand-in of df_lib library. It provides the same API functions as the native
+    library and answers commands from a simulated card.
+    """
+    ERR_COMMAND = -30001
+    ERR_CONTEXT = -30002
+    ERR_QUOTA = -30003
+
+    def __init__(self, card=None, generation='EV2', maxContexts=None, maxCommands=None):
+        self.card = card if card is not None else SlabDesFireSimCard(generation)
+        self.maxContexts = maxContexts
+        self.maxCommands = maxCommands
+        self._contexts = {}
+        self._nextInst = 1
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _handle(inst):
+        return getattr(inst, 'value', inst)
+
+    def desfire_api_create(self):
+        with self._lock:
+            if self.maxContexts is not None and len(self._contexts) >= self.maxContexts:
+                return None
+            inst = self._nextInst
+            self._nextInst += 1
+            self._contexts[inst] = 0
+            return inst
+
+    def desfire_api_free(self, inst):
+        with self._lock:
+            self._contexts.pop(SlabDesFireSimLib._handle(inst), None)
+
+    def desfire_api_send_str(self, inst, command):
+        with self._lock:
+            inst = SlabDesFireSimLib._handle(inst)
+            count = self._contexts.get(inst)
+            if count is None:
+                return f'{SlabDesFireSimLib.ERR_CONTEXT},Context instance is invalid'.encode()
+            if self.maxCommands is not None and count >= self.maxCommands:
+                return f'{SlabDesFireSimLib.ERR_QUOTA},Command quota of context is exceeded'.encode()
+            self._contexts[inst] = count + 1
+            try:
+                apdu = bytes.fromhex(command.decode('ascii'))
+            except (ValueError, UnicodeDecodeError, AttributeError):
+                return f'{SlabDesFireSimLib.ERR_COMMAND},Command string is invalid'.encode()
+            sw, data = self.card.process(apdu)
+            return f'{sw},{data.hex().upper()}'.encode()
+
+
+if __name__ == '__main__':
+    pass
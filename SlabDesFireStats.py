@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import threading
+from bisect import bisect_left
+
+
+class SlabDesFireStats(object):
+    """
+    Command instrumentation of SlabDesFireEnv:
+    - latency histogram per command code, and per sub-code of df_lib escape command 0xFF
+    - count of results per status word and per df_lib error code
+    Latency histogram uses fixed buckets growing by sqrt(2) from 10us, so percentiles are
+    estimated within one bucket.
+    """
+    BUCKETS = tuple(1e-5 * 2 ** (x / 2) for x in range(44))
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._latency = {}
+            self._sw = {}
+            self._errors = {}
+        return self
+
+    @staticmethod
+    def commandKey(command):
+        """
+        Histogram key of command in ascii hex: command code, or 0xFF with sub-code.
+        """
+        key = command[:4] if command[:2] in (b'FF', b'ff') else command[:2]
+        return key.decode('ascii').upper()
+
+    def record(self, command, sw, elapsed):
+        key = SlabDesFireStats.commandKey(command)
+        index = bisect_left(SlabDesFireStats.BUCKETS, elapsed)
+        with self._lock:
+            item = self._latency.get(key)
+            if item is None:
+                item = self._latency[key] = [0, 0.0, 0.0, [0] * (len(SlabDesFireStats.BUCKETS) + 1)]
+            item[0] += 1
+            item[1] += elapsed
+            if elapsed > item[2]:
+                item[2] = elapsed
+            item[3][index] += 1
+            counter = self._sw if sw >= 0 else self._errors
+            counter[sw] = counter.get(sw, 0) + 1
+        return self
+
+    @staticmethod
+    def _quantile(item, q):
+        count, _, maximum, buckets = item
+        target = q * count
+        total = 0
+        for i, x in enumerate(buckets):
+            total += x
+            if total >= target:
+                return min(SlabDesFireStats.BUCKETS[i], maximum) if i < len(SlabDesFireStats.BUCKETS) else maximum
+        return maximum
+
+    def snapshot(self):
+        """
+        Return statistics as dict:
+        {'latency': {key: {'count', 'sum', 'p50', 'p90', 'p99', 'max'}}, 'sw': {sw: count},
+         'errors': {code: count}}
+        """
+        with self._lock:
+            latency = {k: [v[0], v[1], v[2], list(v[3])] for k, v in self._latency.items()}
+            sw = dict(self._sw)
+            errors = dict(self._errors)
+        ret = {}
+        for key, item in sorted(latency.items()):
+            x = {'count': item[0], 'sum': item[1]}
+            for q in SlabDesFireStats.QUANTILES:
+                x[f'p{int(q * 100)}'] = SlabDesFireStats._quantile(item, q)
+            x['max'] = item[2]
+            ret[key] = x
+        return {'latency': ret, 'sw': dict(sorted(sw.items())), 'errors': dict(sorted(errors.items()))}
+
+    def toPrometheus(self, prefix='dflib'):
+        """
+        Return statistics in Prometheus text exposition format.
+        """
+        with self._lock:
+            latency = {k: [v[0], v[1], v[2], list(v[3])] for k, v in self._latency.items()}
+            sw = dict(self._sw)
+            errors = dict(self._errors)
+        name = f'{prefix}_command_latency_seconds'
+        lines = [f'# HELP {name} Latency of df_lib commands by command code.', f'# TYPE {name} histogram']
+        for key, (count, total, _, buckets) in sorted(latency.items()):
+            cumulative = 0
+            for bound, x in zip(SlabDesFireStats.BUCKETS, buckets):
+                cumulative += x
+                lines.append(f'{name}_bucket{{cmd="{key}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{cmd="{key}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{cmd="{key}"}} {total:.9g}')
+            lines.append(f'{name}_count{{cmd="{key}"}} {count}')
+        name = f'{prefix}_status_total'
+        lines += [f'# HELP {name} Count of DesFire status words.', f'# TYPE {name} counter']
+        lines += [f'{name}{{sw="{x:02X}"}} {n}' for x, n in sorted(sw.items())]
+        name = f'{prefix}_error_total'
+        lines += [f'# HELP {name} Count of df_lib error codes.', f'# TYPE {name} counter']
+        lines += [f'{name}{{code="{x}"}} {n}' for x, n in sorted(errors.items())]
+        return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    pass
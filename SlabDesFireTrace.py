@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import itertools
+import struct
+import sys
+import time
+
+
+class SlabDesFireTrace(object):
+    """
+    Fixed-size ring buffer of command/response records. Each record is kept in binary format
+    as header (timestamp, command length, response length) followed by the command and the raw
+    response of df_lib. The oldest records are overwritten when the buffer is full.
+    """
+    MAGIC = b'DFTR\x01'
+    _HEADER = struct.Struct('<dII')
+    _LENGTH = struct.Struct('<I')
+    DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+    def __init__(self, capacity=4096):
+        if capacity <= 0:
+            raise ValueError("SlabDesFireTrace: capacity should be positive")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._counter = itertools.count()
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def add(self, command, resp, timestamp=None):
+        """
+        Add one record. command and resp are ascii bytes exchanged with df_lib.
+        """
+        index = next(self._counter)
+        self._slots[index % self.capacity] = SlabDesFireTrace._HEADER.pack(
+            time.time() if timestamp is None else timestamp, len(command), len(resp)) + command + resp
+        self._count = index + 1
+        return self
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self._counter = itertools.count()
+        self._count = 0
+        return self
+
+    def rawRecords(self):
+        """
+        Binary records from the oldest one.
+        """
+        count = self._count
+        if count <= self.capacity:
+            slots = self._slots[:count]
+        else:
+            start = count % self.capacity
+            slots = self._slots[start:] + self._slots[:start]
+        return [x for x in slots if x is not None]
+
+    @staticmethod
+    def unpack(record):
+        """
+        Unpack binary record to tuple of (timestamp, command, response).
+        """
+        timestamp, cmdLen, respLen = SlabDesFireTrace._HEADER.unpack_from(record)
+        pos = SlabDesFireTrace._HEADER.size
+        return timestamp, record[pos:pos + cmdLen], record[pos + cmdLen:pos + cmdLen + respLen]
+
+    def records(self):
+        return [SlabDesFireTrace.unpack(x) for x in self.rawRecords()]
+
+    def dump(self, path):
+        """
+        Write records into a binary trace file.
+        """
+        with open(path, 'wb') as f:
+            f.write(SlabDesFireTrace.MAGIC)
+            for record in self.rawRecords():
+                f.write(SlabDesFireTrace._LENGTH.pack(len(record)))
+                f.write(record)
+        return self
+
+    @staticmethod
+    def load(path):
+        """
+        Read records from a binary trace file.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(SlabDesFireTrace.MAGIC):
+            raise Exception("Invalid trace file")
+        ret = []
+        pos = len(SlabDesFireTrace.MAGIC)
+        while pos < len(data):
+            length, = SlabDesFireTrace._LENGTH.unpack_from(data, pos)
+            pos += SlabDesFireTrace._LENGTH.size
+            ret.append(SlabDesFireTrace.unpack(data[pos:pos + length]))
+            pos += length
+        return ret
+
+    @staticmethod
+    def formatHex(hexStr):
+        """
+        Format hex string as lines of 16 bytes.
+        """
+        for i in range(0, len(hexStr), 32):
+            line = hexStr[i:i + 32]
+            line = " ".join(line[j:j + 2] for j in range(0, len(line), 2))
+            line = " | ".join(line[j:j + 24] for j in range(0, len(line), 24))
+            yield f"*     {line}"
+
+    @staticmethod
+    def formatCmd(command):
+        yield '*' + '.' * 78 + '*'
+        yield "* CMD:"
+        yield from SlabDesFireTrace.formatHex(command)
+
+    @staticmethod
+    def formatResult(sw, resp):
+        if sw >= 0:
+            yield f"* RESULT: SW={hex(sw).upper()[2:]}"
+            yield from SlabDesFireTrace.formatHex(resp)
+        else:
+            yield f'* RESULT: SW={sw}, {resp}'
+
+    @staticmethod
+    def format(records):
+        """
+        Format records of (timestamp, command, response) in the log format of SlabDesFireEnv.
+        """
+        for timestamp, command, resp in records:
+            prefix = time.strftime(SlabDesFireTrace.DATE_FORMAT, time.localtime(timestamp)) + ': '
+            sw, _, data = resp.decode('utf-8', 'replace').partition(',')
+            for line in SlabDesFireTrace.formatCmd(command.decode('utf-8', 'replace')):
+                yield prefix + line
+            try:
+                sw = int(sw)
+            except ValueError:
+                yield prefix + f'* RESULT: {resp}'
+                continue
+            for line in SlabDesFireTrace.formatResult(sw, data):
+                yield prefix + line
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} trace_file")
+        sys.exit(1)
+    for x in SlabDesFireTrace.format(SlabDesFireTrace.load(sys.argv[1])):
+        print(x)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import abc
+import itertools
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from ctypes import *
+
+
+class SlabDesFireTransport(abc.ABC):
+    """
+    Link between SlabDesFireEnv and df_lib. A transport provides the 3 df_lib API functions:
+    create a context, free a context and send a command string. Commands and responses are
+    ascii bytes in df_lib format.
+    """
+    ENV_NAME = 'DFLIB_TRANSPORT'
+
+    @abc.abstractmethod
+    def create(self):
+        pass
+
+    @abc.abstractmethod
+    def free(self, inst):
+        pass
+
+    @abc.abstractmethod
+    def sendStr(self, inst, command):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def open(spec=None):
+        """
+        Create transport from specification string "name[:argument]", optionally followed by
+        wrappers separated by comma, e.g. "sim,latency:5,record:trace.txt":
+        - lib: native df_lib library (default)
+        - sim[:generation]: simulated card, generation is D40, EV1 or EV2
+        - replay:path: replay a file recorded by SlabDesFireRecordTransport
+        - record:path: record the commands of the transport before it to path
+        - latency:ms: add latency of ms milliseconds to each command of the transport before it
+        A spec starting with a wrapper wraps the native library. If spec is not given,
+        environment variable DFLIB_TRANSPORT is used.
+        """
+        if spec is None:
+            spec = os.environ.get(SlabDesFireTransport.ENV_NAME, 'lib')
+        parts = spec.split(',')
+        if parts[0].partition(':')[0] in ('record', 'latency'):
+            parts.insert(0, 'lib')
+        name, _, arg = parts[0].partition(':')
+        if name == 'lib':
+            transport = SlabDesFireLibTransport()
+        elif name == 'sim':
+            transport = SlabDesFireSimTransport(generation=arg or 'EV2')
+        elif name == 'replay':
+            if not arg:
+                raise Exception("Replay transport needs a file path")
+            transport = SlabDesFireReplayTransport(arg)
+        else:
+            raise Exception(f"Unknown transport '{spec}'")
+        for part in parts[1:]:
+            name, _, arg = part.partition(':')
+            if name == 'record':
+                if not arg:
+                    raise Exception("Record transport needs a file path")
+                transport = SlabDesFireRecordTransport(transport, arg)
+            elif name == 'latency':
+                try:
+                    latency = float(arg) / 1000
+                except ValueError:
+                    raise Exception(f"Invalid latency '{arg}' in transport '{spec}'")
+                transport = SlabDesFireLatencyTransport(transport, latency)
+            else:
+                raise Exception(f"Unknown transport wrapper '{part}' in '{spec}'")
+        return transport
+
+
+class SlabDesFireLibTransport(SlabDesFireTransport):
+    """
+    Transport over df_lib library. The native library is loaded if lib is not given.
+    """
+
+    @staticmethod
+    def loadLibrary():
+        if sys.platform == 'win32':
+            return windll.LoadLibrary(
+                './df_lib_x64.dll' if platform.architecture()[0].find('64') >= 0 else './df_lib_x86.dll')
+        elif sys.platform == 'linux':
+            if platform.architecture()[0].find('64') >= 0:
+                return cdll.LoadLibrary('./libdf_lib_x64.so')
+            else:
+                raise Exception("df_lib do not support Linux x86 (32-bit) environment")
+        else:
+            raise Exception("Please use in Windows platform")
+
+    def __init__(self, lib=None):
+        self.lib = lib if lib is not None else SlabDesFireLibTransport.loadLibrary()
+        self._create = self.lib.desfire_api_create
+        self._free = self.lib.desfire_api_free
+        self._sendStr = self.lib.desfire_api_send_str
+        if isinstance(self.lib, CDLL):
+            self._create.restype = c_void_p
+            self._free.argtypes = [c_void_p]
+            self._sendStr.argtypes = [c_void_p, c_char_p]
+            self._sendStr.restype = c_char_p
+
+    def create(self):
+        return self._create()
+
+    def free(self, inst):
+        self._free(inst)
+
+    def sendStr(self, inst, command):
+        return self._sendStr(inst, command)
+
+
+class SlabDesFireSimTransport(SlabDesFireLibTransport):
+    """
+    Transport over simulated card, see SlabDesFireSim.
+    """
+
+    def __init__(self, card=None, generation='EV2', maxContexts=None, maxCommands=None):
+        from SlabDesFireSim import SlabDesFireSimLib
+        super().__init__(SlabDesFireSimLib(card, generation, maxContexts, maxCommands))
+
+
+class SlabDesFireRecordTransport(SlabDesFireTransport):
+    """
+    Forward to another transport and record each command/response pair to a file, one pair
+    per line separated by tab.
+    """
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self._file = open(path, 'w', encoding='ascii', newline='\n')
+        self._lock = threading.Lock()
+
+    def create(self):
+        return self.transport.create()
+
+    def free(self, inst):
+        self.transport.free(inst)
+
+    def sendStr(self, inst, command):
+        resp = self.transport.sendStr(inst, command)
+        with self._lock:
+            self._file.write(f"{command.decode('ascii')}\t{resp.decode('ascii', 'replace')}\n")
+        return resp
+
+    def close(self):
+        self._file.close()
+        self.transport.close()
+
+
+class SlabDesFireReplayTransport(SlabDesFireTransport):
+    """
+    Replay a file recorded by SlabDesFireRecordTransport without reader.
+    strict: command must be the same as recorded one
+    loop: restart from beginning when all records are replayed
+    """
+
+    def __init__(self, path, strict=True, loop=False):
+        self.records = []
+        with open(path, 'r', encoding='ascii') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                command, _, resp = line.partition('\t')
+                self.records.append((command.encode('ascii'), resp.encode('ascii')))
+        self.strict = strict
+        self._records = itertools.cycle(self.records) if loop else iter(self.records)
+        self._nextInst = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self):
+        return next(self._nextInst)
+
+    def free(self, inst):
+        pass
+
+    def sendStr(self, inst, command):
+        with self._lock:
+            try:
+                recorded, resp = next(self._records)
+            except StopIteration:
+                raise Exception("Replay records are exhausted")
+        if self.strict and recorded.upper() != command.upper():
+            raise Exception(f"Replay command mismatch, expect {recorded.decode()} but {command.decode()}")
+        return resp
+
+
+class SlabDesFireLatencyTransport(SlabDesFireTransport):
+    """
+    Forward to another transport and add latency to each command to emulate RF exchange.
+    latency: fixed delay of each command in seconds
+    perByte: additional delay per command and response byte in seconds
+    jitter: maximal random delay in seconds
+    """
+
+    def __init__(self, transport, latency=0.0, perByte=0.0, jitter=0.0):
+        self.transport = transport
+        self.latency = latency
+        self.perByte = perByte
+        self.jitter = jitter
+
+    def create(self):
+        return self.transport.create()
+
+    def free(self, inst):
+        self.transport.free(inst)
+
+    def sendStr(self, inst, command):
+        resp = self.transport.sendStr(inst, command)
+        delay = self.latency + self.perByte * (len(command) + len(resp)) / 2
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return resp
+
+    def close(self):
+        self.transport.close()
+
+
+if __name__ == '__main__':
+    pass
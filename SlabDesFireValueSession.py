@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireDecoders import SlabDesFireDecoders
+from SlabDesFireFileIO import SlabDesFireFileIOError
+
+
+class SlabDesFireValueFile(object):
+    """
+    Shadow of one value file: committed and staged balance, limits from GetFileSettings and
+    the staged totals of credit, limited credit and debit used by the limit checks.
+    """
+    __slots__ = ('fileNo', 'commMode', 'committed', 'balance', 'lowerLimit', 'upperLimit', 'limitedCreditEnable',
+                 'limitedCreditValue', 'credit', 'limitedCredit', 'debit')
+
+    def __init__(self, fileNo, commMode, settings, value):
+        self.fileNo = fileNo
+        self.commMode = commMode
+        self.lowerLimit = settings.lowerLimit
+        self.upperLimit = settings.upperLimit
+        self.limitedCreditEnable = bool(settings.limitedCreditEnable & 0x01)
+        self.limitedCreditValue = settings.limitedCreditValue
+        self.committed = value
+        self.reset()
+
+    def reset(self):
+        self.balance = self.committed
+        self.credit = 0
+        self.limitedCredit = 0
+        self.debit = 0
+        return self
+
+    @property
+    def pending(self):
+        return bool(self.credit or self.limitedCredit or self.debit)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(fileNo={self.fileNo}, committed={self.committed}, balance={self.balance})"
+
+
+class SlabDesFireValueSession(object):
+    """
+    Value file transactions with a local shadow ledger. The balance of a value file is read once
+    by GetValue, and the limits by GetFileSettings, when the file is first used; debit, credit
+    and limitedCredit are then checked against the limits locally and only staged. commit()
+    sends the staged operations in the order they were checked, consecutive operations of the
+    same kind on one file merged, across all value files of the application, and one
+    CommitTransaction. A failed commit aborts the transaction and reconciles the shadows with
+    the card.
+
+    A limit violation raises SlabDesFireFileIOError with the BOUNDARY_ERROR status word, as the
+    card would answer, without touching the card. The application must be selected and
+    authenticated as the files require; call invalidate() when it changes or another card is in
+    the field, so the shadows are read again.
+    """
+    SW_BOUNDARY_ERROR = 0xBE
+
+    def __init__(self, env, commMode='plain'):
+        self.env = env
+        self.commMode = commMode
+        self.files = {}
+        # staged operations in order: [fileNo, command factory, value]
+        self.ops = []
+        self.commitCount = 0
+
+    def invalidate(self):
+        """
+        Forget all shadows and staged operations.
+        """
+        self.files.clear()
+        self.ops.clear()
+        return self
+
+    def _send(self, command, what):
+        resp = self.env.send(command)
+        if resp.sw != 0:
+            raise SlabDesFireFileIOError(f"{what} failed, SW={resp.sw:X}", resp.sw)
+        return resp
+
+    def open(self, fileNo, commMode=None):
+        """
+        Return shadow of value file fileNo, reading its settings and value on first use.
+        """
+        f = self.files.get(fileNo)
+        if f is None:
+            commMode = commMode or self.commMode
+            cmd = SlabDesFireCmd.GetFileSettings(fileNo)
+            settings = SlabDesFireDecoders.decode(cmd, self._send(cmd, f"GetFileSettings of file {fileNo}"))
+            if settings.fileType != 2:
+                raise SlabDesFireFileIOError(f"File {fileNo} is not value file", 0)
+            cmd = SlabDesFireCmd.GetValue(fileNo, commMode)
+            value = SlabDesFireDecoders.decode(cmd, self._send(cmd, f"GetValue of file {fileNo}")).value
+            f = self.files[fileNo] = SlabDesFireValueFile(fileNo, commMode, settings, value)
+        return f
+
+    def balance(self, fileNo):
+        """
+        Balance of file fileNo including staged operations.
+        """
+        return self.open(fileNo).balance
+
+    def _boundary(self, f, what, value):
+        raise SlabDesFireFileIOError(f"{what} {value} of file {f.fileNo} exceeds limits "
+                                     f"[{f.lowerLimit}, {f.upperLimit}] of balance {f.balance}",
+                                     SlabDesFireValueSession.SW_BOUNDARY_ERROR)
+
+    @staticmethod
+    def _checkValue(value):
+        if not isinstance(value, int) or value < 0:
+            raise Exception("Value should be non-negative int")
+
+    def _stage(self, f, factory, value):
+        ops = self.ops
+        if ops and ops[-1][0] == f.fileNo and ops[-1][1] is factory:
+            ops[-1][2] += value
+        else:
+            ops.append([f.fileNo, factory, value])
+
+    def debit(self, fileNo, value):
+        """
+        Stage Debit. Credits staged in the same transaction are not counted for the lower limit,
+        so the check holds whether the card applies them before commit or not.
+        """
+        SlabDesFireValueSession._checkValue(value)
+        f = self.open(fileNo)
+        if f.limitedCredit or min(f.balance, f.committed - f.debit) - value < f.lowerLimit:
+            self._boundary(f, "Debit", value)
+        f.balance -= value
+        f.debit += value
+        self._stage(f, SlabDesFireCmd.Debit, value)
+        return f.balance
+
+    def credit(self, fileNo, value):
+        SlabDesFireValueSession._checkValue(value)
+        f = self.open(fileNo)
+        if f.limitedCredit or f.balance + value > f.upperLimit:
+            self._boundary(f, "Credit", value)
+        f.balance += value
+        f.credit += value
+        self._stage(f, SlabDesFireCmd.Credit, value)
+        return f.balance
+
+    def limitedCredit(self, fileNo, value):
+        """
+        Stage LimitedCredit, which can not be combined with Debit or Credit of the same file in
+        one transaction.
+        """
+        SlabDesFireValueSession._checkValue(value)
+        f = self.open(fileNo)
+        if not f.limitedCreditEnable or f.credit or f.debit or f.limitedCredit \
+                or value > f.limitedCreditValue or f.balance + value > f.upperLimit:
+            self._boundary(f, "LimitedCredit", value)
+        f.balance += value
+        f.limitedCredit += value
+        self._stage(f, SlabDesFireCmd.LimitedCredit, value)
+        return f.balance
+
+    def commands(self):
+        """
+        Value commands of the staged operations in the order they were checked, consecutive
+        operations of the same kind on the same file merged, in hex string of ascii bytes.
+        """
+        return [factory(fileNo, value, self.files[fileNo].commMode).toCmdBytes() for fileNo, factory, value in self.ops]
+
+    def commit(self, isNeedTMC=False):
+        """
+        Send the staged operations and CommitTransaction. Return response data of commit, the
+        transaction MAC counter and value if a transaction MAC file exists.
+        """
+        cmds = self.commands()
+        if not cmds:
+            return b''
+        cmds.append(SlabDesFireCmd.CommitTransaction(isNeedTMC).toCmdBytes())
+        sws, payloads = self.env.sendMany(cmds)
+        if len(sws) != len(cmds) or sws[-1] != 0:
+            sw = sws[-1]
+            if sw >= 0:
+                self.env.send(SlabDesFireCmd.AbortTransaction())
+            self.reconcile()
+            raise SlabDesFireFileIOError(f"Value transaction failed at command {len(sws)} of {len(cmds)}, "
+                                         f"SW={sw:X}", sw)
+        for f in self.files.values():
+            if not f.pending:
+                continue
+            if f.debit:
+                f.limitedCreditValue = f.debit
+            elif f.limitedCredit:
+                f.limitedCreditValue = 0
+            f.committed = f.balance
+            f.reset()
+        self.ops.clear()
+        self.commitCount += 1
+        return payloads[-1]
+
+    def abort(self):
+        """
+        Drop the staged operations. Nothing was sent, so the card is not touched.
+        """
+        for f in self.files.values():
+            f.reset()
+        self.ops.clear()
+        return self
+
+    def reconcile(self, fileNo=None):
+        """
+        Read the value of file fileNo, or of all shadowed files, from the card again and drop
+        staged operations. Return dict of fileNo to difference of card value and shadow.
+        """
+        ret = {}
+        for f in list(self.files.values()) if fileNo is None else [self.open(fileNo)]:
+            self.files.pop(f.fileNo, None)
+            self.ops = [x for x in self.ops if x[0] != f.fileNo]
+            try:
+                ret[f.fileNo] = self.open(f.fileNo, f.commMode).committed - f.committed
+            except SlabDesFireFileIOError:
+                # read again on next use
+                self.files.pop(f.fileNo, None)
+        return ret
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+from SlabDesFirePool import SlabDesFireEnvPool
+
+
+def runCommands(env, commands, allowed=(0,), stopOnError=True):
+    """
+    Card job sending commands in order. Return list of SlabDesFireResp.
+    If stopOnError, stop at the first status word not in allowed.
+    """
+    ret = []
+    for command in commands:
+        resp = env.send(command)
+        ret.append(resp)
+        if stopOnError and resp.sw not in allowed:
+            break
+    return ret
+
+
+def _workerMain(conn, transport, poolSize, quota, reserve):
+    pool = SlabDesFireEnvPool(poolSize, transport, quota, reserve)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            jobId, needed, fn, args, kwargs = msg
+            try:
+                with pool.session(needed=needed) as env:
+                    result = fn(env, *args, **kwargs)
+                conn.send((jobId, True, result))
+            except Exception as e:
+                try:
+                    conn.send((jobId, False, e))
+                except Exception:
+                    conn.send((jobId, False, Exception(repr(e))))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        pool.close()
+        conn.close()
+
+
+class _Worker(object):
+    def __init__(self, ctx, station, transport, poolSize, quota, reserve):
+        self.station = station
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_workerMain, args=(child, transport, poolSize, quota, reserve),
+                                   name=f'df_lib-worker-{station}', daemon=True)
+        self.process.start()
+        child.close()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.reader = threading.Thread(target=self._read, name=f'df_lib-reader-{station}', daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _deliver(future, ok, result):
+        # a future cancelled or resolved by its caller must not stop the reader
+        if future is None or future.done():
+            return
+        try:
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+        except InvalidStateError:
+            pass
+
+    def _read(self):
+        try:
+            while True:
+                jobId, ok, result = self.conn.recv()
+                with self.lock:
+                    future = self.pending.pop(jobId, None)
+                _Worker._deliver(future, ok, result)
+        except (EOFError, OSError):
+            pass
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            _Worker._deliver(future, False, Exception(f"Worker of station {self.station} exited"))
+
+    def submit(self, jobId, needed, fn, args, kwargs):
+        future = Future()
+        # the job is dispatched at once and can not be cancelled any more
+        future.set_running_or_notify_cancel()
+        with self.lock:
+            self.pending[jobId] = future
+            try:
+                self.conn.send((jobId, needed, fn, args, kwargs))
+            except Exception:
+                del self.pending[jobId]
+                raise
+        return future
+
+
+class SlabDesFireWorkerPool(object):
+    """
+    Process pool driving several reader stations from one host. Each worker process loads its
+    own df_lib library once and keeps warm contexts in a SlabDesFireEnvPool, so the context
+    limit of df_lib applies per worker instead of per host.
+
+    Jobs are picklable functions called as fn(env, *args, **kwargs) in a worker; the result
+    is returned through a concurrent.futures.Future. SlabDesFireResp results are pickled as
+    raw df_lib bytes.
+    """
+
+    def __init__(self, workers=1, transport='lib', poolSize=1, quota=SlabDesFireEnvPool.QUOTA,
+                 reserve=SlabDesFireEnvPool.RESERVE, startMethod=None):
+        """
+        workers: number of worker processes, one per station
+        transport: transport specification string of each worker, see SlabDesFireTransport.open
+        poolSize, quota, reserve: parameters of SlabDesFireEnvPool in each worker
+        startMethod: multiprocessing start method
+        """
+        if workers <= 0:
+            raise Exception("Number of workers should be positive")
+        ctx = multiprocessing.get_context(startMethod)
+        self._workers = [_Worker(ctx, x, transport, poolSize, quota, reserve) for x in range(workers)]
+        self._jobIds = itertools.count()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._workers)
+
+    def submit(self, fn, *args, station=None, needed=None, **kwargs):
+        """
+        Run fn(env, *args, **kwargs) in a worker. If station is None, the worker with fewest
+        pending jobs is used. needed is the command count of the job, see SlabDesFireEnvPool.
+        """
+        if self._closed:
+            raise Exception("Worker pool is closed")
+        if station is None:
+            worker = min(self._workers, key=lambda x: len(x.pending))
+        else:
+            worker = self._workers[station]
+        return worker.submit(next(self._jobIds), needed, fn, args, kwargs)
+
+    def submitCommands(self, commands, station=None, allowed=(0,), stopOnError=True):
+        """
+        Send commands in order in one worker. The future result is a list of SlabDesFireResp.
+        """
+        commands = [x.toCmdStr() if hasattr(x, 'toCmdStr') else x for x in commands]
+        return self.submit(runCommands, commands, allowed, stopOnError, station=station, needed=len(commands))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+        for worker in self._workers:
+            worker.process.join()
+            worker.reader.join()
+            worker.conn.close()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+from binascii import hexlify, unhexlify
+
+from SlabDesFireCmd import SlabDesFireCmd
+from SlabDesFireEnv import SlabDesFireEnv, SlabDesFireEnvWrapper
+from SlabDesFireFileIO import SlabDesFireChunkTuner, SlabDesFireFileIOError
+from SlabDesFireResp import SlabDesFireResp
+
+
+class SlabDesFireWriteBuffer(SlabDesFireEnvWrapper):
+    """
+    Write-behind buffer of WriteData, WriteDataISO, WriteRecord and WriteRecordISO in front of
+    SlabDesFireEnv. Writes to the same file of the selected application are kept as byte ranges,
+    overlapping and adjacent ranges are merged with the latest data winning, and a buffered write
+    returns a success response without data. flush() sends one write per merged range, split into
+    chunks of whole frames. Writes to backup and record files take effect on the card only with
+    CommitTransaction: a CommitTransaction sent through the buffer is sent right after the writes
+    it commits, commit() flushes and sends one, and leaving the buffer as a context manager
+    without exception calls commit() if writes were buffered or flushed since the last
+    CommitTransaction, AbortTransaction or SelectApp.
+
+    ReadData and ReadDataISO of a buffered file are read from the card and the buffered bytes are
+    laid over the data, so the caller reads its own writes, also of a backup file before commit.
+    The buffer is flushed before any other command which may depend on the order of writes:
+    authentication, key and selection commands, commands on a buffered file, file management and
+    commands not known here. AbortTransaction drops the buffer before it is sent.
+    A failed flushed write raises SlabDesFireFileIOError and the buffer is kept, as the card
+    aborts the transaction on the error; call discard() to drop it.
+    """
+    WRITE_CODES = frozenset((b'3D', b'8D', b'3B', b'8B'))
+    READ_CODES = frozenset((b'BD', b'AD'))
+    # commands passed without flush unless they address a buffered file
+    PASS_CODES = frozenset((b'BB', b'AB', b'6C', b'0C', b'1C', b'DC', b'F5', b'6F', b'61', b'45', b'64', b'6E',
+                            b'60', b'6A', b'6D'))
+    # codes whose second byte is a file number
+    FILE_CODES = frozenset((b'BD', b'AD', b'BB', b'AB', b'6C', b'0C', b'1C', b'DC', b'F5', b'DB', b'BA', b'EB',
+                            b'5F', b'DF'))
+    COMM_MODES = {0: 'plain', 1: 'mac', 2: 'full'}
+    # commands ending a transaction on the card
+    TX_END_CODES = frozenset((b'C7', b'A7', b'5A'))
+    NAMES = {b'3D': 'WriteData', b'8D': 'WriteDataISO', b'3B': 'WriteRecord', b'8B': 'WriteRecordISO'}
+    _BUFFERED = SlabDesFireResp(b'0,')
+
+    def __init__(self, env, generation='EV2'):
+        SlabDesFireEnvWrapper.__init__(self, env)
+        self.generation = generation
+        self.tuners = {}
+        # (code, fileNo) -> [commMode, ranges]; ranges are sorted [offset, bytearray]
+        self.buffers = {}
+        self.writeCount = 0
+        self.sentCount = 0
+        # templates of write commands by (code, fileNo, commMode)
+        self._templates = {}
+        # True if writes were buffered or sent since the transaction ended
+        self._uncommitted = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None and self._uncommitted:
+            self.commit()
+
+    @property
+    def pending(self):
+        return bool(self.buffers)
+
+    def _chunkSize(self, commMode):
+        tuner = self.tuners.get(commMode)
+        if tuner is None:
+            tuner = self.tuners[commMode] = SlabDesFireChunkTuner(
+                self.generation, SlabDesFireWriteBuffer.COMM_MODES.get(commMode, 'full'), False)
+        return tuner.chunkSize
+
+    @staticmethod
+    def _merge(ranges, offset, data):
+        end = offset + len(data)
+        start, stop = offset, end
+        kept = []
+        merged = []
+        for r in ranges:
+            if r[0] + len(r[1]) < offset or r[0] > end:
+                kept.append(r)
+            else:
+                merged.append(r)
+                start = min(start, r[0])
+                stop = max(stop, r[0] + len(r[1]))
+        buf = bytearray(stop - start)
+        for s, b in merged:
+            buf[s - start:s - start + len(b)] = b
+        buf[offset - start:end - start] = data
+        kept.append([start, buf])
+        kept.sort(key=lambda x: x[0])
+        return kept
+
+    def _buffer(self, cmdBytes):
+        code = cmdBytes[:2]
+        fileNo = int(cmdBytes[2:4], 16)
+        offset = int.from_bytes(unhexlify(cmdBytes[4:10]), 'little')
+        commMode = int(cmdBytes[16:18], 16)
+        data = unhexlify(cmdBytes[18:])
+        key = (code, fileNo)
+        buffer = self.buffers.get(key)
+        if buffer is not None and buffer[0] != commMode:
+            self.flush()
+            buffer = None
+        if buffer is None:
+            buffer = self.buffers[key] = [commMode, []]
+        buffer[1] = SlabDesFireWriteBuffer._merge(buffer[1], offset, data)
+        self.writeCount += 1
+        self._uncommitted = True
+
+    def _template(self, code, fileNo, commMode):
+        key = (code, fileNo, commMode)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = SlabDesFireCmd.prepare(
+                SlabDesFireWriteBuffer.NAMES[code], fileNo=fileNo,
+                commMode=SlabDesFireWriteBuffer.COMM_MODES.get(commMode, 'full'))
+        return template
+
+    def commands(self):
+        """
+        Write commands of the buffer, in hex string of ascii bytes.
+        """
+        ret = []
+        for (code, fileNo), (commMode, ranges) in self.buffers.items():
+            chunkSize = self._chunkSize(commMode)
+            template = self._template(code, fileNo, commMode)
+            for offset, data in ranges:
+                for x in range(0, len(data), chunkSize):
+                    chunk = data[x:x + chunkSize]
+                    ret.append(template.bind(offset=offset + x, length=len(chunk)) + hexlify(chunk).upper())
+        return ret
+
+    def flush(self):
+        """
+        Send the buffered writes in one sendMany. Return count of commands sent.
+        The buffer is cleared when all writes succeed.
+        """
+        cmds = self.commands()
+        if not cmds:
+            return 0
+        sws, _ = self.env.sendMany(cmds)
+        self.sentCount += len(sws)
+        if len(sws) != len(cmds) or sws[-1] != 0:
+            cmd = cmds[len(sws) - 1]
+            raise SlabDesFireFileIOError(f"Buffered write {cmd[:2].decode('ascii')} of file {int(cmd[2:4], 16)} "
+                                         f"failed, SW={sws[-1]:X}", sws[-1])
+        self.buffers.clear()
+        return len(cmds)
+
+    def commit(self, isNeedTMC=False):
+        """
+        Flush the buffer and send one CommitTransaction. Return its SlabDesFireResp.
+        A failed CommitTransaction raises SlabDesFireFileIOError.
+        """
+        self.flush()
+        resp = self.env.send(SlabDesFireCmd.CommitTransaction(isNeedTMC))
+        self._uncommitted = False
+        if resp.sw != 0:
+            raise SlabDesFireFileIOError(f"CommitTransaction failed, SW={resp.sw:X}", resp.sw)
+        return resp
+
+    def discard(self):
+        self.buffers.clear()
+        return self
+
+    def _buffered(self, fileNo):
+        return any(x[1] == fileNo for x in self.buffers)
+
+    def _overlay(self, cmdBytes, resp):
+        fileNo = int(cmdBytes[2:4], 16)
+        offset = int.from_bytes(unhexlify(cmdBytes[4:10]), 'little')
+        data = bytearray(resp.data)
+        for (code, n), (_, ranges) in self.buffers.items():
+            if n != fileNo or code not in (b'3D', b'8D'):
+                continue
+            for start, buf in ranges:
+                a = max(start, offset)
+                b = min(start + len(buf), offset + len(data))
+                if a < b:
+                    data[a - offset:b - offset] = buf[a - start:b - start]
+        return SlabDesFireResp(b'0,' + hexlify(data).upper())
+
+    def send(self, command):
+        """
+        Buffer a write command, or send command through env after flushing the buffer if needed.
+        Return SlabDesFireResp.
+        """
+        cmdBytes = SlabDesFireEnv.encode(command).upper()
+        code = cmdBytes[:2]
+        if code in SlabDesFireWriteBuffer.WRITE_CODES:
+            self._buffer(cmdBytes)
+            return SlabDesFireWriteBuffer._BUFFERED
+        if code in SlabDesFireWriteBuffer.TX_END_CODES:
+            self._uncommitted = False
+        if not self.buffers:
+            return self.env.send(cmdBytes)
+        if code == b'A7':
+            self.discard()
+            return self.env.send(cmdBytes)
+        fileNo = int(cmdBytes[2:4], 16) if code in SlabDesFireWriteBuffer.FILE_CODES else None
+        if code in SlabDesFireWriteBuffer.READ_CODES and self._buffered(fileNo):
+            resp = self.env.send(cmdBytes)
+            return self._overlay(cmdBytes, resp) if resp.sw == 0 else resp
+        if code not in SlabDesFireWriteBuffer.PASS_CODES or (fileNo is not None and self._buffered(fileNo)):
+            self.flush()
+        return self.env.send(cmdBytes)
+
+
+if __name__ == '__main__':
+    pass
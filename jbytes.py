@@ -18,10 +18,67 @@
 """
 
 import re
+import struct
+import threading
+from collections import OrderedDict
 
 
 class JBytes(object):
     __RE_PATTERN_REMOVE_SPACE = re.compile(r"\s+")
+    # LRU cache of short hex strings such as keys and AIDs, values are zeroed when evicted
+    HEX_CACHE_SIZE = 1024
+    HEX_CACHE_MAX_LENGTH = 128
+    __hexCache = OrderedDict()
+    __hexCacheLock = threading.Lock()
+    __hexCacheHits = 0
+    __hexCacheMisses = 0
+
+    @staticmethod
+    def __fromHex(arg):
+        return bytes.fromhex(arg if arg.isalnum() else JBytes.__RE_PATTERN_REMOVE_SPACE.sub("", arg))
+
+    @staticmethod
+    def __extendHex(ret, arg):
+        """
+        Extend ret with bytes of hex string arg, using the hex cache for short strings.
+        """
+        if len(arg) > JBytes.HEX_CACHE_MAX_LENGTH:
+            ret.extend(JBytes.__fromHex(arg))
+            return
+        with JBytes.__hexCacheLock:
+            value = JBytes.__hexCache.get(arg)
+            if value is not None:
+                JBytes.__hexCache.move_to_end(arg)
+                JBytes.__hexCacheHits += 1
+                ret.extend(value)
+                return
+        value = bytearray(JBytes.__fromHex(arg))
+        ret.extend(value)
+        with JBytes.__hexCacheLock:
+            JBytes.__hexCacheMisses += 1
+            if arg not in JBytes.__hexCache:
+                JBytes.__hexCache[arg] = value
+                while len(JBytes.__hexCache) > max(JBytes.HEX_CACHE_SIZE, 0):
+                    _, old = JBytes.__hexCache.popitem(last=False)
+                    old[:] = bytes(len(old))
+
+    @staticmethod
+    def hexCacheInfo():
+        with JBytes.__hexCacheLock:
+            return {'hits': JBytes.__hexCacheHits, 'misses': JBytes.__hexCacheMisses,
+                    'size': len(JBytes.__hexCache), 'maxSize': JBytes.HEX_CACHE_SIZE}
+
+    @staticmethod
+    def clearHexCache():
+        """
+        Zero and remove all cached values, and reset counters.
+        """
+        with JBytes.__hexCacheLock:
+            for value in JBytes.__hexCache.values():
+                value[:] = bytes(len(value))
+            JBytes.__hexCache.clear()
+            JBytes.__hexCacheHits = 0
+            JBytes.__hexCacheMisses = 0
 
     @staticmethod
     def fromInt(value, byteLength=4, isBigEndian=True):
@@ -76,8 +133,7 @@ class JBytes(object):
                 ret.extend(JBytes.__transfer_int__(arg))
             # string
             elif isinstance(arg, str):
-                ret.extend(bytes.fromhex(
-                    JBytes.__RE_PATTERN_REMOVE_SPACE.sub("", arg)))
+                JBytes.__extendHex(ret, arg)
             # bytes
             elif isinstance(arg, bytes):
                 ret.extend(arg)
@@ -120,6 +176,9 @@ class JBytes(object):
         for item in self.BYTES:
             yield item
 
+    def __getitem__(self, key):
+        return self.BYTES[key]
+
     def append(self, *args):
         self.BYTES.extend(JBytes.__transfer__(*args))
         return self
@@ -169,8 +228,7 @@ class JBytes(object):
     def putHexString(self, arg):
         if not isinstance(arg, str):
             raise ValueError("JBytes.putHexString: arg must be string")
-        self.BYTES.extend(bytes.fromhex(
-            JBytes.__RE_PATTERN_REMOVE_SPACE.sub("", arg)))
+        JBytes.__extendHex(self.BYTES, arg)
         return self
 
     def putBytes(self, arg):
@@ -234,6 +292,160 @@ class JBytes(object):
     def hex(self):
         return self.BYTES.hex().upper()
 
+    def view(self):
+        """
+        JBytesView on the data without copy. The data can not be resized while the view exists.
+        """
+        return JBytesView(self.BYTES)
+
+
+class JBytesView(object):
+    """
+    Read-only view of byte data over a memoryview. Slicing and getters never copy the data.
+    Getters read from the current index and move it forward like JBytes.
+    """
+    __slots__ = ('VIEW', 'INDEX')
+    __BYTE = struct.Struct('B')
+    __SHORT = struct.Struct('>H')
+    __SHORT_LE = struct.Struct('<H')
+    __INT = struct.Struct('>I')
+    __INT_LE = struct.Struct('<I')
+
+    def __init__(self, data=b''):
+        view = data.VIEW if isinstance(data, JBytesView) else memoryview(data)
+        if view.format != 'B' or view.ndim != 1:
+            view = view.cast('B')
+        self.VIEW = view.toreadonly()
+        self.INDEX = 0
+
+    def __str__(self):
+        return r'{0:s}("{1:s}")'.format(self.__class__.__name__, self.hex())
+
+    def __repr__(self):
+        return self.hex()
+
+    def __bytes__(self):
+        return self.VIEW.tobytes()
+
+    def __len__(self):
+        return len(self.VIEW)
+
+    def __bool__(self):
+        return len(self.VIEW) > 0
+
+    def __iter__(self):
+        return iter(self.VIEW)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return JBytesView(self.VIEW[key])
+        return self.VIEW[key]
+
+    def __eq__(self, other):
+        if isinstance(other, JBytesView):
+            return self.VIEW == other.VIEW
+        try:
+            return self.VIEW == memoryview(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __unpack(self, st):
+        ret = st.unpack_from(self.VIEW, self.INDEX)[0]
+        self.INDEX += st.size
+        return ret
+
+    def __int(self, length, byteorder):
+        end = self.INDEX + length
+        if end > len(self.VIEW):
+            raise struct.error(f"JBytesView: {length} bytes required at index {self.INDEX}")
+        ret = int.from_bytes(self.VIEW[self.INDEX:end], byteorder)
+        self.INDEX = end
+        return ret
+
+    def getByte(self):
+        return self.__unpack(JBytesView.__BYTE)
+
+    def getBytes(self, length):
+        """
+        Return next length bytes as JBytesView.
+        """
+        if self.INDEX + length > len(self.VIEW):
+            raise struct.error(f"JBytesView: {length} bytes required at index {self.INDEX}")
+        ret = JBytesView(self.VIEW[self.INDEX:self.INDEX + length])
+        self.INDEX += length
+        return ret
+
+    def getShort(self):
+        return self.__unpack(JBytesView.__SHORT)
+
+    def getShortLE(self):
+        return self.__unpack(JBytesView.__SHORT_LE)
+
+    def getInt3Bytes(self):
+        return self.__int(3, 'big')
+
+    def getInt3BytesLE(self):
+        return self.__int(3, 'little')
+
+    def getInt(self):
+        return self.__unpack(JBytesView.__INT)
+
+    def getIntLE(self):
+        return self.__unpack(JBytesView.__INT_LE)
+
+    def getString(self, length):
+        return bytes(self.getBytes(length)).decode("utf-8")
+
+    def unpack(self, fmt):
+        """
+        Read several fields at once with struct format fmt, e.g. '<BBH'.
+        """
+        st = fmt if isinstance(fmt, struct.Struct) else struct.Struct(fmt)
+        ret = st.unpack_from(self.VIEW, self.INDEX)
+        self.INDEX += st.size
+        return ret
+
+    def unpackFrom(self, fmt, offset=0):
+        """
+        Read fields with struct format fmt at offset, the index is not changed.
+        """
+        return struct.unpack_from(fmt, self.VIEW, offset)
+
+    def seek(self, index):
+        self.INDEX = index
+        return self
+
+    def skip(self, length):
+        self.INDEX += length
+        return self
+
+    def reset(self):
+        self.INDEX = 0
+        return self
+
+    def length(self):
+        return len(self.VIEW)
+
+    def remain(self):
+        return len(self.VIEW) - self.INDEX
+
+    def isBegin(self):
+        return self.INDEX == 0
+
+    def isEnd(self):
+        return self.INDEX >= len(self.VIEW)
+
+    def isEmpty(self):
+        return len(self.VIEW) <= 0
+
+    def bytes(self):
+        return self.__bytes__()
+
+    def hex(self):
+        return self.VIEW.hex().upper()
+
 
 if __name__ == "__main__":
     pass
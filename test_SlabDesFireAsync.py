@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import asyncio
+import time
+import unittest
+
+from SlabDesFireAsync import AsyncDesFireEnv
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class AsyncDesFireEnvTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.env = await AsyncDesFireEnv(transport=SlabDesFireSimTransport(), maxWorkers=2).create()
+
+    async def asyncTearDown(self):
+        await self.env.close()
+
+    async def test_send(self):
+        resp = await self.env.send(cmd.GetVersion())
+        self.assertEqual((resp.sw, len(resp.data)), (0, 28))
+
+    async def test_calls_run_in_submission_order(self):
+        order = []
+
+        def job(env, n, delay):
+            time.sleep(delay)
+            order.append(n)
+            return n
+
+        # later calls are shorter, but wait for the earlier ones even with two threads
+        results = await asyncio.gather(*(self.env.call(job, n, 0.03 - n * 0.01) for n in range(3)))
+        self.assertEqual(results, [0, 1, 2])
+        self.assertEqual(order, [0, 1, 2])
+
+    async def test_queued_call_timeout_never_reaches_card(self):
+        first = asyncio.ensure_future(self.env.call(lambda env: time.sleep(0.2)))
+        await asyncio.sleep(0.01)
+        count = self.env.env.cmdCount
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.env.send(cmd.GetVersion(), timeout=0.05)
+        await first
+        self.assertEqual((await self.env.send(cmd.GetAppIDs())).sw, 0)
+        self.assertEqual(self.env.env.cmdCount - count, 1)
+
+    async def test_job_exception(self):
+        def fail(env):
+            raise ValueError('job failed')
+
+        # assertRaises clears the frames of the traceback, which must not stop the queue
+        with self.assertRaises(ValueError):
+            await self.env.call(fail)
+        self.assertEqual((await self.env.send(cmd.GetVersion())).sw, 0)
+
+    async def test_closed_env(self):
+        async with AsyncDesFireEnv(transport=SlabDesFireSimTransport()) as env:
+            self.assertEqual((await env.send(cmd.GetVersion())).sw, 0)
+        with self.assertRaises(Exception):
+            await env.send(cmd.GetVersion())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireCmd import SlabDesFireCmdSpec
+from jbytes import JBytes
+
+
+class SlabDesFireCmdMemoizeTest(unittest.TestCase):
+
+    def test_constant_commands_are_interned(self):
+        self.assertIs(cmd.GetVersion(), cmd.GetVersion())
+        self.assertTrue(cmd.GetVersion().frozen)
+
+    def test_same_parameters_share_frozen_command(self):
+        a = cmd.SelectApp(1)
+        self.assertIs(a, cmd.SelectApp(1))
+        self.assertTrue(a.frozen)
+        with self.assertRaises(AttributeError):
+            a.cmd = 0x6A
+
+    def test_keyword_arguments(self):
+        self.assertIs(cmd.SelectApp(desfireAid1=1), cmd.SelectApp(1))
+        self.assertIs(cmd.SelectApp(1, None), cmd.SelectApp(1))
+        self.assertEqual(cmd.GetKeyVersion(0, keySetNo=1).toCmdBytes(), b'640001')
+        self.assertIs(cmd.GetKeyVersion(keyNo=2), cmd.GetKeyVersion(2))
+        with self.assertRaises(TypeError):
+            cmd.SelectApp(aid=1)
+
+    def test_mutable_parameters_not_cached(self):
+        key = JBytes('00' * 8)
+        a = cmd.AuthenticateISO(0, key)
+        key.BYTES[0] = 0x11
+        b = cmd.AuthenticateISO(0, key)
+        self.assertIsNot(a, b)
+        self.assertNotEqual(a.toCmdBytes(), b.toCmdBytes())
+
+    def test_key_commands_not_cached(self):
+        self.assertIsNot(cmd.AuthenticateAES(0, '00' * 16), cmd.AuthenticateAES(0, '00' * 16))
+        self.assertFalse(cmd.AuthenticateISO(0, '00' * 8).frozen)
+
+
+
+class SlabDesFireCmdSpecTest(unittest.TestCase):
+
+    @staticmethod
+    def put(code, *fields):
+        """
+        Encoding of fields (JBytes put method name, value) as built before the spec table.
+        """
+        data = JBytes().putByte(code)
+        for method, value in fields:
+            getattr(data, f'put{method}')(value)
+        return bytes(data.BYTES).hex().upper().encode('ascii')
+
+    def test_encoding_matches_put_methods(self):
+        self.assertEqual(cmd.ReadData(1, 0x10203, 0x40506, 'full').toCmdBytes(),
+                         self.put(0xBD, ('Byte', 1), ('Int3BytesLE', 0x10203), ('Int3BytesLE', 0x40506),
+                                  ('Byte', 2)))
+        self.assertEqual(cmd.CreateValueFile(2, 0, 0xEEEE, -5, 1000, 10, 1).toCmdBytes(),
+                         self.put(0xCC, ('Byte', 2), ('Byte', 0), ('ShortLE', 0xEEEE), ('IntLE', -5),
+                                  ('IntLE', 1000), ('IntLE', 10), ('Byte', 1)))
+        self.assertEqual(cmd.GetDelegatedInfo(0x1234).toCmdBytes(), self.put(0x69, ('ShortLE', 0x1234)))
+
+    def test_fields_are_masked(self):
+        self.assertEqual(cmd.SelectApp(0x1234567).toCmdBytes(), b'5A674523')
+        self.assertEqual(cmd.GetKeyVersion(0x1FF).toCmdBytes(), b'64FF')
+
+    def test_mode_field_sets_command_mode(self):
+        command = cmd.ReadData(1, 0, 4, 'mac')
+        self.assertEqual((command.name, command.mode), ('read_data', 'mac'))
+        with self.assertRaises(Exception):
+            cmd.ReadData(1, 0, 4, 'encrypted')
+
+    def test_field_types_are_checked(self):
+        with self.assertRaises(Exception) as ctx:
+            cmd.GetKeyVersion('1')
+        self.assertIn('keyNo should be type int', str(ctx.exception))
+        with self.assertRaises(Exception):
+            SlabDesFireCmdSpec(0x60, 'test', 'mac', ('value:Long',))
+
+    def test_pack(self):
+        spec = cmd.SPECS['CreateStdDataFile']
+        self.assertEqual(spec.pack(1, 0, 0x1234, 0x20), bytes.fromhex('01003412200000'))
+        self.assertEqual(spec.struct.size, 7)
+
+
+
+class SlabDesFireCmdTemplateTest(unittest.TestCase):
+
+    def test_bind_matches_factory(self):
+        template = cmd.prepare('ReadData', fileNo=1, commMode='mac')
+        self.assertEqual(template.slots, ('offset', 'length'))
+        self.assertEqual(template.mode, 'mac')
+        for offset, length in ((0, 0), (0x10, 0x20), (0xABCDEF, 0x123456)):
+            self.assertEqual(template.bind(offset=offset, length=length),
+                             cmd.ReadData(1, offset, length, 'mac').toCmdBytes())
+
+    def test_unbound_slots_keep_last_values(self):
+        template = cmd.prepare('Credit', fileNo=2, commMode='plain')
+        self.assertEqual(template.toCmdBytes(), cmd.Credit(2, 0, 'plain').toCmdBytes())
+        template.bind(value=100)
+        self.assertEqual(template.bind(), cmd.Credit(2, 100, 'plain').toCmdBytes())
+        self.assertEqual(template.toCmdStr(), cmd.Credit(2, 100, 'plain').toCmdStr())
+
+    def test_invalid_template(self):
+        with self.assertRaises(Exception):
+            cmd.prepare('Foo')
+        with self.assertRaises(Exception):
+            cmd.prepare('ReadData', fileNo=1, size=2, commMode='plain')
+        # comm mode is constant
+        with self.assertRaises(Exception):
+            cmd.prepare('ReadData', fileNo=1)
+        template = cmd.prepare('ReadData', fileNo=1, commMode='plain')
+        with self.assertRaises(TypeError):
+            template.bind(1, 2)
+        with self.assertRaises(Exception):
+            template.bind(offset='1')
+
+
+if __name__ == '__main__':
+    unittest.main()
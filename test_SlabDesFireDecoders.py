@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireDecoders import *
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+NAME1 = bytes.fromhex('D2760000850101')
+NAME2 = bytes.fromhex('D2760000850102')
+
+
+class SlabDesFireDecodersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0xA1, isoFid=0x1001, isoAid=NAME1), cmd.CreateApp(2, 0x0F, 0x81)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+
+    def tearDown(self):
+        self.env.free()
+
+    def decode(self, command):
+        return SlabDesFireDecoders.send(self.env, command)
+
+    def test_version_and_app_ids(self):
+        self.assertEqual(self.decode(cmd.GetVersion()).generation, 'EV2')
+        self.assertEqual(list(self.decode(cmd.GetAppIDs())), [1, 2])
+        self.assertIsNone(SlabDesFireDecoders.decode(cmd.Format(), b''))
+
+    def test_file_settings_types(self):
+        for x in (cmd.SelectApp(2), cmd.AuthenticateAES(0, bytes(16)), cmd.CreateStdDataFile(1, 0, 0x1234, 100),
+                  cmd.CreateValueFile(2, 0, 0xEEEE, -5, 1000, 10, 1), cmd.CreateCyclicRecordFile(3, 0, 0xEEEE, 4, 21)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        data = self.decode(cmd.GetFileSettings(1))
+        self.assertIsInstance(data, SlabDesFireDataFileSettings)
+        self.assertEqual((data.fileSize, data.readAccess, data.changeAccess), (100, 1, 4))
+        value = self.decode(cmd.GetFileSettings(2))
+        self.assertIsInstance(value, SlabDesFireValueFileSettings)
+        self.assertEqual((value.lowerLimit, value.upperLimit), (-5, 1000))
+        record = self.decode(cmd.GetFileSettings(3))
+        self.assertIsInstance(record, SlabDesFireRecordFileSettings)
+        self.assertEqual((record.fileType, record.recordSize, record.maxRecords, record.currentRecords),
+                         (SlabDesFireRecordFileSettings.CYCLIC, 4, 21, 0))
+
+    def test_df_names_of_one_application(self):
+        names = SlabDesFireDFNames.read(self.env)
+        self.assertEqual([(x.aid, x.dfName) for x in names.entries], [(1, NAME1)])
+        # entries are split once
+        self.assertIs(names.entries, names.entries)
+
+    def test_df_names_of_several_applications(self):
+        self.assertEqual(self.env.send(cmd.CreateApp(0x010203, 0x0F, 0xA1, isoFid=0x1002, isoAid=NAME2)).sw, 0)
+        self.assertIsNone(self.decode(cmd.GetDFNames()).entries)
+        names = SlabDesFireDFNames.read(self.env)
+        self.assertEqual([(x.aid, x.isoFid, x.dfName) for x in names.entries],
+                         [(1, 0x1001, NAME1), (0x010203, 0x1002, NAME2)])
+
+    def test_df_names_split_by_aids(self):
+        data = bytes.fromhex('0100000110') + NAME1 + bytes.fromhex('0302010210') + NAME2
+        self.assertIsNone(SlabDesFireDFNames(data).entries)
+        self.assertEqual(len(SlabDesFireDFNames(data, [1, 2, 0x010203]).entries), 2)
+        # AIDs come in the order of GetAppIDs
+        self.assertIsNone(SlabDesFireDFNames(data, [0x010203, 1]).entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
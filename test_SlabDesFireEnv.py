@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import pickle
+import threading
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireFileIOError
+from SlabDesFireResp import SlabDesFireResp
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireEnvSendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+
+    def tearDown(self):
+        self.env.free()
+
+    def test_response_is_immutable(self):
+        resp = self.env.send(cmd.GetVersion())
+        self.assertIsInstance(resp, SlabDesFireResp)
+        self.assertEqual((resp.sw, len(resp.data)), (0, 28))
+        self.assertEqual(bytes(resp.view(14, 21)), resp.data[14:21])
+        with self.assertRaises(AttributeError):
+            resp.sw = 1
+        self.assertEqual(pickle.loads(pickle.dumps(resp)), resp)
+
+    def test_error_response(self):
+        resp = SlabDesFireResp(b'-30001,unknown command')
+        self.assertTrue(resp.isError)
+        self.assertEqual((resp.data, resp.message), (b'', 'unknown command'))
+        with self.assertRaises(Exception):
+            SlabDesFireResp(b'00')
+
+    def test_send_str_keeps_result(self):
+        self.assertIs(self.env.sendStr('60'), self.env)
+        self.assertEqual((self.env.sw, len(self.env.resp)), (0, 56))
+
+    def test_send_bytes(self):
+        for command in (cmd.GetVersion(), cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8))):
+            self.assertEqual(command.toCmdBytes(), command.toCmdStr().encode('ascii'))
+            self.assertEqual(self.env.sendBytes(command.toCmdBytes()), self.env.send(command))
+        for command in ('60', bytearray(b'60'), b''):
+            with self.assertRaises(Exception):
+                self.env.sendBytes(command)
+        self.assertEqual(SlabDesFireEnv.encode('6a'), b'6a')
+        self.assertEqual(SlabDesFireEnv.encode(bytearray(b'60')), b'60')
+
+    def test_threads_share_env(self):
+        def run():
+            for _ in range(200):
+                self.assertEqual(self.env.send(cmd.GetVersion()).sw, 0)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for x in threads:
+            x.start()
+        for x in threads:
+            x.join()
+        self.assertEqual(self.env.cmdCount, 800)
+
+
+class SlabDesFireEnvSendManyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+
+    def tearDown(self):
+        self.env.free()
+
+    def test_results_match_send(self):
+        commands = [cmd.GetVersion(), '6A', b'60']
+        sws, payloads = self.env.sendMany(commands)
+        self.assertEqual(list(sws), [0, 0, 0])
+        self.assertEqual(payloads, [self.env.send(x).data for x in commands])
+        self.assertEqual(self.env.cmdCount, 6)
+
+    def test_stop_on_error(self):
+        commands = [cmd.SelectApp(0), cmd.SelectApp(5), cmd.GetVersion()]
+        sws, payloads = self.env.sendMany(commands)
+        self.assertEqual((list(sws), payloads), ([0, 0xA0], [b'', b'']))
+        sws, _ = self.env.sendMany(commands, stopOnError=False)
+        self.assertEqual(list(sws), [0, 0xA0, 0])
+        sws, _ = self.env.sendMany(commands + ['ZZ', '60'], allowed=(0, 0xA0))
+        self.assertEqual(list(sws), [0, 0xA0, 0, -30001])
+
+    def test_invalid_command_sends_nothing(self):
+        with self.assertRaises(Exception):
+            self.env.sendMany([cmd.GetVersion(), ''])
+        self.assertEqual(self.env.cmdCount, 0)
+
+
+class SlabDesFireEnvFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateStdDataFile(1, 0, 0xEEEE, 100), cmd.CreateLinearRecordFile(2, 0, 0xEEEE, 4, 10),
+                  cmd.CreateValueFile(3, 0, 0xEEEE, 0, 100, 0, 0)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+
+    def tearDown(self):
+        self.env.free()
+
+    def test_iter_read(self):
+        data = bytes(range(100))
+        self.assertEqual(self.env.send(cmd.WriteData(1, 0, 100, 'plain', data)).sw, 0)
+        self.assertEqual(b''.join(bytes(x) for x in self.env.iter_read(1, 30)), data)
+        self.assertEqual(b''.join(bytes(x) for x in self.env.iter_read(1, 30, 90)), data[90:])
+        self.assertEqual(b''.join(bytes(x) for x in self.env.iter_read(1, 30, 10, 5)), data[10:15])
+
+    def test_iter_read_range_is_checked(self):
+        for offset, length in ((101, None), (-1, None), (0, -1)):
+            with self.assertRaises(SlabDesFireFileIOError):
+                list(self.env.iter_read(1, 30, offset, length))
+        with self.assertRaises(SlabDesFireFileIOError):
+            list(self.env.iter_read(3, 30))
+
+    def test_iter_records_from_latest(self):
+        for x in range(5):
+            self.assertEqual(self.env.send(cmd.WriteRecord(2, 0, 4, 'plain', bytes([x]) * 4)).sw, 0)
+            self.assertEqual(self.env.send(cmd.CommitTransaction(False)).sw, 0)
+        records = [bytes(x) for x in self.env.iter_records(2, 2)]
+        self.assertEqual(records, [bytes([x]) * 4 for x in range(4, -1, -1)])
+
+    def test_iter_records_checks_file_type(self):
+        count = self.env.cmdCount
+        with self.assertRaises(SlabDesFireFileIOError):
+            list(self.env.iter_records(1, 2))
+        with self.assertRaises(SlabDesFireFileIOError):
+            list(self.env.iter_records(3, 2))
+        # only GetFileSettings is sent
+        self.assertEqual(self.env.cmdCount - count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import os
+import tempfile
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileCache import SlabDesFireFileCache, SlabDesFireMmapStore
+from SlabDesFireMetaCache import SlabDesFireMetaCache
+from SlabDesFireSession import SlabDesFireSession
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+UID = bytes.fromhex('04112233445566')
+
+
+class SlabDesFireFileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        # file 1 is readable without authentication, file 2 is a backup file, file 3 needs key 1
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x82), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateStdDataFile(1, 0, 0xEEEE, 32), cmd.CreateBackupDataFile(2, 0, 0xEEEE, 32),
+                  cmd.CreateStdDataFile(3, 0, 0x1111, 32)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.cache = SlabDesFireFileCache(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def tap(self, *commands, cache=None):
+        cache = self.cache if cache is None else cache
+        cache.setUID(UID)
+        for x in (cmd.SelectApp(1),) + commands:
+            self.assertEqual(cache.send(x).sw, 0, x)
+        return cache
+
+    def read(self, fileNo, offset=0, length=32, commMode='plain', cache=None):
+        cache = self.cache if cache is None else cache
+        count = self.env.cmdCount
+        resp = cache.send(cmd.ReadData(fileNo, offset, length, commMode))
+        self.assertEqual(resp.sw, 0)
+        return resp.data, self.env.cmdCount > count
+
+    def test_range_is_answered_locally(self):
+        self.tap()
+        self.assertEqual(self.read(1), (bytes(32), True))
+        self.assertEqual(self.read(1), (bytes(32), False))
+        self.assertEqual(self.read(1, 4, 8), (bytes(8), False))
+        self.tap()
+        self.assertEqual(self.read(1), (bytes(32), False))
+        self.assertEqual(self.cache.hits, 3)
+
+    def test_write_invalidates(self):
+        self.tap()
+        self.read(1)
+        self.cache.send(cmd.WriteData(1, 0, 2, 'plain', b'\x01\x02'))
+        self.assertEqual(self.read(1, 0, 2), (b'\x01\x02', True))
+
+    def test_commit_invalidates_backup_file(self):
+        self.tap()
+        self.read(2)
+        self.cache.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        # a backup file shows the old data until commit
+        self.assertEqual(self.read(2, 0, 2), (bytes(2), True))
+        self.assertEqual(self.cache.send(cmd.CommitTransaction(False)).sw, 0)
+        self.assertEqual(self.read(2, 0, 2), (b'\x01\x02', True))
+
+    def test_unknown_uid_write_clears_all_cards(self):
+        self.tap()
+        self.read(2)
+        self.cache.setUID(None)
+        self.cache.send(cmd.SelectApp(1))
+        for x in (cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'), cmd.CommitTransaction(False)):
+            self.assertEqual(self.cache.send(x).sw, 0, x)
+            self.assertEqual(len(self.cache.store), 0)
+        self.tap()
+        self.assertEqual(self.read(2, 0, 2), (b'\x01\x02', True))
+
+    def test_range_is_scoped_by_authentication(self):
+        self.tap(cmd.AuthenticateAES(1, bytes(16)))
+        self.assertEqual(self.read(3), (bytes(32), True))
+        self.tap()
+        self.assertEqual(self.cache.send(cmd.ReadData(3, 0, 32, 'plain')).sw, 0xAE)
+
+    def test_full_mode_is_not_persisted(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cache.bin')
+        store = SlabDesFireMmapStore(path, 4096)
+        try:
+            cache = self.tap(cmd.AuthenticateAES(1, bytes(16)), cache=SlabDesFireFileCache(self.env, store))
+            self.assertTrue(self.read(3, commMode='full', cache=cache)[1])
+            self.assertTrue(self.read(3, commMode='full', cache=cache)[1])
+            self.read(1, cache=cache)
+            self.assertEqual([k[2] for k in store], [1])
+        finally:
+            store.close()
+            os.remove(path)
+
+    def test_stacked_on_other_wrappers(self):
+        cache = SlabDesFireFileCache(SlabDesFireMetaCache(SlabDesFireSession(self.env)))
+        self.tap(cache=cache)
+        self.read(1, cache=cache)
+        self.assertEqual(self.read(1, cache=cache), (bytes(32), False))
+        self.env.create()
+        cache.send(cmd.SelectApp(1))
+        self.assertIsNone(cache.uid)
+        self.assertTrue(self.read(1, cache=cache)[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireChunkTuner, SlabDesFireFileIO, SlabDesFireFileIOError
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireFileIOTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateStdDataFile(1, 0, 0xEEEE, 1000), cmd.CreateBackupDataFile(2, 0, 0xEEEE, 100)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.io = SlabDesFireFileIO(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def test_write_and_read_in_chunks(self):
+        data = bytes(x & 0xFF for x in range(1000))
+        self.io.write(1, 0, data)
+        self.assertEqual(self.io.read(1), data)
+        self.assertEqual(self.io.read(1, 990), data[990:])
+        self.assertEqual(self.io.read(1, 100, 600), data[100:700])
+
+    def test_backup_file_commit(self):
+        self.io.write(2, 0, b'\x01\x02', commit=True)
+        self.assertEqual(self.io.read(2, 0, 2), b'\x01\x02')
+
+    def test_read_range_is_checked(self):
+        self.assertEqual(self.io.read(1, 1000), bytearray())
+        for offset, length in ((1001, None), (-1, None), (-1, 4), (0, -1)):
+            with self.assertRaises(SlabDesFireFileIOError):
+                self.io.read(1, offset, length)
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.io.readInto(bytearray(4), 1, -1)
+
+    def test_failed_read_raises_with_status(self):
+        with self.assertRaises(SlabDesFireFileIOError) as ctx:
+            self.io.read(1, 990, 20)
+        self.assertEqual(ctx.exception.sw, 0xBE)
+
+    def test_tuner_climbs_to_best_size(self):
+        tuner = SlabDesFireChunkTuner('EV2', 'plain')
+        size = tuner.chunkSize
+        self.assertEqual(size % 59, 0)
+        tuner.record(size, size, 1.0)
+        self.assertIn(tuner.chunkSize, (size + 59, size - 59))
+
+
+if __name__ == '__main__':
+    unittest.main()
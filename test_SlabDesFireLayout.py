@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireLayout import SlabDesFireLayout, SlabDesFireLayoutError
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+LAYOUT = """
+format = true
+[picc]
+key = "0000000000000000"
+[[apps]]
+aid = 0x000001
+keySettings = 0x0B
+crypto = "AES"
+keyCount = 3
+[[apps.keys]]
+keyNo = 1
+key = "112233445566778899AABBCCDDEEFF01"
+[[apps.files]]
+fileNo = 1
+type = "backup"
+access = {read = 1, write = 1, readWrite = 1, change = 0}
+size = 8
+data = "0102030405060708"
+[[apps.files]]
+fileNo = 2
+type = "cyclic"
+access = 0xEEEE
+recordSize = 4
+maxRecords = 5
+records = ["00000001", "00000002"]
+"""
+
+
+class SlabDesFireLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        self.layout = SlabDesFireLayout.loads(LAYOUT, 'toml')
+        self.cacheDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.env.free()
+        shutil.rmtree(self.cacheDir)
+
+    def test_compile_and_run(self):
+        plan = self.layout.compile()
+        self.assertTrue(all(x.frozen for x in plan))
+        self.assertEqual(SlabDesFireLayout.run(self.env, plan), len(plan))
+        for x in (cmd.SelectApp(1), cmd.AuthenticateAES(1, '112233445566778899AABBCCDDEEFF01')):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.assertEqual(self.env.send(cmd.ReadData(1, 0, 8, 'plain')).data, bytes(range(1, 9)))
+        self.assertEqual(self.env.send(cmd.ReadRecord(2, 0, 0, 'plain')).data, bytes.fromhex('0000000100000002'))
+
+    def test_plan_is_cached_as_hex_lines(self):
+        plan = self.layout.plan(self.cacheDir)
+        self.assertEqual(plan, [x.toCmdBytes() for x in self.layout.compile()])
+        path = os.path.join(self.cacheDir, f'{self.layout.digest}.plan')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read().splitlines(), plan)
+        self.assertEqual(os.listdir(self.cacheDir), [os.path.basename(path)])
+        self.assertEqual(self.layout.plan(self.cacheDir), plan)
+        self.assertEqual(SlabDesFireLayout.run(self.env, self.layout.plan(self.cacheDir)), len(plan))
+
+    def test_invalid_cache_file_is_compiled_again(self):
+        path = os.path.join(self.cacheDir, f'{self.layout.digest}.plan')
+        with open(path, 'wb') as f:
+            f.write(b'\x80\x04\x95garbage')
+        self.assertEqual(self.layout.plan(self.cacheDir), self.layout.plan())
+
+    def test_digest_follows_content(self):
+        other = SlabDesFireLayout.loads(LAYOUT.replace('size = 8', 'size = 9'), 'toml')
+        self.assertNotEqual(other.digest, self.layout.digest)
+        self.assertEqual(SlabDesFireLayout.loads(LAYOUT, 'toml').digest, self.layout.digest)
+
+    def test_failed_command_raises(self):
+        plan = self.layout.plan()
+        SlabDesFireLayout.run(self.env, plan)
+        # without format, the applications exist already
+        plan = SlabDesFireLayout.loads(LAYOUT.replace('format = true', 'format = false'), 'toml').plan()
+        with self.assertRaises(SlabDesFireLayoutError) as ctx:
+            SlabDesFireLayout.run(self.env, plan)
+        self.assertNotEqual(ctx.exception.sw, 0)
+        self.assertIn('CA', str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
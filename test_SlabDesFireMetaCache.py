@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireDecoders import SlabDesFireDecoders
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireMetaCache import SlabDesFireMetaCache
+from SlabDesFireSession import SlabDesFireSession
+from SlabDesFireTransport import SlabDesFireSimTransport
+from SlabDesFireWriteBuffer import SlabDesFireWriteBuffer
+
+UID = bytes.fromhex('04112233445566')
+
+
+class SlabDesFireMetaCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        # application 1 lists files without authentication, application 2 only with key 0
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.CreateApp(2, 0x09, 0x81),
+                  cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)), cmd.CreateStdDataFile(1, 0, 0x1234, 32),
+                  cmd.SelectApp(2), cmd.AuthenticateAES(0, bytes(16)), cmd.CreateStdDataFile(1, 0, 0x1234, 32)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.cache = SlabDesFireMetaCache(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def tap(self, *commands):
+        self.cache.setUID(UID)
+        count = self.env.cmdCount
+        for x in commands:
+            self.assertEqual(self.cache.send(x).sw, 0, x)
+        return self.env.cmdCount - count
+
+    def test_second_tap_is_answered_locally(self):
+        commands = (cmd.SelectApp(0), cmd.GetVersion(), cmd.GetAppIDs(), cmd.SelectApp(1), cmd.GetFileIDs(),
+                    cmd.GetFileSettings(1))
+        self.assertEqual(self.tap(*commands), 6)
+        self.assertEqual(self.tap(*commands), 2)
+        self.assertEqual(self.cache.hits, 4)
+
+    def test_mutation_invalidates(self):
+        self.tap(cmd.SelectApp(1), cmd.GetFileIDs())
+        self.tap(cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)), cmd.DeleteFile(1))
+        self.tap(cmd.SelectApp(1))
+        ids = SlabDesFireDecoders.decode(cmd.GetFileIDs(), self.cache.send(cmd.GetFileIDs()))
+        self.assertEqual(list(ids), [])
+
+    def test_answer_is_scoped_by_authentication(self):
+        self.tap(cmd.SelectApp(2), cmd.AuthenticateAES(0, bytes(16)), cmd.GetFileIDs())
+        self.cache.setUID(UID)
+        self.cache.send(cmd.SelectApp(2))
+        self.assertEqual(self.cache.send(cmd.GetFileIDs()).sw, 0xAE)
+
+    def test_unknown_uid_mutation_clears_all_cards(self):
+        self.tap(cmd.SelectApp(0), cmd.GetAppIDs())
+        self.cache.setUID(None)
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.CreateApp(5, 0x0F, 0x81)):
+            self.cache.send(x)
+        self.tap(cmd.SelectApp(0))
+        ids = SlabDesFireDecoders.decode(cmd.GetAppIDs(), self.cache.send(cmd.GetAppIDs()))
+        self.assertIn(5, list(ids))
+
+    def test_learned_uid_is_reset_with_context(self):
+        self.cache.send(cmd.GetVersion())
+        self.assertEqual(self.cache.uid, UID)
+        self.env.create()
+        self.cache.send(cmd.SelectApp(0))
+        self.assertIsNone(self.cache.uid)
+
+    def test_stacked_on_other_wrappers(self):
+        cache = SlabDesFireMetaCache(SlabDesFireWriteBuffer(SlabDesFireSession(self.env)))
+        cache.setUID(UID)
+        self.assertEqual(cache.send(cmd.SelectApp(0)).sw, 0)
+        self.env.create()
+        cache.send(cmd.SelectApp(0))
+        self.assertIsNone(cache.uid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import threading
+import time
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFirePool import SlabDesFireEnvPool
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireEnvPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        # the sim enforces the quota and contexts of the public df_lib
+        self.transport = SlabDesFireSimTransport(maxContexts=2, maxCommands=60)
+        self.pool = SlabDesFireEnvPool(transport=self.transport)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_context_is_recycled_before_quota(self):
+        for _ in range(10):
+            with self.pool.session(needed=20) as env:
+                for _ in range(20):
+                    self.assertEqual(env.send(cmd.GetVersion()).sw, 0)
+        self.assertGreater(self.pool.recycleCount, 0)
+
+    def test_ensure(self):
+        env = self.pool.checkout()
+        for _ in range(50):
+            env.send(cmd.GetVersion())
+        self.assertTrue(self.pool.ensure(env, 20))
+        self.assertEqual(self.pool.remaining(env), 60)
+        self.assertFalse(self.pool.ensure(env, 20))
+        self.pool.checkin(env)
+        with self.assertRaises(Exception):
+            self.pool.ensure(env, 61)
+
+    def test_checkin_of_idle_or_foreign_context_raises(self):
+        env = self.pool.checkout()
+        self.pool.checkin(env)
+        with self.assertRaises(Exception):
+            self.pool.checkin(env)
+        other = SlabDesFireEnv(SlabDesFireSimTransport())
+        with self.assertRaises(Exception):
+            self.pool.checkin(other)
+
+    def test_checkout_timeout(self):
+        envs = [self.pool.checkout(), self.pool.checkout()]
+        with self.assertRaises(TimeoutError):
+            self.pool.checkout(timeout=0.05)
+        for env in envs:
+            self.pool.checkin(env)
+
+    def test_waiters_are_served_in_order(self):
+        envs = [self.pool.checkout(), self.pool.checkout()]
+        order = []
+        started = []
+
+        def wait(n):
+            started.append(n)
+            with self.pool.session():
+                order.append(n)
+
+        threads = []
+        for n in range(3):
+            x = threading.Thread(target=wait, args=(n,))
+            x.start()
+            threads.append(x)
+            # each waiter takes its ticket before the next one starts
+            while len(started) <= n or len(self.pool._waiters) <= n:
+                time.sleep(0.001)
+        for env in envs:
+            self.pool.checkin(env)
+        for x in threads:
+            x.join()
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_closed_pool(self):
+        self.pool.close()
+        with self.assertRaises(Exception):
+            self.pool.checkout()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireFileIOError
+from SlabDesFireRecordReader import SlabDesFireRecordReader
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+UID = bytes.fromhex('04112233445566')
+
+
+class SlabDesFireRecordReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateCyclicRecordFile(2, 0, 0xEEEE, 4, 6), cmd.CreateStdDataFile(3, 0, 0xEEEE, 4)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.reader = SlabDesFireRecordReader(self.env)
+        self.next = 0
+
+    def tearDown(self):
+        self.env.free()
+
+    def add(self, count):
+        for _ in range(count):
+            self.env.send(cmd.WriteRecord(2, 0, 4, 'plain', self.next.to_bytes(4, 'little')))
+            self.env.send(cmd.CommitTransaction(False))
+            self.next += 1
+
+    def read(self):
+        """
+        Return numbers of the new records, keeping count of commands sent in self.sent.
+        """
+        count = self.env.cmdCount
+        records = [int.from_bytes(x, 'little') for x in self.reader.read(UID, 1, 2)]
+        self.sent = self.env.cmdCount - count
+        return records
+
+    def test_only_new_records_are_read(self):
+        self.add(3)
+        self.assertEqual(self.read(), [0, 1, 2])
+        self.assertEqual(self.read(), [])
+        self.assertEqual(self.sent, 1)
+        self.add(1)
+        self.assertEqual(self.read(), [3])
+        self.assertEqual(self.sent, 1)
+
+    def test_settings_are_not_read_per_tap(self):
+        self.add(2)
+        self.read()
+        for _ in range(3):
+            self.add(1)
+            self.read()
+            self.assertEqual(self.sent, 1)
+
+    def test_growth_beyond_cached_count(self):
+        self.add(1)
+        self.read()
+        self.add(3)
+        self.assertEqual(self.read(), [1, 2, 3])
+
+    def test_full_cyclic_file(self):
+        self.add(5)
+        self.read()
+        self.add(8)
+        # a cyclic file keeps one record less than its quantity
+        self.assertEqual(self.read(), [8, 9, 10, 11, 12])
+        self.add(1)
+        self.assertEqual(self.read(), [13])
+        self.assertEqual(self.sent, 1)
+
+    def test_cleared_file_is_read_again(self):
+        self.add(3)
+        self.read()
+        self.assertEqual(self.env.send(cmd.ClearRecordFile(2)).sw, 0)
+        self.assertEqual(self.env.send(cmd.CommitTransaction(False)).sw, 0)
+        self.add(1)
+        # BOUNDARY_ERROR of the cached count reads the settings again
+        self.assertEqual(self.read(), [3])
+
+    def test_recreated_context_reads_settings(self):
+        self.add(2)
+        self.read()
+        self.env.create()
+        for x in (cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16))):
+            self.env.send(x)
+        self.add(1)
+        self.assertEqual(self.read(), [2])
+        self.assertEqual(self.sent, 2)
+
+    def test_other_file_type_raises(self):
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.reader.read(UID, 1, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
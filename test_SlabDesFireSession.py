@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireSession import SlabDesFireSession
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0B, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateStdDataFile(1, 0, 0xEEEE, 32), cmd.CreateBackupDataFile(2, 0, 0xEEEE, 32),
+                  cmd.SelectApp(0)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.session = SlabDesFireSession(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def sent(self, *commands):
+        count = self.env.cmdCount
+        for x in commands:
+            self.assertEqual(self.session.send(x).sw, 0, x)
+        return self.env.cmdCount - count
+
+    def test_select_is_skipped_while_not_authenticated(self):
+        self.assertEqual(self.sent(cmd.SelectApp(1), cmd.SelectApp(1), cmd.GetFileIDs()), 2)
+        self.assertEqual(self.session.skipCount, 1)
+
+    def test_select_and_authenticate_pair_is_skipped(self):
+        login = (cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)))
+        self.assertEqual(self.sent(*login), 2)
+        self.assertEqual(self.sent(*login), 0)
+        self.assertEqual(self.session.skipCount, 2)
+        self.assertTrue(self.session.isAuthenticated)
+
+    def test_held_select_drops_authentication(self):
+        self.sent(cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)))
+        self.assertEqual(self.sent(cmd.SelectApp(1)), 0)
+        # the held SelectApp is sent before any other command, and the card drops authentication
+        self.assertEqual(self.session.send(cmd.CreateStdDataFile(3, 0, 0x0000, 32)).sw, 0xAE)
+        self.assertFalse(self.session.isAuthenticated)
+
+    def test_flush_sends_held_select(self):
+        self.sent(cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)), cmd.SelectApp(1))
+        self.assertEqual(self.session.flush().sw, 0)
+        self.assertIsNone(self.session.flush())
+        self.assertFalse(self.session.isAuthenticated)
+
+    def test_pending_transaction_is_not_elided(self):
+        login = (cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)))
+        self.sent(*login, cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        self.assertTrue(self.session.pending)
+        # SelectApp and Authenticate abort the write on the card, so both are sent
+        self.assertEqual(self.sent(*login), 2)
+        self.assertFalse(self.session.pending)
+        self.assertEqual(self.sent(cmd.CommitTransaction(False)), 1)
+        self.assertEqual(self.session.send(cmd.ReadData(2, 0, 2, 'plain')).data, bytes(2))
+
+    def test_commit_ends_transaction(self):
+        self.sent(cmd.SelectApp(1), cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        self.assertEqual(self.sent(cmd.SelectApp(1)), 1)
+        self.sent(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'), cmd.CommitTransaction(False))
+        self.assertFalse(self.session.pending)
+        self.assertEqual(self.sent(cmd.SelectApp(1)), 0)
+        self.assertEqual(self.session.send(cmd.ReadData(2, 0, 2, 'plain')).data, b'\x01\x02')
+
+    def test_recreated_context_invalidates(self):
+        self.sent(cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)), cmd.SelectApp(1))
+        self.env.create()
+        self.assertEqual(self.sent(cmd.SelectApp(1)), 1)
+        self.assertEqual(self.sent(cmd.AuthenticateAES(0, bytes(16))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireDecoders import SlabDesFireDecoders
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireSim import SlabDesFireSimCard
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+PICC_LOGIN = (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)))
+
+
+class SlabDesFireSimTest(unittest.TestCase):
+
+    def setUp(self):
+        self.card = SlabDesFireSimCard()
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport(self.card)).create()
+
+    def tearDown(self):
+        self.env.free()
+
+    def send(self, *commands):
+        return [self.env.send(x).sw for x in commands]
+
+    def test_get_version(self):
+        for generation in SlabDesFireSimCard.GENERATIONS:
+            env = SlabDesFireEnv(SlabDesFireSimTransport(SlabDesFireSimCard(generation))).create()
+            resp = env.send(cmd.GetVersion())
+            self.assertEqual(resp.sw, 0)
+            self.assertEqual(len(resp.data), 28)
+            self.assertEqual(resp.data[14:21], self.card.uid)
+            self.assertEqual(SlabDesFireDecoders.decode(cmd.GetVersion(), resp).generation, generation)
+            env.free()
+
+    def test_delete_app_requires_authentication(self):
+        # PICC key settings with free create/delete
+        self.assertEqual(self.send(*PICC_LOGIN, cmd.ChangeKeySettings(0x0F), cmd.CreateApp(1, 0x0F, 0x81),
+                                   cmd.CreateApp(2, 0x0F, 0x81)), [0] * 5)
+        self.assertEqual(self.send(cmd.SelectApp(0), cmd.DeleteApp(1)), [0, 0xAE])
+        # the master key of another application may not delete it
+        self.assertEqual(self.send(cmd.SelectApp(2), cmd.AuthenticateAES(0, bytes(16)), cmd.DeleteApp(1)),
+                         [0, 0, 0x9D])
+        self.assertEqual(self.send(cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)), cmd.DeleteApp(1)),
+                         [0, 0, 0])
+        self.assertEqual(self.send(*PICC_LOGIN, cmd.DeleteApp(2)), [0, 0, 0])
+        self.assertEqual(list(SlabDesFireDecoders.send(self.env, cmd.GetAppIDs())), [])
+
+    def test_error_drops_authentication_and_transaction(self):
+        self.send(*PICC_LOGIN, cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateBackupDataFile(1, 0, 0x0000, 8))
+        self.assertEqual(self.send(cmd.WriteData(1, 0, 2, 'plain', b'\x01\x02'), cmd.ReadData(9, 0, 1, 'plain')),
+                         [0, 0xF0])
+        self.assertEqual(self.send(cmd.CommitTransaction(False)), [0])
+        self.assertEqual(self.send(cmd.ReadData(1, 0, 2, 'plain')), [0xAE])
+        self.send(cmd.AuthenticateAES(0, bytes(16)))
+        self.assertEqual(self.env.send(cmd.ReadData(1, 0, 2, 'plain')).data, bytes(2))
+
+    def test_free_memory(self):
+        self.send(*PICC_LOGIN)
+        free = SlabDesFireDecoders.send(self.env, cmd.FreeMem()).size
+        self.assertEqual(free, self.card.memorySize)
+        self.send(cmd.CreateApp(1, 0x0F, 0x81))
+        self.assertLess(SlabDesFireDecoders.send(self.env, cmd.FreeMem()).size, free)
+
+
+if __name__ == '__main__':
+    unittest.main()
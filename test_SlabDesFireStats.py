@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireStats import SlabDesFireStats
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = SlabDesFireStats()
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport(), stats=self.stats).create()
+
+    def tearDown(self):
+        self.env.free()
+
+    def test_env_counts_commands_and_status(self):
+        for _ in range(3):
+            self.env.send(cmd.GetVersion())
+        self.env.send(cmd.SelectApp(5))
+        self.env.sendStr('ZZ')
+        self.env.sendMany([cmd.GetAppIDs(), cmd.GetAppIDs()])
+        snapshot = self.stats.snapshot()
+        self.assertEqual({k: v['count'] for k, v in snapshot['latency'].items()},
+                         {'60': 3, '5A': 1, 'ZZ': 1, '6A': 2})
+        self.assertEqual(snapshot['sw'], {0: 5, 0xA0: 1})
+        self.assertEqual(snapshot['errors'], {-30001: 1})
+        self.assertEqual(self.stats.reset().snapshot(), {'latency': {}, 'sw': {}, 'errors': {}})
+
+    def test_escape_command_key(self):
+        self.assertEqual(SlabDesFireStats.commandKey(b'ff01AB'), 'FF01')
+        self.assertEqual(SlabDesFireStats.commandKey(b'6A'), '6A')
+
+    def test_quantiles_within_one_bucket(self):
+        for x in range(100):
+            self.stats.record(b'60', 0, 1e-3 if x < 90 else 1e-2)
+        item = self.stats.snapshot()['latency']['60']
+        self.assertEqual(item['count'], 100)
+        self.assertAlmostEqual(item['sum'], 0.19)
+        self.assertEqual(item['max'], 1e-2)
+        self.assertTrue(1e-3 <= item['p50'] < 1e-3 * 2 ** 0.5)
+        self.assertTrue(1e-2 <= item['p99'] <= item['max'])
+
+    def test_prometheus_text(self):
+        self.stats.record(b'60', 0, 1e-4)
+        self.stats.record(b'5A', -30001, 1e-4)
+        text = self.stats.toPrometheus()
+        self.assertIn('dflib_command_latency_seconds_bucket{cmd="60",le="+Inf"} 1\n', text)
+        self.assertIn('dflib_command_latency_seconds_count{cmd="5A"} 1\n', text)
+        self.assertIn('dflib_status_total{sw="00"} 1\n', text)
+        self.assertIn('dflib_error_total{code="-30001"} 1\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireTrace import SlabDesFireTrace
+from SlabDesFireTransport import SlabDesFireSimTransport
+
+
+class SlabDesFireTraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.trace = SlabDesFireTrace(3)
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport(), trace=self.trace).create()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.env.free()
+        shutil.rmtree(self.dir)
+
+    def test_env_records_commands(self):
+        resp = self.env.send(cmd.GetVersion())
+        self.assertEqual(len(self.trace), 1)
+        _, command, raw = self.trace.records()[0]
+        self.assertEqual(command, b'60')
+        self.assertEqual(raw, b'0,' + resp.data.hex().upper().encode('ascii'))
+
+    def test_oldest_records_are_overwritten(self):
+        for x in range(5):
+            self.trace.add(b'%02X' % x, b'0,', x)
+        self.assertEqual(len(self.trace), 3)
+        self.assertEqual([x[:2] for x in self.trace.records()], [(2, b'02'), (3, b'03'), (4, b'04')])
+        self.trace.clear()
+        self.assertEqual(self.trace.records(), [])
+        with self.assertRaises(ValueError):
+            SlabDesFireTrace(0)
+
+    def test_dump_and_load(self):
+        self.env.send(cmd.GetAppIDs())
+        self.env.sendStr('FF')
+        path = os.path.join(self.dir, 'trace.bin')
+        self.trace.dump(path)
+        records = SlabDesFireTrace.load(path)
+        self.assertEqual(records, self.trace.records())
+        lines = list(SlabDesFireTrace.format(records))
+        self.assertTrue(any('* RESULT: SW=0' in x for x in lines))
+        with open(path, 'wb') as f:
+            f.write(b'DFTR\x00')
+        with self.assertRaises(Exception):
+            SlabDesFireTrace.load(path)
+
+    def test_hex_dump_only_when_info_enabled(self):
+        level = logging.root.level
+        try:
+            logging.root.setLevel(logging.WARNING)
+            with mock.patch.object(SlabDesFireTrace, 'formatHex') as formatHex:
+                self.env.send(cmd.GetVersion())
+                formatHex.assert_not_called()
+            logging.root.setLevel(logging.INFO)
+            with self.assertLogs(level=logging.INFO) as logs:
+                self.env.send(cmd.GetVersion())
+            self.assertTrue(any('CMD:' in x for x in logs.output))
+        finally:
+            logging.root.setLevel(level)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireSim import SlabDesFireSimLib
+from SlabDesFireTransport import *
+
+
+class SlabDesFireTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'trace.txt')
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_transport_is_abstract(self):
+        with self.assertRaises(TypeError):
+            SlabDesFireTransport()
+
+        class Partial(SlabDesFireTransport):
+            def create(self):
+                return 1
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+    def test_open_sim(self):
+        self.assertIsInstance(SlabDesFireTransport.open('sim'), SlabDesFireSimTransport)
+        env = SlabDesFireEnv('sim:EV1').create()
+        self.assertEqual(env.send(cmd.GetVersion()).data[3], 0x01)
+        env.free()
+        with mock.patch.dict(os.environ, {SlabDesFireTransport.ENV_NAME: 'sim'}):
+            self.assertIsInstance(SlabDesFireEnv().transport, SlabDesFireSimTransport)
+
+    def test_open_wrappers(self):
+        transport = SlabDesFireTransport.open(f'sim,latency:20,record:{self.path}')
+        self.assertIsInstance(transport, SlabDesFireRecordTransport)
+        self.assertIsInstance(transport.transport, SlabDesFireLatencyTransport)
+        self.assertEqual(transport.transport.latency, 0.02)
+        env = SlabDesFireEnv(transport).create()
+        start = time.perf_counter()
+        version = env.send(cmd.GetVersion())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.02)
+        env.free()
+        transport.close()
+        replay = SlabDesFireEnv(f'replay:{self.path}').create()
+        self.assertEqual(replay.send(cmd.GetVersion()).data, version.data)
+        with self.assertRaises(Exception):
+            replay.send(cmd.GetVersion())
+
+    def test_open_invalid(self):
+        for spec in ('foo', 'replay', 'sim,record', 'sim,latency:x', 'sim,foo:1'):
+            with self.assertRaises(Exception):
+                SlabDesFireTransport.open(spec)
+
+    def test_replay_mismatch(self):
+        with open(self.path, 'w') as f:
+            f.write('60\t0,00\n')
+        env = SlabDesFireEnv(SlabDesFireReplayTransport(self.path)).create()
+        with self.assertRaises(Exception):
+            env.send(cmd.GetAppIDs())
+
+    def test_lib_keyword(self):
+        lib = SlabDesFireSimLib()
+        env = SlabDesFireEnv(lib=lib).create()
+        self.assertIs(env.lib, lib)
+        self.assertEqual(env.send(cmd.GetVersion()).sw, 0)
+        env.free()
+        with self.assertRaises(Exception):
+            SlabDesFireEnv('sim', lib=lib)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireFileIOError
+from SlabDesFireTransport import SlabDesFireSimTransport
+from SlabDesFireValueSession import SlabDesFireValueSession
+
+
+class SlabDesFireValueSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateValueFile(1, 0, 0xEEEE, 0, 1000, 100, 1), cmd.CreateValueFile(2, 0, 0xEEEE, 0, 50, 10, 0)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.session = SlabDesFireValueSession(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def value(self, fileNo):
+        return self.env.send(cmd.GetValue(fileNo, 'plain')).reader().getIntLE()
+
+    def test_commit_across_files(self):
+        self.assertEqual(self.session.debit(1, 30), 70)
+        self.assertEqual(self.session.debit(1, 5), 65)
+        count = self.env.cmdCount
+        self.assertEqual(self.session.credit(2, 40), 50)
+        self.session.commit()
+        # the shadow of file 2 is read once, then one Debit, one Credit and one commit
+        self.assertEqual(self.env.cmdCount - count, 5)
+        self.assertEqual((self.value(1), self.value(2)), (65, 50))
+        self.assertEqual((self.session.balance(1), self.session.commitCount), (65, 1))
+        self.assertEqual(self.session.commit(), b'')
+
+    def test_operations_are_sent_in_staged_order(self):
+        self.session.credit(1, 5)
+        self.session.credit(1, 5)
+        self.session.debit(1, 3)
+        self.session.credit(2, 1)
+        self.assertEqual(self.session.commands(), [cmd.Credit(1, 10, 'plain').toCmdBytes(),
+                                                   cmd.Debit(1, 3, 'plain').toCmdBytes(),
+                                                   cmd.Credit(2, 1, 'plain').toCmdBytes()])
+        self.session.commit()
+        self.assertEqual((self.value(1), self.value(2)), (107, 11))
+
+    def test_credit_does_not_cover_debit(self):
+        self.session.credit(1, 50)
+        count = self.env.cmdCount
+        with self.assertRaises(SlabDesFireFileIOError) as ctx:
+            self.session.debit(1, 120)
+        self.assertEqual(ctx.exception.sw, SlabDesFireValueSession.SW_BOUNDARY_ERROR)
+        self.assertEqual(self.env.cmdCount, count)
+        self.session.debit(1, 100)
+        self.session.commit()
+        self.assertEqual(self.value(1), 50)
+
+    def test_limits_are_checked_locally(self):
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.credit(2, 41)
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.debit(2, 11)
+        # limited credit is not enabled for file 2
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.limitedCredit(2, 1)
+        with self.assertRaises(Exception):
+            self.session.debit(1, -1)
+        self.assertEqual(self.session.commands(), [])
+
+    def test_limited_credit(self):
+        self.session.debit(1, 30)
+        self.session.commit()
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.limitedCredit(1, 31)
+        self.assertEqual(self.session.limitedCredit(1, 30), 100)
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.debit(1, 1)
+        self.session.commit()
+        self.assertEqual(self.value(1), 100)
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.session.limitedCredit(1, 1)
+
+    def test_failed_commit_reconciles(self):
+        self.session.open(1)
+        # another terminal takes the balance behind the shadow
+        for x in (cmd.Debit(1, 100, 'plain'), cmd.CommitTransaction(False)):
+            self.assertEqual(self.env.send(x).sw, 0)
+        self.session.debit(1, 50)
+        with self.assertRaises(SlabDesFireFileIOError) as ctx:
+            self.session.commit()
+        self.assertEqual(ctx.exception.sw, 0xBE)
+        self.assertEqual((self.session.balance(1), self.session.commands()), (0, []))
+        self.assertEqual(self.value(1), 0)
+
+    def test_abort_and_invalidate(self):
+        self.session.debit(1, 10)
+        self.session.abort()
+        self.assertEqual((self.session.balance(1), self.session.commands()), (100, []))
+        self.session.invalidate()
+        count = self.env.cmdCount
+        self.session.balance(1)
+        # GetFileSettings and GetValue are read again
+        self.assertEqual(self.env.cmdCount - count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import os
+import time
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireWorkers import SlabDesFireWorkerPool
+
+
+def pid(env):
+    return os.getpid()
+
+
+def sleepAndVersion(env, delay):
+    time.sleep(delay)
+    return env.send(cmd.GetVersion()).sw
+
+
+def fail(env):
+    raise ValueError('job failed')
+
+
+class SlabDesFireWorkerPoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = SlabDesFireWorkerPool(workers=2, transport='sim')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_stations_are_separate_processes(self):
+        pids = {self.pool.submit(pid, station=x).result(10) for x in range(len(self.pool))}
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_submit_commands(self):
+        resps = self.pool.submitCommands([cmd.GetVersion(), cmd.SelectApp(5), cmd.GetAppIDs()]).result(10)
+        # stops at the first failed command
+        self.assertEqual([x.sw for x in resps], [0, 0xA0])
+        self.assertEqual(len(resps[0].data), 28)
+        resps = self.pool.submitCommands([cmd.SelectApp(5), cmd.GetVersion()], allowed=(0, 0xA0)).result(10)
+        self.assertEqual([x.sw for x in resps], [0xA0, 0])
+
+    def test_job_exception(self):
+        with self.assertRaises(ValueError):
+            self.pool.submit(fail, station=0).result(10)
+        self.assertEqual(self.pool.submit(sleepAndVersion, 0, station=0).result(10), 0)
+
+    def test_future_resolved_by_caller_keeps_station(self):
+        future = self.pool.submit(sleepAndVersion, 0.2, station=1)
+        # the job is already dispatched
+        self.assertFalse(future.cancel())
+        future.set_result(None)
+        self.assertEqual(self.pool.submit(sleepAndVersion, 0, station=1).result(10), 0)
+
+    def test_closed_pool(self):
+        pool = SlabDesFireWorkerPool(workers=1, transport='sim')
+        with pool:
+            self.assertEqual(pool.submit(sleepAndVersion, 0).result(10), 0)
+        with self.assertRaises(Exception):
+            pool.submit(pid)
+        with self.assertRaises(Exception):
+            SlabDesFireWorkerPool(workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
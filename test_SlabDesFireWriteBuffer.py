@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireFileIO import SlabDesFireFileIOError
+from SlabDesFireTransport import SlabDesFireSimTransport
+from SlabDesFireWriteBuffer import SlabDesFireWriteBuffer
+
+
+class SlabDesFireWriteBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        for x in (cmd.SelectApp(0), cmd.AuthenticateISO(0, bytes(8)), cmd.Format(),
+                  cmd.CreateApp(1, 0x0F, 0x81), cmd.SelectApp(1), cmd.AuthenticateAES(0, bytes(16)),
+                  cmd.CreateStdDataFile(1, 0, 0xEEEE, 300), cmd.CreateBackupDataFile(2, 0, 0xEEEE, 32),
+                  cmd.CreateCyclicRecordFile(3, 0, 0xEEEE, 8, 5)):
+            self.assertEqual(self.env.send(x).sw, 0, x)
+        self.buffer = SlabDesFireWriteBuffer(self.env)
+
+    def tearDown(self):
+        self.env.free()
+
+    def read(self, fileNo, offset, length):
+        return self.env.send(cmd.ReadData(fileNo, offset, length, 'plain')).data
+
+    def test_writes_are_merged(self):
+        for offset, data in ((0, b'HEAD'), (4, b'\x01\x02'), (100, b'abc'), (2, b'X')):
+            self.buffer.send(cmd.WriteData(1, offset, len(data), 'plain', data))
+        self.assertEqual(len(self.buffer.commands()), 2)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.read(1, 0, 6), b'HEXD\x01\x02')
+        self.assertEqual(self.read(1, 100, 3), b'abc')
+
+    def test_commands_match_command_encoding(self):
+        data = bytes(range(200))
+        self.buffer.send(cmd.WriteData(1, 10, len(data), 'plain', data))
+        chunk = self.buffer._chunkSize(0)
+        expected = [cmd.WriteData(1, 10 + x, len(data[x:x + chunk]), 'plain', data[x:x + chunk]).toCmdBytes()
+                    for x in range(0, len(data), chunk)]
+        self.assertEqual(self.buffer.commands(), expected)
+
+    def test_read_sees_buffered_write(self):
+        self.buffer.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        resp = self.buffer.send(cmd.ReadData(2, 0, 4, 'plain'))
+        self.assertEqual(resp.data, b'\x01\x02\x00\x00')
+        self.assertTrue(self.buffer.pending)
+
+    def test_context_manager_commits(self):
+        with self.buffer as buffer:
+            buffer.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+            buffer.send(cmd.WriteRecord(3, 0, 4, 'plain', b'rec1'))
+        self.assertFalse(self.buffer.pending)
+        self.assertEqual(self.read(2, 0, 2), b'\x01\x02')
+        self.assertEqual(self.env.send(cmd.ReadRecord(3, 0, 1, 'plain')).data[:4], b'rec1')
+
+    def test_commit_sends_one_commit_transaction(self):
+        self.buffer.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        count = self.env.cmdCount
+        self.assertEqual(self.buffer.commit().sw, 0)
+        self.assertEqual(self.env.cmdCount - count, 2)
+        self.assertEqual(self.read(2, 0, 2), b'\x01\x02')
+        # nothing is left to commit
+        count = self.env.cmdCount
+        with self.buffer:
+            pass
+        self.assertEqual(self.env.cmdCount, count)
+
+    def test_commit_passed_through_is_not_repeated(self):
+        with self.buffer as buffer:
+            buffer.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+            self.assertEqual(buffer.send(cmd.CommitTransaction(False)).sw, 0)
+            count = self.env.cmdCount
+        self.assertEqual(self.env.cmdCount, count)
+        self.assertEqual(self.read(2, 0, 2), b'\x01\x02')
+
+    def test_failed_flush_keeps_buffer(self):
+        self.buffer.send(cmd.WriteData(1, 0, 2, 'plain', b'\x01\x02'))
+        self.buffer.send(cmd.WriteData(2, 40, 2, 'plain', b'\x01\x02'))
+        with self.assertRaises(SlabDesFireFileIOError):
+            self.buffer.flush()
+        self.assertTrue(self.buffer.pending)
+        self.assertEqual(len(self.buffer.commands()), 2)
+        self.buffer.discard()
+        self.assertFalse(self.buffer.pending)
+
+    def test_abort_discards_buffer(self):
+        self.buffer.send(cmd.WriteData(2, 0, 2, 'plain', b'\x01\x02'))
+        self.assertEqual(self.buffer.send(cmd.AbortTransaction()).sw, 0)
+        self.assertFalse(self.buffer.pending)
+        count = self.env.cmdCount
+        with self.buffer:
+            pass
+        self.assertEqual(self.env.cmdCount, count)
+        self.assertEqual(self.read(2, 0, 2), bytes(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: gbk -*-
+"""
+    @author: Justin Shen
+    Created on 2026/10/18
+
+    Copyright: Justin Shen (zqshen.pub@gmail.com)
+    License: Apache-2.0
+    Licensed under the Apache License, Version 2.0 (the "License"); you may
+    not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+    http://www.apache.org/licenses/LICENSE-2.0
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import struct
+import unittest
+
+from SlabDesFireCmd import SlabDesFireCmd as cmd
+from SlabDesFireEnv import SlabDesFireEnv
+from SlabDesFireTransport import SlabDesFireSimTransport
+from jbytes import JBytes, JBytesView
+
+
+class JBytesViewTest(unittest.TestCase):
+
+    def test_getters(self):
+        view = JBytesView(bytes.fromhex('01 0203 0405 060708 090A0B 0C0D0E0F 10111213 414243'))
+        self.assertEqual(view.getByte(), 0x01)
+        self.assertEqual(view.getShort(), 0x0203)
+        self.assertEqual(view.getShortLE(), 0x0504)
+        self.assertEqual(view.getInt3Bytes(), 0x060708)
+        self.assertEqual(view.getInt3BytesLE(), 0x0B0A09)
+        self.assertEqual(view.getInt(), 0x0C0D0E0F)
+        self.assertEqual(view.getIntLE(), 0x13121110)
+        self.assertEqual(view.getString(3), 'ABC')
+        with self.assertRaises(struct.error):
+            view.getByte()
+        with self.assertRaises(struct.error):
+            view.seek(20).getInt3Bytes()
+
+    def test_slices_share_data(self):
+        data = bytearray(range(8))
+        view = JBytesView(data)
+        part = view[2:6]
+        self.assertIsInstance(part, JBytesView)
+        self.assertEqual(part, bytes([2, 3, 4, 5]))
+        data[3] = 0xFF
+        self.assertEqual(part[1], 0xFF)
+        self.assertEqual(view.skip(1).getBytes(2), bytes([1, 2]))
+        with self.assertRaises(TypeError):
+            part.VIEW[0] = 0
+
+    def test_unpack(self):
+        view = JBytesView(bytes.fromhex('0102030405'))
+        self.assertEqual(view.unpack('<BH'), (1, 0x0302))
+        self.assertEqual(view.INDEX, 3)
+        self.assertEqual(view.unpackFrom('>H', 3), (0x0405,))
+        self.assertEqual(view.INDEX, 3)
+
+    def test_view_of_response(self):
+        env = SlabDesFireEnv(SlabDesFireSimTransport()).create()
+        try:
+            resp = env.send(cmd.GetVersion())
+            view = resp.reader()
+            self.assertEqual(view.getByte(), resp.data[0])
+            self.assertEqual(bytes(view.seek(14).getBytes(7)), resp.data[14:21])
+        finally:
+            env.free()
+
+    def test_jbytes_getitem(self):
+        data = JBytes('01020304')
+        self.assertEqual(data[1], 2)
+        self.assertEqual(data[1:3], bytearray([2, 3]))
+
+
+
+class JBytesHexCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.size = JBytes.HEX_CACHE_SIZE
+        JBytes.clearHexCache()
+
+    def tearDown(self):
+        JBytes.HEX_CACHE_SIZE = self.size
+        JBytes.clearHexCache()
+
+    def test_hits_and_misses(self):
+        for _ in range(3):
+            self.assertEqual(bytes(JBytes('00112233')), bytes.fromhex('00112233'))
+        JBytes().putHexString('00112233')
+        self.assertEqual(JBytes.hexCacheInfo(), {'hits': 3, 'misses': 1, 'size': 1, 'maxSize': self.size})
+
+    def test_callers_get_copies(self):
+        key = JBytes('00' * 16)
+        key.BYTES[0] = 0xFF
+        self.assertEqual(bytes(JBytes('00' * 16)), bytes(16))
+
+    def test_long_and_spaced_strings(self):
+        data = 'AB' * (JBytes.HEX_CACHE_MAX_LENGTH // 2 + 1)
+        self.assertEqual(bytes(JBytes(data)), bytes.fromhex(data))
+        self.assertEqual(JBytes.hexCacheInfo()['size'], 0)
+        self.assertEqual(bytes(JBytes('01 02\t03')), bytes([1, 2, 3]))
+
+    def test_evicted_and_cleared_values_are_zeroed(self):
+        JBytes.HEX_CACHE_SIZE = 2
+        JBytes('11111111')
+        JBytes('22222222')
+        evicted = JBytes._JBytes__hexCache['22222222']
+        JBytes('11111111')
+        JBytes('33333333')
+        # least recently used is evicted
+        self.assertEqual(list(JBytes._JBytes__hexCache), ['11111111', '33333333'])
+        self.assertEqual(bytes(evicted), bytes(4))
+        value = JBytes._JBytes__hexCache['11111111']
+        JBytes.clearHexCache()
+        self.assertEqual(bytes(value), bytes(4))
+        self.assertEqual(JBytes.hexCacheInfo()['size'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()